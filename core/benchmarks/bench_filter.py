@@ -0,0 +1,249 @@
+"""
+Benchmark of datalake filter, on synthetic messages
+
+Usage:
+    python -m core.benchmarks.bench_filter [--sizes 10000 100000 1000000]
+        [--themes railway arrest] [--hit-rate 0.05] [--legacy-rows 20000]
+        [--output bench_filter.csv]
+
+Prefect tasks are called as plain functions, without Prefect server
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+from prefect import Task
+
+# Functions
+from core.benchmarks.corpus_generator import generate_corpus
+from core.process_datalake.filter import datalake_filter
+from core.process_datalake.filter.datalake_filter import DICT_FILTER_CONFIG
+from core.process_datalake.filter.exclusion_rules import generate_hash_exclusion
+from core.process_datalake.filter.terms_matcher import (
+    compile_terms_matcher,
+    match_terms_lists,
+)
+from core.utils.terms_filter.rules_exclusion import list_rules_exclusion
+
+
+def get_rss():
+    """
+    Get resident memory of the process, in MB
+
+    Returns:
+        Resident memory
+    """
+
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # max resident memory since start (in KB on Linux, in bytes on macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def measure(func, *args, **kwargs):
+    """
+    Measure time and peak resident memory of a function
+
+    Args:
+        func: function to measure
+        args, kwargs: arguments of function
+
+    Returns:
+        Tuple (result, seconds, peak resident memory in MB)
+    """
+
+    peak = [get_rss()]
+    running = threading.Event()
+    running.set()
+
+    def sample():
+        while running.is_set():
+            peak[0] = max(peak[0], get_rss())
+            time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        running.clear()
+        sampler.join()
+
+    return result, seconds, max(peak[0], get_rss())
+
+
+@contextmanager
+def tasks_as_functions(module):
+    """
+    Replace Prefect tasks of a module by their functions
+
+    Args:
+        module: module with tasks
+    """
+
+    tasks = {name: obj for name, obj in vars(module).items() if isinstance(obj, Task)}
+
+    for name, obj in tasks.items():
+        setattr(module, name, obj.fn)
+    try:
+        yield
+    finally:
+        for name, obj in tasks.items():
+            setattr(module, name, obj)
+
+
+def run_filter_body(df, dict_config):
+    """
+    Body of flow_datalake_filter on data regrouped, without reading or saving data
+    Run as first run, without old data
+
+    Args:
+        df: dataframe with data
+        dict_config: configuration of the filter, by theme
+
+    Returns:
+        Dataframe with data filtered
+    """
+
+    dict_hash = {
+        theme: datalake_filter.generate_hash_filter(config_filt["terms_lists"])
+        for theme, config_filt in dict_config.items()
+    }
+
+    df, _ = datalake_filter.apply_exclusion_rules(
+        df,
+        pd.DataFrame(),
+        list_rules_exclusion,
+        generate_hash_exclusion(list_rules_exclusion),
+    )
+
+    df_filtered, _, _ = datalake_filter.filter_data_themes(
+        df,
+        dict_config,
+        dict_hash,
+        pd.DataFrame(),
+        pd.DataFrame(),
+        pd.DataFrame(),
+        pd.DataFrame(),
+    )
+
+    _, df_filtered = datalake_filter.split_filtered_data(df_filtered)
+
+    return df_filtered.sort_values("date").reset_index(drop=True)
+
+
+def bench_size(nb_rows, dict_config, hit_rate, legacy_rows):
+    """
+    Benchmark filter on a number of messages
+
+    Args:
+        nb_rows: number of messages
+        dict_config: configuration of the filter, by theme
+        hit_rate: probability of a message with terms of filters
+        legacy_rows: max number of messages for find_terms_in_text
+
+    Returns:
+        List of results, one by step
+    """
+
+    results = []
+
+    def add_result(step, rows, seconds, peak_rss):
+        results.append(
+            {
+                "size": nb_rows,
+                "step": step,
+                "rows": rows,
+                "seconds": round(seconds, 3),
+                "rows_s": round(rows / seconds) if seconds else None,
+                "peak_rss_mb": round(peak_rss, 1),
+            }
+        )
+        print(
+            f"{nb_rows:>9} | {step:<38} | {rows:>9} rows | {seconds:>9.3f} s"
+            f" | {results[-1]['rows_s'] or 0:>9} rows/s | {peak_rss:>8.1f} MB"
+        )
+
+    list_terms_lists = [config["terms_lists"] for config in dict_config.values()]
+    df, seconds, peak_rss = measure(
+        generate_corpus, nb_rows, list_terms_lists, hit_rate=hit_rate
+    )
+    add_result("generate corpus", nb_rows, seconds, peak_rss)
+
+    texts = df["text_translate"].dropna().tolist()
+    texts_legacy = texts[:legacy_rows]
+
+    for theme, config_filt in dict_config.items():
+        for id_list, (list_terms, id_filter) in enumerate(config_filt["terms_lists"]):
+            name_list = f"{theme} list {id_list} (id_filter {id_filter})"
+
+            # find_terms_in_text, text after text
+            _, seconds, peak_rss = measure(
+                lambda: [
+                    datalake_filter.find_terms_in_text(list_terms, text, id_filter)
+                    for text in texts_legacy
+                ]
+            )
+            add_result(f"find_terms {name_list}", len(texts_legacy), seconds, peak_rss)
+
+            # compiled matcher
+            matcher = compile_terms_matcher([(list_terms, id_filter)])
+            _, seconds, peak_rss = measure(
+                lambda: [match_terms_lists(matcher, text) for text in texts]
+            )
+            add_result(f"matcher {name_list}", len(texts), seconds, peak_rss)
+
+    with tasks_as_functions(datalake_filter):
+        for theme, config_filt in dict_config.items():
+            hash_filt = datalake_filter.generate_hash_filter(config_filt["terms_lists"])
+            _, seconds, peak_rss = measure(
+                datalake_filter.apply_filters, df.copy(), theme, config_filt, hash_filt
+            )
+            add_result(f"apply_filters {theme}", nb_rows, seconds, peak_rss)
+
+        _, seconds, peak_rss = measure(run_filter_body, df, dict_config)
+        add_result("flow body", nb_rows, seconds, peak_rss)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of datalake filter")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--themes", nargs="+", default=["railway", "arrest"], choices=DICT_FILTER_CONFIG
+    )
+    parser.add_argument("--hit-rate", type=float, default=0.05)
+    parser.add_argument("--legacy-rows", type=int, default=20_000)
+    parser.add_argument("--output", help="csv file with results")
+    args = parser.parse_args(argv)
+
+    dict_config = {theme: DICT_FILTER_CONFIG[theme] for theme in args.themes}
+
+    results = []
+    for nb_rows in args.sizes:
+        results += bench_size(nb_rows, dict_config, args.hit_rate, args.legacy_rows)
+
+    if args.output:
+        pd.DataFrame(results).to_csv(args.output, index=False)
+        print(f"Results saved to {args.output}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark of Telegram extraction, on an offline fake client
+
+Usage:
+    python -m core.benchmarks.bench_telegram_extract [--concurrency 1 4 8]
+        [--accounts 8] [--messages 2000] [--latency 0.02]
+        [--rate-flood-wait 0.01] [--batch-size 5000] [--output bench.csv]
+
+Prefect tasks are called as plain functions, without Prefect server
+Messages are saved in a temporary folder, as raw data
+"""
+
+import argparse
+import tempfile
+
+import pandas as pd
+
+# Functions
+from core.benchmarks.bench_filter import measure, tasks_as_functions
+from core.benchmarks.telegram_fake import FakeTelegramClient
+from core.libs.data_cache import clear_cache
+from core.process_datalake.telegram import telegram_extract
+
+
+def run_extract(client, list_accounts, base_path):
+    """
+    Extract messages of accounts from client, as flow_telegram_extract
+
+    Args:
+        client: Telegram client
+        list_accounts: list of account names
+        base_path: base path of raw data
+
+    Returns:
+        Dict {account: number of new messages, or exception raised}
+    """
+
+    cursors = telegram_extract.get_cursors(base_path)
+    dict_last = {
+        account: telegram_extract.get_last_date_or_id(cursors, account)
+        for account in list_accounts
+    }
+
+    with client:
+        return client.loop.run_until_complete(
+            telegram_extract.collect_accounts_messages(
+                client, dict_last, cursors, base_path
+            )
+        )
+
+
+def bench_concurrency(nb_concurrent, args):
+    """
+    Benchmark extraction with a number of accounts extracted concurrently
+
+    Args:
+        nb_concurrent: number of accounts extracted concurrently
+        args: arguments of benchmark
+
+    Returns:
+        Dict of results
+    """
+
+    client = FakeTelegramClient(
+        nb_messages=args.messages,
+        latency=args.latency,
+        rate_flood_wait=args.rate_flood_wait,
+        seconds_flood_wait=args.seconds_flood_wait,
+    )
+    list_accounts = [f"account_{i}" for i in range(args.accounts)]
+
+    telegram_extract.NB_CONCURRENT_TELEGRAM = nb_concurrent
+    telegram_extract.SIZE_BATCH_TELEGRAM = args.batch_size
+
+    clear_cache()
+    with tempfile.TemporaryDirectory() as base_path:
+        dict_results, seconds, peak_rss = measure(
+            run_extract, client, list_accounts, base_path
+        )
+
+    nb_messages = sum(r for r in dict_results.values() if isinstance(r, int))
+    nb_failed = sum(isinstance(r, BaseException) for r in dict_results.values())
+
+    result = {
+        "concurrency": nb_concurrent,
+        "accounts": args.accounts,
+        "messages": nb_messages,
+        "failed_accounts": nb_failed,
+        "requests": client.nb_requests,
+        "flood_waits": client.nb_flood_waits,
+        "seconds": round(seconds, 3),
+        "messages_s": round(nb_messages / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+    print(
+        f"{nb_concurrent:>3} concurrent | {nb_messages:>9} messages"
+        f" | {client.nb_flood_waits:>4} flood waits | {seconds:>9.3f} s"
+        f" | {result['messages_s'] or 0:>9} messages/s | {peak_rss:>8.1f} MB"
+    )
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of Telegram extraction")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--accounts", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--rate-flood-wait", type=float, default=0.0)
+    parser.add_argument("--seconds-flood-wait", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--output", help="csv file with results")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tasks_as_functions(telegram_extract):
+        for nb_concurrent in args.concurrency:
+            results.append(bench_concurrency(nb_concurrent, args))
+
+    if args.output:
+        pd.DataFrame(results).to_csv(args.output, index=False)
+        print(f"Results saved to {args.output}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import random
+import pandas as pd
+
+# Variables
+from core.config.variables import LIST_ACCOUNTS_TELEGRAM
+
+
+# words of messages without terms of filters
+LIST_WORDS_EN = (
+    "the a of in on at to was were is and after before near during city "
+    "people local reported according sources said today yesterday morning "
+    "evening night officials residents video photo channel news street "
+    "building car road district village war Ukraine Russia Kyiv drone "
+    "military service government weather market prices school hospital "
+    "water power outage meeting mayor governor holiday concert football "
+    "match bridge airport"
+).split()
+
+LIST_WORDS_RU = (
+    "в на и с по был были после около город люди сообщили источники сегодня "
+    "вчера утром вечером ночью жители видео фото канал новости улица здание "
+    "машина дорога район деревня война Украина Россия Москва область погода "
+    "рынок цены школа больница вода свет"
+).split()
+
+LIST_WORDS_UK = (
+    "в на і з після біля місто люди повідомили джерела сьогодні вчора "
+    "вранці ввечері вночі мешканці відео"
+).split()
+
+
+def generate_nb_words(rnd):
+    """
+    Generate number of words of a message, with a long tail as Telegram messages
+
+    Args:
+        rnd: random generator
+
+    Returns:
+        Number of words
+    """
+
+    return int(min(max(rnd.lognormvariate(3.5, 0.8), 3), 600))
+
+
+def generate_term(rnd, terms_lists):
+    """
+    Pick a term of the terms lists, as words to insert in a message
+
+    Args:
+        rnd: random generator
+        terms_lists: list of (list of terms, id_filter)
+
+    Returns:
+        List of words to insert
+    """
+
+    list_terms, id_filter = rnd.choice([tl for tl in terms_lists if tl[0]])
+    term = rnd.choice(list_terms)
+
+    # sets of words (id_filter 1 and 2), words can be anywhere in the message
+    if id_filter in (1, 2):
+        return list(term)
+
+    return [term]
+
+
+def generate_message(rnd, nb_words, list_terms_lists, hit_rate):
+    """
+    Generate English text of a message, with terms of filters or not
+
+    Args:
+        rnd: random generator
+        nb_words: number of words
+        list_terms_lists: terms lists of each theme
+        hit_rate: probability of a message with terms of filters
+
+    Returns:
+        Text of message
+    """
+
+    words = rnd.choices(LIST_WORDS_EN, k=nb_words)
+
+    # some messages are badly translated and keep words in Russian
+    if rnd.random() < 0.1:
+        words += rnd.choices(LIST_WORDS_RU, k=rnd.randint(1, 5))
+
+    if rnd.random() < hit_rate:
+        for word in generate_term(rnd, rnd.choice(list_terms_lists)):
+            words.insert(rnd.randint(0, len(words)), word)
+
+    # some punctuation
+    return " ".join(
+        word + rnd.choice([",", ".", ""]) if rnd.random() < 0.1 else word
+        for word in words
+    )
+
+
+def generate_corpus(
+    nb_rows,
+    list_terms_lists,
+    hit_rate=0.05,
+    rate_not_translated=0.05,
+    seed=0,
+):
+    """
+    Generate synthetic messages, in the same format as data regrouped for filters
+
+    Args:
+        nb_rows: number of messages
+        list_terms_lists: terms lists of each theme
+        hit_rate: probability of a message with terms of filters
+        rate_not_translated: probability of a message without text_translate
+        seed: seed of random generator
+
+    Returns:
+        Dataframe with ID, date, text_original, text_translate, url, filter_theme
+    """
+
+    rnd = random.Random(seed)
+    start = pd.Timestamp("2022-02-24")
+
+    data = []
+    for i in range(nb_rows):
+        account = rnd.choice(LIST_ACCOUNTS_TELEGRAM)
+        nb_words = generate_nb_words(rnd)
+
+        words_original = LIST_WORDS_UK if rnd.random() < 0.2 else LIST_WORDS_RU
+        text_original = " ".join(rnd.choices(words_original, k=nb_words))
+
+        text_translate = (
+            None
+            if rnd.random() < rate_not_translated
+            else generate_message(rnd, nb_words, list_terms_lists, hit_rate)
+        )
+
+        data.append(
+            {
+                "ID": f"{account}_{i}",
+                "date": start + pd.Timedelta(seconds=rnd.randint(0, 10**8)),
+                "text_original": text_original,
+                "text_translate": text_translate,
+                "url": f"https://t.me/{account}/{i}",
+                "filter_theme": None,
+            }
+        )
+
+    return pd.DataFrame(data)
@@ -0,0 +1,170 @@
+import random
+import asyncio
+import datetime
+from dataclasses import dataclass
+
+from telethon.errors import FloodWaitError
+
+# Functions
+from core.benchmarks.corpus_generator import (
+    LIST_WORDS_RU,
+    LIST_WORDS_UK,
+    generate_nb_words,
+)
+
+
+@dataclass
+class FakeMessage:
+    """Message with the attributes of a Telethon message used by extraction"""
+
+    id: int
+    date: datetime.datetime
+    message: str
+
+    @property
+    def text(self):
+        return self.message
+
+
+class FakeTelegramClient:
+    """
+    Offline stand-in of TelegramClient, for tests and benchmarks of extraction
+    Messages of accounts are synthetic, the same at each iteration (by seed,
+    account and id), returned by requests of size_request messages as Telethon
+    """
+
+    def __init__(
+        self,
+        nb_messages=1000,
+        latency=0.0,
+        size_request=100,
+        rate_flood_wait=0.0,
+        seconds_flood_wait=1,
+        rate_empty=0.05,
+        start_date=datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc),
+        seed=0,
+    ):
+        """
+        Args:
+            nb_messages: number of messages by account (ids 1 to nb_messages)
+            latency: seconds waited by request
+            size_request: number of messages by request
+            rate_flood_wait: probability of a FloodWaitError by request
+            seconds_flood_wait: seconds of FloodWaitError raised
+            rate_empty: probability of a message without text (e.g. only a photo)
+            start_date: date of first message, then one message by hour
+            seed: seed of random generators
+        """
+
+        self.nb_messages = nb_messages
+        self.latency = latency
+        self.size_request = size_request
+        self.rate_flood_wait = rate_flood_wait
+        self.seconds_flood_wait = seconds_flood_wait
+        self.rate_empty = rate_empty
+        self.start_date = start_date
+        self.seed = seed
+
+        self.rnd_flood_wait = random.Random(seed)
+        self.nb_requests = 0
+        self.nb_flood_waits = 0
+        self._loop = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    def get_message(self, account, id_message):
+        """
+        Generate a message of account
+
+        Args:
+            account: account name
+            id_message: id of message
+
+        Returns:
+            FakeMessage
+        """
+
+        rnd = random.Random(f"{self.seed}_{account}_{id_message}")
+        date = self.start_date + datetime.timedelta(hours=id_message - 1)
+
+        if rnd.random() < self.rate_empty:
+            return FakeMessage(id_message, date, "")
+
+        words = LIST_WORDS_UK if rnd.random() < 0.2 else LIST_WORDS_RU
+        text = " ".join(rnd.choices(words, k=generate_nb_words(rnd)))
+
+        return FakeMessage(id_message, date, text)
+
+    async def request(self):
+        """
+        Wait latency of a request, FloodWaitError raised at rate_flood_wait
+        """
+
+        self.nb_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate_flood_wait and self.rnd_flood_wait.random() < self.rate_flood_wait:
+            self.nb_flood_waits += 1
+            raise FloodWaitError(None, capture=self.seconds_flood_wait)
+
+    async def iter_messages(
+        self, entity, limit=None, offset_date=None, offset_id=0, reverse=False
+    ):
+        """
+        Iterate messages of an account, as TelegramClient.iter_messages
+        - reverse: oldest first, messages after offset_id / offset_date
+        - else: newest first, messages before offset_id / offset_date
+
+        Args:
+            entity: account name
+            limit: max number of messages
+            offset_date: date of offset
+            offset_id: id of offset (0 for none)
+            reverse: oldest messages first
+
+        Yields:
+            FakeMessage
+        """
+
+        # ids of messages by date (one message by hour)
+        id_date = None
+        if offset_date is not None:
+            if offset_date.tzinfo is None:
+                offset_date = offset_date.replace(tzinfo=datetime.timezone.utc)
+            hours = (offset_date - self.start_date) / datetime.timedelta(hours=1)
+            id_date = int(hours) + 1
+
+        if reverse:
+            first = max(offset_id, id_date or 0) + 1
+            list_ids = range(max(first, 1), self.nb_messages + 1)
+        else:
+            last = min(
+                offset_id - 1 if offset_id else self.nb_messages,
+                id_date if id_date is not None else self.nb_messages,
+            )
+            list_ids = range(min(last, self.nb_messages), 0, -1)
+
+        if limit is not None:
+            list_ids = list_ids[:limit]
+
+        for i, id_message in enumerate(list_ids):
+            if i % self.size_request == 0:
+                await self.request()
+            yield self.get_message(entity, id_message)
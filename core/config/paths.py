@@ -32,6 +32,12 @@ PATH_QUALIF_DATALAKE = "data/datalake/qualification"
 # Data Classify
 PATH_CLASSIFY_DATALAKE = "data/datalake/classify"
 
+# Artifacts saved locally, if Prefect API is not reachable
+PATH_ARTIFACTS = "data/artifacts"
+
+# Metrics of runs (tasks and flows)
+PATH_PERF_METRICS = "data/metrics"
+
 
 # Data Wharehouse
 PATH_DWH_SOURCES = "data/data_warehouse/sources"
@@ -43,6 +49,7 @@ PATH_DMT_COMPO_WEAPONS = "data/data_warehouse/datamarts/compo_weapons"
 
 # Path Utils
 PATH_JSON_RU_REGION = "core/utils/ru_region.json"
+PATH_JSON_RU_REGION_IDS = "core/utils/ru_region_ids.json"
 PATH_COUNTRY_ISO = "core/config/countries_iso.json"
 
 # scripts
@@ -69,6 +69,39 @@ SCHEMA_QUALIF_ARREST = {
 ####################################
 ####################################
 
+# Compact types of columns of datalake tables, by column name
+# - category: columns with few values, only compared or grouped
+# - string: IDs and texts (pyarrow strings if installed, else object)
+SCHEMA_COMPACT = {
+    "ID": "string",
+    "IDX": "string",
+    "account": "category",
+    "text_original": "string",
+    "text_translate": "string",
+    "url": "string",
+    "filter_theme": "category",
+    "found_terms_railway": "string",
+    "found_terms_arrest": "string",
+    "found_terms_sabotage": "string",
+    "hash_filter_railway": "category",
+    "hash_filter_arrest": "category",
+    "hash_filter_sabotage": "category",
+    "exclusion_rule": "category",
+    "hash_exclusion": "category",
+    "hash_filter": "category",
+    "theme": "category",
+    "term": "string",
+    "hash_term": "string",
+    "qualif_ia": "category",
+    "qualif_region": "category",
+    "qualif_inc_type": "category",
+    "qualif_dmg_eqp": "category",
+}
+
+####################################
+####################################
+####################################
+
 SCHEMA_EXCEL_RAILWAY = {
     "ID": "object",
     "IDX": "object",
@@ -19,6 +19,80 @@ GROUP_SIZE_TO_TRANSLATE = 40
 SIZE_TO_TRANSLATE = 49
 SIZE_TO_QUALIF = 499
 
+# Filter on multiple cores (None = number of cores)
+# under MIN_SIZE_FILTER_PARALLEL messages, filter stay on one core
+FILTER_PARALLEL = True
+NB_WORKERS_FILTER = None
+MIN_SIZE_FILTER_PARALLEL = 20000
+
+# Clean texts on multiple cores (None = number of cores)
+# under MIN_SIZE_CLEAN_PARALLEL texts, cleaning stay on one core
+CLEAN_PARALLEL = True
+NB_WORKERS_CLEAN = None
+MIN_SIZE_CLEAN_PARALLEL = 20000
+
+# Filter data chunk by chunk, to keep memory bounded
+FILTER_STREAMING = False
+SIZE_CHUNK_FILTER = 100000
+
+# max rows by row group in parquet files (read by chunks)
+SIZE_ROW_GROUP = 100000
+
+# Append only new rows to datalake datasets, instead of rewriting all data
+APPEND_DATA = True
+
+# Partition datasets by month of date, in addition to partition columns
+PARTITION_MONTH = False
+COL_PARTITION_MONTH = "partition_month"
+
+# Cache data read in process, reused by next flows (max size in MB)
+CACHE_DATA = True
+SIZE_CACHE_DATA = 4096
+
+# Also save data in intermediate Feather files (needs pyarrow), read memory-mapped
+# by next stages instead of decoding parquet: None or "feather"
+FORMAT_INTERMEDIATE = None
+# None (uncompressed, zero-copy read), "lz4" or "zstd"
+COMPRESSION_INTERMEDIATE = None
+
+# Datasets with processed IDs saved next to them (watermark of id_message by
+# account and bloom filter of IDs), to get data to process without reading them
+LIST_DATA_PROCESSED_IDS = ["clean_telegram", "transform_telegram"]
+# false positive rate of bloom filters (new rows considered processed)
+RATE_FALSE_POSITIVE_IDS = 1e-9
+
+# Datasets read with compact types of SCHEMA_COMPACT (category, pyarrow strings)
+# qualification data is not compact: new values are set in its columns
+LIST_DATA_COMPACT_DTYPES = [
+    "transform_telegram",
+    "twitter",
+    "filter_datalake",
+    "hash_filter_datalake",
+    "terms_filter_datalake",
+    "exclusion_datalake",
+]
+
+# Metrics of tasks and flows (time, memory, rows, bytes), saved at end of flows
+PERF_METRICS = True
+# also attach metrics of a flow to an artifact
+ARTIFACT_PERF_METRICS = False
+
+# Telegram accounts extracted concurrently, on one client session
+NB_CONCURRENT_TELEGRAM = 4
+# retries of an account after a FloodWait of Telegram (after time asked)
+MAX_RETRIES_FLOOD_WAIT = 5
+# messages of an account saved by batches during extraction
+SIZE_BATCH_TELEGRAM = 5000
+# Telegram client: "telethon", or "fake" for offline synthetic messages
+# (tests and benchmarks of extraction, with parameters of CONFIG_FAKE_TELEGRAM)
+TELEGRAM_CLIENT = "telethon"
+CONFIG_FAKE_TELEGRAM = {
+    "nb_messages": 1000,
+    "latency": 0.05,
+    "rate_flood_wait": 0.01,
+    "seconds_flood_wait": 1,
+}
+
 ###############
 ## PROMPT IA ##
 ###############
@@ -0,0 +1,174 @@
+import os
+import pandas as pd
+
+# pyarrow is optional, only needed for intermediate Feather files
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Variables
+from core.config.variables import FORMAT_INTERMEDIATE, COMPRESSION_INTERMEDIATE
+
+# Functions
+from core.libs.data_cache import get_fingerprint, get_filters_columns
+from core.libs.perf_metrics import add_bytes_read, count_bytes_written
+
+
+def feather_enabled():
+    """
+    Check if data is also saved in intermediate Feather files
+
+    Returns:
+        True if Feather files are written and read
+    """
+
+    return FORMAT_INTERMEDIATE == "feather" and pa is not None
+
+
+def get_path_feather(path):
+    """
+    Get path of Feather file of a parquet
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Path of Feather file
+    """
+
+    return f"{path.removesuffix('.parquet')}.feather"
+
+
+def get_arrow_dtype(arrow_type):
+    """
+    Get pandas dtype of an Arrow type: pyarrow-backed, categories for dictionaries
+
+    Args:
+        arrow_type: Arrow type
+
+    Returns:
+        pandas dtype, None for default conversion
+    """
+
+    if pa.types.is_dictionary(arrow_type):
+        return None
+
+    return pd.ArrowDtype(arrow_type)
+
+
+def write_feather(path, df):
+    """
+    Write data as read from parquet in Feather file, next to parquet
+    Feather file is removed if data can't be converted to Arrow
+
+    Args:
+        path: path of parquet
+        df: dataframe, as read from parquet
+
+    Returns:
+        None
+    """
+
+    path_feather = get_path_feather(path)
+    path_tmp = f"{path_feather}.tmp"
+
+    try:
+        with count_bytes_written(path_tmp):
+            feather.write_feather(
+                df, path_tmp, compression=COMPRESSION_INTERMEDIATE or "uncompressed"
+            )
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        print(f"Feather file not written for {path}: {e}")
+        remove_feather(path)
+        return
+
+    os.replace(path_tmp, path_feather)
+
+
+def remove_feather(path):
+    """
+    Remove Feather file of a parquet
+
+    Args:
+        path: path of parquet
+    """
+
+    path_feather = get_path_feather(path)
+    if os.path.exists(path_feather):
+        os.remove(path_feather)
+
+
+def read_feather(path, columns=None, filters=None, dtype_backend=None):
+    """
+    Read Feather file of a parquet, memory-mapped
+    Columns of pyarrow-backed dataframe are not copied (zero-copy), but have
+    missing values as pd.NA: only for code handling them
+    Feather file is used only if written after all files of parquet
+
+    Args:
+        path: path of parquet
+        columns: list of columns to read, all columns if None
+        filters: list of filters (column, operator, value)
+        dtype_backend: "pyarrow" for pyarrow-backed dataframe, else numpy dtypes
+
+    Returns:
+        Dataframe, None if no Feather file up to date
+    """
+
+    path_feather = get_path_feather(path)
+    if not feather_enabled() or not os.path.exists(path_feather):
+        return None
+
+    fingerprint = get_fingerprint(path)
+    if fingerprint is None or os.stat(path_feather).st_mtime_ns < fingerprint[1]:
+        return None
+
+    # columns of filters are read to filter rows
+    columns_read = columns
+    if columns is not None and filters:
+        columns_read = columns + [
+            col for col in get_filters_columns(filters) if col not in columns
+        ]
+
+    try:
+        table = feather.read_table(path_feather, columns=columns_read, memory_map=True)
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+        if columns is not None:
+            table = table.select(columns)
+    except (pa.ArrowException, KeyError, ValueError) as e:
+        print(f"Feather file not read for {path}: {e}")
+        return None
+
+    add_bytes_read(path_feather)
+
+    if dtype_backend == "pyarrow":
+        return table.to_pandas(types_mapper=get_arrow_dtype)
+
+    return table.to_pandas()
+
+
+def to_numpy_dtypes(df):
+    """
+    Convert pyarrow-backed columns to numpy dtypes, as read from parquet
+    (fastparquet can't write pyarrow-backed columns)
+
+    Args:
+        df: dataframe
+
+    Returns:
+        Dataframe with numpy dtypes
+    """
+
+    cols = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.ArrowDtype)]
+    if not cols:
+        return df
+
+    df = df.copy()
+    for col in cols:
+        df[col] = df[col].array.__arrow_array__().to_pandas().array
+
+    return df
@@ -0,0 +1,130 @@
+import pandas as pd
+
+# pyarrow is optional, strings are kept as object without it
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Variables
+from core.config.schemas import SCHEMA_COMPACT
+
+
+def get_compact_dtype(dtype):
+    """
+    Get pandas dtype of a compact type of schema
+    Strings are pyarrow strings with NaN as missing value (same results as object)
+
+    Args:
+        dtype: compact type ("category", "string") or pandas dtype
+
+    Returns:
+        pandas dtype
+    """
+
+    if dtype == "string":
+        return "string[pyarrow_numpy]" if pyarrow is not None else "object"
+
+    return dtype
+
+
+def is_compact_dtype(dtype):
+    """
+    Check if a dtype is a compact type (category or string)
+
+    Args:
+        dtype: pandas dtype
+
+    Returns:
+        True if dtype is compact
+    """
+
+    return isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def compact_dtypes(df, schema=SCHEMA_COMPACT):
+    """
+    Convert object columns of data to their compact type in schema
+
+    Args:
+        df: dataframe
+        schema: dict {column: compact type}
+
+    Returns:
+        Dataframe with compact types
+    """
+
+    df = df.copy(deep=False)
+    for col, dtype in schema.items():
+        dtype = get_compact_dtype(dtype)
+        if col not in df.columns or df[col].dtype != object or dtype == "object":
+            continue
+
+        # column with other values than strings is kept as object
+        # (converted to string, values would be changed)
+        if dtype != "category" and pd.api.types.infer_dtype(
+            df[col], skipna=True
+        ) not in ("string", "empty"):
+            print(f"Column {col} not converted to {dtype}: not only strings")
+            continue
+
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"Column {col} not converted to {dtype}: {e}")
+
+    return df
+
+
+def to_object_dtypes(df, cols_kept=None):
+    """
+    Convert columns of compact types to object, as written in parquet files:
+    strings, and categories of schema
+
+    Args:
+        df: dataframe
+        cols_kept: columns not converted (partition columns)
+
+    Returns:
+        Dataframe with object columns
+    """
+
+    cols = [
+        col
+        for col, dtype in df.dtypes.items()
+        if col not in (cols_kept or [])
+        and (
+            isinstance(dtype, pd.StringDtype)
+            or (isinstance(dtype, pd.CategoricalDtype) and col in SCHEMA_COMPACT)
+        )
+    ]
+    if not cols:
+        return df
+
+    return df.astype({col: object for col in cols})
+
+
+def get_memory_report(df):
+    """
+    Get memory used by columns of data
+
+    Args:
+        df: dataframe
+
+    Returns:
+        Dataframe with column, dtype and memory in MB, sorted by memory
+    """
+
+    memory = df.memory_usage(index=False, deep=True) / 2**20
+
+    return (
+        pd.DataFrame(
+            {
+                "column": memory.index,
+                "dtype": df.dtypes.astype(str).reindex(memory.index).values,
+                "memory_mb": memory.values.round(3),
+            }
+        )
+        .sort_values("memory_mb", ascending=False)
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,189 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Variables
+from core.config.variables import CACHE_DATA, SIZE_CACHE_DATA
+
+
+# data read, by path: (fingerprint, dataframe, size in MB), last used at end
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+# operators of filters, as in fastparquet
+DICT_OPERATORS = {
+    "==": lambda serie, value: serie == value,
+    "=": lambda serie, value: serie == value,
+    "!=": lambda serie, value: serie != value,
+    "<": lambda serie, value: serie < value,
+    "<=": lambda serie, value: serie <= value,
+    ">": lambda serie, value: serie > value,
+    ">=": lambda serie, value: serie >= value,
+    "in": lambda serie, value: serie.isin(value),
+    "not in": lambda serie, value: ~serie.isin(value),
+}
+
+
+def get_fingerprint(path):
+    """
+    Get fingerprint of a parquet file or dataset folder (mtime and size of files)
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Tuple (number of files, last mtime, total size), None if no data
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return (1, stat.st_mtime_ns, stat.st_size)
+
+    list_stats = [
+        os.stat(os.path.join(root, file))
+        for root, _, files in os.walk(path)
+        for file in files
+    ]
+
+    return (
+        len(list_stats),
+        max((stat.st_mtime_ns for stat in list_stats), default=0),
+        sum(stat.st_size for stat in list_stats),
+    )
+
+
+def get_cached_data(path):
+    """
+    Get data cached for a path, if files did not change since
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Dataframe cached (not to modify), None if not cached
+    """
+
+    if not CACHE_DATA:
+        return None
+
+    path = os.path.abspath(path)
+    fingerprint = get_fingerprint(path)
+
+    with _lock:
+        if path not in _cache:
+            return None
+
+        fingerprint_cached, df, _ = _cache[path]
+        if fingerprint_cached != fingerprint:
+            del _cache[path]
+            return None
+
+        _cache.move_to_end(path)
+
+    return df
+
+
+def cache_data(path, df):
+    """
+    Cache data of a path, with fingerprint of its files
+    Data least recently used is removed, to keep cache under max size
+
+    Args:
+        path: path of parquet
+        df: dataframe, as read from parquet
+
+    Returns:
+        None
+    """
+
+    if not CACHE_DATA:
+        return
+
+    path = os.path.abspath(path)
+    fingerprint = get_fingerprint(path)
+    size = df.memory_usage(index=True, deep=True).sum() / 2**20
+
+    with _lock:
+        _cache.pop(path, None)
+
+        if fingerprint is None or size > SIZE_CACHE_DATA:
+            return
+
+        # remove data least recently used
+        size_cached = sum(item[2] for item in _cache.values())
+        while _cache and size_cached + size > SIZE_CACHE_DATA:
+            size_cached -= _cache.popitem(last=False)[1][2]
+
+        _cache[path] = (fingerprint, df, size)
+
+
+def drop_cached_data(path):
+    """
+    Remove data of a path from cache
+
+    Args:
+        path: path of parquet
+    """
+
+    with _lock:
+        _cache.pop(os.path.abspath(path), None)
+
+
+def clear_cache():
+    """
+    Remove all data from cache
+    """
+
+    with _lock:
+        _cache.clear()
+
+
+def get_filters_columns(filters):
+    """
+    Get columns used in filters
+
+    Args:
+        filters: list of filters
+
+    Returns:
+        List of columns
+    """
+
+    list_and = filters if isinstance(filters[0], list) else [filters]
+
+    return list(
+        dict.fromkeys(col for list_filters in list_and for col, _, _ in list_filters)
+    )
+
+
+def filter_data(df, filters):
+    """
+    Keep rows matching filters, as filters of fastparquet:
+    list of (column, operator, value) all true, or list of such lists (one true)
+
+    Args:
+        df: dataframe
+        filters: list of filters
+
+    Returns:
+        Dataframe with rows matching filters
+    """
+
+    if not filters:
+        return df
+
+    list_and = filters if isinstance(filters[0], list) else [filters]
+
+    mask = pd.Series(False, index=df.index)
+    for list_filters in list_and:
+        mask_and = pd.Series(True, index=df.index)
+        for col, operator, value in list_filters:
+            mask_and &= DICT_OPERATORS[operator](df[col], value).fillna(False)
+        mask |= mask_and
+
+    return df[mask]
@@ -0,0 +1,90 @@
+import os
+import json
+
+# Functions
+from core.libs.data_cache import get_fingerprint
+
+
+def get_path_cursors(path):
+    """
+    Get path of cursors of extraction of a parquet
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Path of cursors file
+    """
+
+    return f"{path.removesuffix('.parquet')}_cursors.json"
+
+
+def build_cursors(df):
+    """
+    Build cursors of extraction from data extracted: last id_message by account
+
+    Args:
+        df: dataframe with account and id_message
+
+    Returns:
+        Dict {account: last id_message}
+    """
+
+    if df.empty:
+        return {}
+
+    return {
+        str(account): int(id_message)
+        for account, id_message in df.groupby("account", observed=True)["id_message"]
+        .max()
+        .items()
+    }
+
+
+def save_cursors(path, cursors):
+    """
+    Save cursors next to parquet, with fingerprint of parquet files
+
+    Args:
+        path: path of parquet
+        cursors: dict {account: last id_message}
+
+    Returns:
+        None
+    """
+
+    path_cursors = get_path_cursors(path)
+    path_tmp = f"{path_cursors}.tmp"
+    os.makedirs(os.path.dirname(path_cursors) or ".", exist_ok=True)
+
+    with open(path_tmp, "w") as file:
+        json.dump(
+            {"cursors": cursors, "fingerprint": get_fingerprint(path)}, file, indent=2
+        )
+    os.replace(path_tmp, path_cursors)
+
+
+def load_cursors(path):
+    """
+    Load cursors of a parquet, if files did not change since saved
+    (data saved without its cursors, e.g. process stopped between both)
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Dict {account: last id_message}, None if not saved or stale
+    """
+
+    path_cursors = get_path_cursors(path)
+    if not os.path.exists(path_cursors):
+        return None
+
+    with open(path_cursors) as file:
+        data = json.load(file)
+
+    fingerprint = get_fingerprint(path)
+    if (tuple(data["fingerprint"]) if data["fingerprint"] else None) != fingerprint:
+        return None
+
+    return data["cursors"]
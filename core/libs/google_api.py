@@ -2,7 +2,7 @@ import os
 from urllib.request import Request
 import pandas as pd
 
-from prefect import task
+from core.libs.perf_metrics import task
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -0,0 +1,341 @@
+import os
+import time
+import uuid
+import inspect
+import datetime
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+import pandas as pd
+from prefect import task as prefect_task, flow as prefect_flow
+from prefect.runtime import task_run, flow_run
+from prefect.artifacts import create_table_artifact
+
+# resource is only available on Unix, peak memory is not measured without it
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Variables
+from core.config.paths import PATH_PERF_METRICS
+from core.config.variables import PERF_METRICS, ARTIFACT_PERF_METRICS
+
+
+# metrics of calls running (outermost first), and of calls ended not saved
+_metrics_running = ContextVar("metrics_running", default=())
+_metrics_ended = []
+_lock_metrics = threading.Lock()
+
+# types of columns of metrics saved
+SCHEMA_PERF_METRICS = {
+    "run_id": "object",
+    "kind": "object",
+    "module": "object",
+    "name": "object",
+    "run_name": "object",
+    "status": "object",
+    "started_at": "datetime64[ns]",
+    "wall_time_s": "float64",
+    "cpu_time_s": "float64",
+    "peak_rss_delta_mb": "float64",
+    "rows_in": "Int64",
+    "rows_out": "Int64",
+    "bytes_read": "int64",
+    "bytes_written": "int64",
+}
+
+
+def get_path_perf_metrics():
+    """
+    Get path of parquet file of metrics
+
+    Returns:
+        Path of parquet file
+    """
+
+    return os.path.join(PATH_PERF_METRICS, "run_metrics.parquet")
+
+
+def get_size_path(path):
+    """
+    Get size of a file, or of all files of a directory (parquet dataset)
+
+    Args:
+        path: path of file or directory
+
+    Returns:
+        Size in bytes, 0 if path does not exist
+    """
+
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(
+        os.path.getsize(os.path.join(root, file))
+        for root, _, files in os.walk(path)
+        for file in files
+    )
+
+
+def get_peak_rss():
+    """
+    Get peak memory used by process (resident set size)
+
+    Returns:
+        Peak memory in MB, None if not measurable
+    """
+
+    if resource is None:
+        return None
+
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def count_rows(value):
+    """
+    Count rows of dataframes of a value (dataframe, or list of values)
+
+    Args:
+        value: value, e.g. arguments or result of a call
+
+    Returns:
+        Number of rows, None if no dataframe
+    """
+
+    if isinstance(value, pd.DataFrame):
+        return value.shape[0]
+
+    if isinstance(value, (list, tuple)):
+        list_rows = [count_rows(v) for v in value if isinstance(v, pd.DataFrame)]
+        return sum(list_rows) if list_rows else None
+
+    return None
+
+
+def add_bytes(key, nb_bytes):
+    """
+    Add bytes read or written to metrics of calls running
+
+    Args:
+        key: "bytes_read" or "bytes_written"
+        nb_bytes: number of bytes
+    """
+
+    with _lock_metrics:
+        for metrics in _metrics_running.get():
+            metrics[key] += nb_bytes
+
+
+def add_bytes_read(path):
+    """
+    Add size of files read to metrics of calls running
+
+    Args:
+        path: path of file or directory read
+    """
+
+    if _metrics_running.get():
+        add_bytes("bytes_read", get_size_path(path))
+
+
+@contextmanager
+def count_bytes_written(path):
+    """
+    Add size of files written in a path to metrics of calls running
+    (difference of size of path, before and after writing)
+
+    Args:
+        path: path of file or directory written
+    """
+
+    if not _metrics_running.get():
+        yield
+        return
+
+    size_before = get_size_path(path)
+    try:
+        yield
+    finally:
+        add_bytes("bytes_written", max(get_size_path(path) - size_before, 0))
+
+
+def get_run_name(kind):
+    """
+    Get name of Prefect run of a call
+
+    Args:
+        kind: "task" or "flow"
+
+    Returns:
+        Name of run, empty if not in a run
+    """
+
+    try:
+        name = task_run.get_name() if kind == "task" else flow_run.get_name()
+    except Exception:
+        name = None
+
+    return name or ""
+
+
+@contextmanager
+def measure_metrics(fn, kind, args, kwargs):
+    """
+    Measure metrics of a call: wall time, CPU time of thread, delta of peak
+    memory, rows of dataframes in arguments and result, bytes read and written
+    Tasks are measured only in a flow, metrics are saved at end of outermost flow
+
+    Args:
+        fn: function called
+        kind: "task" or "flow"
+        args: positional arguments of call
+        kwargs: keyword arguments of call
+
+    Yields:
+        Dict to set result of call (key "result")
+    """
+
+    output = {}
+    running = _metrics_running.get()
+    if not PERF_METRICS or (kind == "task" and not running):
+        yield output
+        return
+
+    metrics = {
+        "run_id": running[0]["run_id"] if running else uuid.uuid4().hex,
+        "kind": kind,
+        "module": fn.__module__,
+        "name": fn.__qualname__,
+        "run_name": get_run_name(kind),
+        "status": "failed",
+        "started_at": datetime.datetime.now(),
+        "rows_in": count_rows(list(args) + list(kwargs.values())),
+        "bytes_read": 0,
+        "bytes_written": 0,
+    }
+    token = _metrics_running.set(running + (metrics,))
+    peak_rss = get_peak_rss()
+    cpu_time = time.thread_time()
+    wall_time = time.perf_counter()
+
+    try:
+        yield output
+        metrics["status"] = "completed"
+    finally:
+        metrics["wall_time_s"] = time.perf_counter() - wall_time
+        metrics["cpu_time_s"] = time.thread_time() - cpu_time
+        metrics["peak_rss_delta_mb"] = (
+            get_peak_rss() - peak_rss if peak_rss is not None else None
+        )
+        metrics["rows_out"] = count_rows(output.get("result"))
+        _metrics_running.reset(token)
+
+        with _lock_metrics:
+            _metrics_ended.append(metrics)
+
+        if not running:
+            save_perf_metrics(metrics["run_id"])
+
+
+def track_metrics(fn, kind):
+    """
+    Decorate a function to measure metrics of its calls
+
+    Args:
+        fn: function (sync or async)
+        kind: "task" or "flow"
+
+    Returns:
+        Function decorated
+    """
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapper_async(*args, **kwargs):
+            with measure_metrics(fn, kind, args, kwargs) as output:
+                output["result"] = await fn(*args, **kwargs)
+            return output["result"]
+
+        return wrapper_async
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with measure_metrics(fn, kind, args, kwargs) as output:
+            output["result"] = fn(*args, **kwargs)
+        return output["result"]
+
+    return wrapper
+
+
+def task(**kwargs):
+    """
+    Prefect task, with metrics of its calls
+
+    Args:
+        kwargs: arguments of Prefect task
+
+    Returns:
+        Decorator of function
+    """
+
+    return lambda fn: prefect_task(track_metrics(fn, "task"), **kwargs)
+
+
+def flow(**kwargs):
+    """
+    Prefect flow, with metrics of its calls (and of its tasks)
+
+    Args:
+        kwargs: arguments of Prefect flow
+
+    Returns:
+        Decorator of function
+    """
+
+    return lambda fn: prefect_flow(track_metrics(fn, "flow"), **kwargs)
+
+
+def save_perf_metrics(run_id):
+    """
+    Save metrics of a run, appended to parquet file of metrics
+    (and attached to an artifact if ARTIFACT_PERF_METRICS)
+
+    Args:
+        run_id: id of run (outermost flow)
+    """
+
+    with _lock_metrics:
+        list_metrics = [m for m in _metrics_ended if m["run_id"] == run_id]
+        _metrics_ended[:] = [m for m in _metrics_ended if m["run_id"] != run_id]
+
+    df = pd.DataFrame(list_metrics, columns=list(SCHEMA_PERF_METRICS))
+    df = df.sort_values("started_at").astype(SCHEMA_PERF_METRICS)
+
+    path = get_path_perf_metrics()
+    os.makedirs(PATH_PERF_METRICS, exist_ok=True)
+    try:
+        df.to_parquet(
+            path, engine="fastparquet", index=False, append=os.path.exists(path)
+        )
+    except ValueError as e:
+        # metrics saved with another schema, rewritten with new ones
+        print(f"Metrics appended not possible, file rewritten: {e}")
+        df_old = pd.read_parquet(path, engine="fastparquet")
+        df = pd.concat([df_old, df], ignore_index=True)
+        df.to_parquet(path, engine="fastparquet", index=False)
+
+    print(f"Metrics of {len(list_metrics)} calls saved in {path}")
+
+    if ARTIFACT_PERF_METRICS:
+        try:
+            create_table_artifact(
+                key="perf-metrics",
+                table=df.tail(len(list_metrics)).astype(str).to_dict("records"),
+            )
+        except Exception as e:
+            print(f"Artifact perf-metrics not created in Prefect: {e}")
@@ -0,0 +1,267 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Variables
+from core.config.variables import RATE_FALSE_POSITIVE_IDS
+
+# Functions
+from core.libs.data_cache import get_fingerprint
+
+
+# keys of the two hashes of IDs (double hashing of bloom filter)
+HASH_KEY_1 = "processed_ids_01"
+HASH_KEY_2 = "processed_ids_02"
+
+# min number of IDs a bloom filter is sized for
+MIN_CAPACITY_IDS = 100000
+
+
+def get_path_processed_ids(path):
+    """
+    Get path of processed IDs of a parquet
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Path of processed IDs file
+    """
+
+    return f"{path.removesuffix('.parquet')}_processed_ids.npz"
+
+
+def hash_ids(ids):
+    """
+    Get two hashes of IDs, stable between runs
+
+    Args:
+        ids: serie of IDs
+
+    Returns:
+        Tuple of two arrays of uint64 hashes
+    """
+
+    ids = pd.Series(ids, dtype=object).astype(str)
+
+    return (
+        pd.util.hash_pandas_object(ids, index=False, hash_key=HASH_KEY_1).to_numpy(),
+        pd.util.hash_pandas_object(ids, index=False, hash_key=HASH_KEY_2).to_numpy(),
+    )
+
+
+def get_bloom_positions(hashes, nb_bits, nb_hashes):
+    """
+    Get bits of bloom filter for IDs hashes, one array by hash function
+
+    Args:
+        hashes: tuple of two arrays of hashes
+        nb_bits: number of bits of bloom filter
+        nb_hashes: number of hash functions
+
+    Returns:
+        Generator of arrays of bit positions
+    """
+
+    h1, h2 = hashes
+    for i in range(nb_hashes):
+        yield (h1 + np.uint64(i) * h2) % np.uint64(nb_bits)
+
+
+def get_watermarks(df):
+    """
+    Get max id_message by account
+
+    Args:
+        df: dataframe with ID, account and id_message
+
+    Returns:
+        Dict {account: max id_message}, empty if no account or id_message
+    """
+
+    if df.empty or not {"account", "id_message"}.issubset(df.columns):
+        return {}
+
+    id_message = pd.to_numeric(df["id_message"], errors="coerce")
+
+    return {
+        str(account): int(value)
+        for account, value in id_message.groupby(
+            df["account"].astype(str), observed=True
+        )
+        .max()
+        .dropna()
+        .items()
+    }
+
+
+def build_processed_ids(df, nb_ids=None):
+    """
+    Build processed IDs of data: bloom filter of IDs, sized for twice the
+    number of IDs (appends without rebuild), and watermark of id_message by account
+
+    Args:
+        df: dataframe with ID (and account, id_message)
+        nb_ids: number of IDs to size bloom filter for, number of rows if None
+
+    Returns:
+        Dict of processed IDs
+    """
+
+    capacity = max(2 * (nb_ids or df.shape[0]), MIN_CAPACITY_IDS)
+
+    # optimal size of bloom filter for false positive rate
+    nb_bits = int(np.ceil(-capacity * np.log(RATE_FALSE_POSITIVE_IDS) / np.log(2) ** 2))
+    nb_bits += -nb_bits % 8
+    nb_hashes = max(1, int(round(nb_bits / capacity * np.log(2))))
+
+    processed = {
+        "bits": np.zeros(nb_bits, dtype=bool),
+        "nb_hashes": nb_hashes,
+        "capacity": capacity,
+        "nb_ids": 0,
+        "watermarks": {},
+    }
+
+    return add_processed_ids(processed, df)
+
+
+def add_processed_ids(processed, df):
+    """
+    Add IDs of new rows to processed IDs
+
+    Args:
+        processed: dict of processed IDs
+        df: dataframe with new rows
+
+    Returns:
+        Dict of processed IDs, None if bloom filter is full (to rebuild)
+    """
+
+    if processed["nb_ids"] + df.shape[0] > processed["capacity"]:
+        return None
+
+    if df.empty:
+        return processed
+
+    bits = processed["bits"]
+    for positions in get_bloom_positions(
+        hash_ids(df["ID"]), bits.shape[0], processed["nb_hashes"]
+    ):
+        bits[positions] = True
+
+    processed["nb_ids"] += df.shape[0]
+    for account, value in get_watermarks(df).items():
+        processed["watermarks"][account] = max(
+            processed["watermarks"].get(account, value), value
+        )
+
+    return processed
+
+
+def is_processed(processed, df):
+    """
+    Check if rows are processed: id_message under watermark of account, and ID
+    in bloom filter (false positive rate RATE_FALSE_POSITIVE_IDS)
+
+    Args:
+        processed: dict of processed IDs
+        df: dataframe with ID (and account, id_message)
+
+    Returns:
+        Array of booleans, True if row is processed
+    """
+
+    mask = np.full(df.shape[0], processed["nb_ids"] > 0)
+
+    # rows after watermark of account are new
+    watermarks = processed["watermarks"]
+    if watermarks and {"account", "id_message"}.issubset(df.columns):
+        watermark = df["account"].astype(str).map(watermarks)
+        id_message = pd.to_numeric(df["id_message"], errors="coerce")
+        mask &= ~(watermark.isna() | (id_message > watermark)).to_numpy()
+
+    # other rows are checked in bloom filter
+    rows = np.flatnonzero(mask)
+    if rows.size:
+        bits = processed["bits"]
+        for positions in get_bloom_positions(
+            hash_ids(df["ID"].iloc[rows]), bits.shape[0], processed["nb_hashes"]
+        ):
+            mask[rows] &= bits[positions]
+
+    return mask
+
+
+def save_processed_ids(path, processed):
+    """
+    Save processed IDs next to parquet, with fingerprint of parquet files
+
+    Args:
+        path: path of parquet
+        processed: dict of processed IDs
+
+    Returns:
+        None
+    """
+
+    path_ids = get_path_processed_ids(path)
+    path_tmp = f"{path_ids}.tmp.npz"
+
+    np.savez(
+        path_tmp,
+        bits=np.packbits(processed["bits"]),
+        params=np.array(
+            [processed["nb_hashes"], processed["capacity"], processed["nb_ids"]]
+        ),
+        accounts=np.array(list(processed["watermarks"]), dtype=str),
+        watermarks=np.array(list(processed["watermarks"].values()), dtype=np.int64),
+        fingerprint=np.array(get_fingerprint(path), dtype=np.int64),
+    )
+    os.replace(path_tmp, path_ids)
+
+
+def load_processed_ids(path):
+    """
+    Load processed IDs of a parquet, if files did not change since saved
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        Dict of processed IDs, None if not saved or stale
+    """
+
+    path_ids = get_path_processed_ids(path)
+    fingerprint = get_fingerprint(path)
+    if fingerprint is None or not os.path.exists(path_ids):
+        return None
+
+    with np.load(path_ids) as data:
+        if tuple(data["fingerprint"].tolist()) != fingerprint:
+            return None
+
+        nb_hashes, capacity, nb_ids = data["params"].tolist()
+
+        return {
+            "bits": np.unpackbits(data["bits"]).astype(bool),
+            "nb_hashes": nb_hashes,
+            "capacity": capacity,
+            "nb_ids": nb_ids,
+            "watermarks": dict(
+                zip(data["accounts"].tolist(), data["watermarks"].tolist())
+            ),
+        }
+
+
+def remove_processed_ids(path):
+    """
+    Remove processed IDs of a parquet
+
+    Args:
+        path: path of parquet
+    """
+
+    path_ids = get_path_processed_ids(path)
+    if os.path.exists(path_ids):
+        os.remove(path_ids)
@@ -0,0 +1,92 @@
+import os
+import json
+
+# Variables
+from core.config.paths import PATH_JSON_RU_REGION, PATH_JSON_RU_REGION_IDS
+
+
+# table of regions, loaded once by process
+_regions_table = None
+
+
+def format_region_name(name, merge_moscow=False):
+    """
+    Get alias of a region name: Moskva as Moscow, without apostrophes
+
+    Args:
+        name: name of region in GeoJSON
+        merge_moscow: Moscow Oblast and Moscow City as Moscow
+
+    Returns:
+        Alias of region
+    """
+
+    name = name.replace("Moskva", "Moscow").replace("'", "")
+    if merge_moscow:
+        name = name.replace("Moscow Oblast", "Moscow").replace("Moscow City", "Moscow")
+
+    return name
+
+
+def build_regions_table():
+    """
+    Build table of regions from GeoJSON (parsed only here, with polygons):
+    names and aliases of regions with their id, saved in a small JSON file
+    - names: names in GeoJSON
+    - aliases: names formatted (drawn on maps)
+    - aliases_moscow: names formatted, Moscow Oblast and City as Moscow
+
+    Returns:
+        Dict of tables {name: id}
+    """
+
+    # read file json
+    with open(PATH_JSON_RU_REGION) as file:
+        data = json.load(file)
+
+    # get id and name
+    dict_names = {
+        feature["properties"]["name"]: feature["id"] for feature in data["features"]
+    }
+
+    table = {
+        "names": dict_names,
+        "aliases": {format_region_name(k): v for k, v in dict_names.items()},
+        "aliases_moscow": {
+            format_region_name(k, merge_moscow=True): v for k, v in dict_names.items()
+        },
+    }
+
+    with open(PATH_JSON_RU_REGION_IDS, "w") as file:
+        json.dump(table, file, ensure_ascii=False, indent=2)
+
+    print(f"Table of {len(dict_names)} regions saved in {PATH_JSON_RU_REGION_IDS}")
+
+    return table
+
+
+def load_regions_table():
+    """
+    Load table of regions, once by process
+    Table is built if not saved, or older than GeoJSON
+
+    Returns:
+        Dict of tables {name: id} (not to modify)
+    """
+
+    global _regions_table
+
+    if _regions_table is not None:
+        return _regions_table
+
+    if not os.path.exists(PATH_JSON_RU_REGION_IDS) or (
+        os.path.exists(PATH_JSON_RU_REGION)
+        and os.path.getmtime(PATH_JSON_RU_REGION)
+        > os.path.getmtime(PATH_JSON_RU_REGION_IDS)
+    ):
+        _regions_table = build_regions_table()
+    else:
+        with open(PATH_JSON_RU_REGION_IDS) as file:
+            _regions_table = json.load(file)
+
+    return _regions_table
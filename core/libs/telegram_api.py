@@ -1,20 +1,28 @@
 import yaml
 
 from telethon import TelegramClient
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Variables
 from core.config.paths import PATH_CREDS_API
+from core.config.variables import TELEGRAM_CLIENT, CONFIG_FAKE_TELEGRAM
+
+# Functions
+from core.benchmarks.telegram_fake import FakeTelegramClient
 
 
 @task(name="Telegram Connect API", task_run_name="telegram-connect-api", tags=["API"])
 def telegram_connect():
     """
     Connect to Telegram
+    Offline fake client if TELEGRAM_CLIENT is "fake" (no credentials needed)
 
     Returns:
         - client: TelegramClient
     """
+    if TELEGRAM_CLIENT == "fake":
+        return FakeTelegramClient(**CONFIG_FAKE_TELEGRAM)
+
     # get credentials
     with open(PATH_CREDS_API) as file:
         credentials = yaml.safe_load(file)
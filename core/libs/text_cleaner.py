@@ -0,0 +1,252 @@
+import os
+import re
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Variables
+from core.config.variables import (
+    CLEAN_PARALLEL,
+    NB_WORKERS_CLEAN,
+    MIN_SIZE_CLEAN_PARALLEL,
+)
+
+
+# special characters (emoticons, pictographs, ...)
+REGEX_SPECIAL_CHARS = re.compile(
+    pattern="["
+    "\U0001f600-\U0001f64f"  # emoticons
+    "\U0001f300-\U0001f5ff"  # symbols & pictographs
+    "\U0001f680-\U0001f6ff"  # transport & map symbols
+    "\U0001f1e0-\U0001f1ff"  # flags (iOS)
+    "\U00002500-\U00002bef"  # chinese char
+    "\U00002702-\U000027b0"
+    "\U00002702-\U000027b0"
+    "\U000024c2-\U0001f251"
+    "\U0001f926-\U0001f937"
+    "\U00010000-\U0010ffff"
+    "\u2640-\u2642"
+    "\u2600-\u2b55"
+    "\u200d"
+    "\u23cf"
+    "\u23e9"
+    "\u231a"
+    "\ufe0f"  # dingbats
+    "\u3030"
+    "]+",
+    flags=re.UNICODE,
+)
+# one character from the first special character: faster than REGEX_SPECIAL_CHARS
+# to check texts without special characters
+REGEX_ANY_SPECIAL_CHAR = re.compile("[\u200d-\U0010ffff]")
+
+# unwanted text, removed in order
+LIST_MOTIFS = [
+    r"Подписывайся на SHOT",
+    r"Прислать новость (https://t.me/shot_go)",
+    r"Прислать новость",
+    r"Предложить свою новость",
+    r"Подслушано электрички Москвы",
+    r"#Новости@transport_online",
+    r"Минтранс Подмосковья",
+    r"Прислать фото/видео/информацию: @Astra4bot",
+    r"Резервный канал ASTRA: https://t.me/astrapress2",
+    r"astrapress@protonmail.com",
+    r"Предложить свою новость (https://t.me/electrichkibot)",
+    r"Предложить свою новость",
+    r"Подслушано электрички Москвы (https://t.me/electrichki)",
+    r"Подслушано электрички Москвы",
+    r"SHOT",
+]
+LIST_REGEX_MOTIFS = [re.compile(motif) for motif in LIST_MOTIFS]
+
+# one of the motifs: a text without match is not changed by motifs
+# (motifs are still removed one by one, a single pass gives other results
+# when motifs overlap or when a removal joins a new motif)
+REGEX_ANY_MOTIF = re.compile("|".join(LIST_MOTIFS))
+
+# substitutions after motifs, in order: (regex, replacement, substrings needed)
+LIST_SUBSTITUTIONS = [
+    (re.compile(r"\s*(Фото|Видео)\s*\S*\s*от:.*?\n"), "", ["от:"]),
+    (re.compile(r"@\S+|http\S+"), "", ["@", "http"]),
+    (re.compile(r"Subscribe to SHOT.*"), "", ["Subscribe to SHOT"]),
+    (
+        re.compile(r"@Astra4botРезервный.*|Прислать фото/видео/информацию:"),
+        "",
+        ["@Astra4botРезервный", "Прислать фото/видео/информацию:"],
+    ),
+    (re.compile(r"\s*—\s*"), ". ", ["—"]),
+    (re.compile(r"—\s*"), "", ["—"]),
+    (re.compile(r"&amp;"), "", ["&amp;"]),
+]
+# unwanted text of translations, removed in order
+LIST_TRANSLATIONS = [
+    "Here is the translation:",
+    "Here is the English translation:",
+    "Here is the translation to English:",
+    "Here's the translation:",
+    "Translation in English:",
+    "I'm ready to translate.",
+    "The translation is:",
+    "Translation:",
+    "I'll translate the text for you:",
+    "I'll translate the text accurately,",
+    "Translation in English as listed:",
+    "I can translate this text for you.",
+    "I'll translate the text accurately from Russian to English while maintaining the context and tone of the original.",
+    "I'll translate the text accurately and grammatically correct.",
+    "Here is the translation of your text from Russian to English:",
+]
+REGEX_ANY_TRANSLATION = re.compile("|".join(map(re.escape, LIST_TRANSLATIONS)))
+
+# consecutive spaces (a single space is kept as it is)
+REGEX_SPACES = re.compile(r" {2,}")
+
+
+def remove_motifs(text):
+    """
+    Remove unwanted motifs, one by one
+
+    Args:
+        text: text
+
+    Returns:
+        Text without motifs
+    """
+
+    for regex in LIST_REGEX_MOTIFS:
+        text = regex.sub("", text)
+
+    return text
+
+
+def remove_translations(text):
+    """
+    Remove unwanted text of translations, one by one
+
+    Args:
+        text: text
+
+    Returns:
+        Text without text of translations
+    """
+
+    for trad in LIST_TRANSLATIONS:
+        text = text.replace(trad, "")
+
+    return text
+
+
+def clean_text(text):
+    """
+    Formate and clean text
+    Substitutions are applied only to texts who contain their motifs
+
+    Args:
+        text: text
+
+    Returns:
+        Text cleaned, None if empty
+    """
+
+    # Remove special characters
+    if REGEX_ANY_SPECIAL_CHAR.search(text):
+        text = REGEX_SPECIAL_CHARS.sub("", text)
+
+    # Remove unwanted text
+    if REGEX_ANY_MOTIF.search(text):
+        text = remove_motifs(text)
+
+    # remove after, http and @
+    for regex, repl, list_substrs in LIST_SUBSTITUTIONS:
+        for substr in list_substrs:
+            if substr in text:
+                text = regex.sub(repl, text)
+                break
+
+    # Remove first and last character if
+    if text.startswith(" "):
+        text = text[1:]
+    if text.endswith(":"):
+        text = text[:-1]
+
+    # Remove unwanted text translations
+    if REGEX_ANY_TRANSLATION.search(text):
+        text = remove_translations(text)
+
+    if not text:
+        return None
+
+    if "  " in text:
+        text = REGEX_SPACES.sub(" ", text)
+
+    return text.strip()
+
+
+def clean_texts_shard(texts):
+    """
+    Formate and clean a shard of texts, run in a worker process
+
+    Args:
+        texts: list of texts
+
+    Returns:
+        List of texts cleaned (None if empty)
+    """
+
+    return [clean_text(text) for text in texts]
+
+
+def clean_texts_parallel(texts, nb_workers=None):
+    """
+    Formate and clean texts with multiple processes
+    Texts are split in shards who keep their order,
+    results are stitched back in the same order
+
+    Args:
+        texts: list of texts
+        nb_workers: number of processes (None = number of cores)
+
+    Returns:
+        List of texts cleaned (None if empty)
+    """
+
+    nb_workers = nb_workers or os.cpu_count() or 1
+
+    # few shards by worker, to balance texts of different length
+    nb_shards = min(len(texts), nb_workers * 4) or 1
+    size_shard = -(-len(texts) // nb_shards)
+    shards = [texts[i : i + size_shard] for i in range(0, len(texts), size_shard)]
+
+    with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+        results = executor.map(clean_texts_shard, shards)
+
+        return [text for shard in results for text in shard]
+
+
+def clean_text_series(serie, parallel=CLEAN_PARALLEL, nb_workers=NB_WORKERS_CLEAN):
+    """
+    Formate and clean texts of a serie, as clean_text
+    (pandas string methods are also loops on texts, one by step: slower)
+    If parallel, large series are cleaned on multiple cores
+
+    Args:
+        serie: serie of texts
+        parallel: clean on multiple cores, from MIN_SIZE_CLEAN_PARALLEL texts
+        nb_workers: number of processes (None = number of cores)
+
+    Returns:
+        Serie of texts cleaned (None if empty), missing values are kept
+    """
+
+    values = serie.to_numpy(dtype=object, copy=True)
+    mask_texts = serie.notna().to_numpy()
+    texts = values[mask_texts].tolist()
+
+    # one worker: processes would only add their cost
+    nb_workers = nb_workers or os.cpu_count() or 1
+    if parallel and nb_workers > 1 and len(texts) >= MIN_SIZE_CLEAN_PARALLEL:
+        values[mask_texts] = clean_texts_parallel(texts, nb_workers=nb_workers)
+    else:
+        values[mask_texts] = clean_texts_shard(texts)
+
+    return pd.Series(values, index=serie.index, name=serie.name)
@@ -0,0 +1,176 @@
+import re
+import pandas as pd
+
+
+# regex to split a text in words (same definition of word as \b)
+REGEX_TOKENS = re.compile(r"\w+")
+
+# regex special characters, text with them can't be searched with index
+REGEX_SPECIAL_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+# columns of text indexed
+COLS_TEXT_INDEX = ["text_translate", "text_original"]
+
+
+def tokenize_text(text):
+    """
+    Get normalized tokens of text (words in lower case)
+
+    Args:
+        text: text
+
+    Returns:
+        Set of tokens
+    """
+
+    if not isinstance(text, str):
+        return set()
+
+    return {token.lower() for token in REGEX_TOKENS.findall(text)}
+
+
+def build_index_tokens(df):
+    """
+    Build inverted index of tokens of texts
+
+    Args:
+        df: dataframe with ID and texts
+
+    Returns:
+        Dataframe with token and ID, one row by token of each message
+    """
+
+    cols_text = [col for col in COLS_TEXT_INDEX if col in df.columns]
+
+    tokens = pd.Series([set() for _ in range(df.shape[0])], index=df.index)
+    for col in cols_text:
+        tokens = tokens.combine(df[col].map(tokenize_text), lambda x, y: x | y)
+
+    df_index = (
+        pd.DataFrame({"token": tokens.map(sorted).values, "ID": df["ID"].values})
+        .explode("token")
+        .dropna(subset=["token"])
+    )
+
+    return df_index[["token", "ID"]].reset_index(drop=True)
+
+
+def merge_index_tokens(df_index, df):
+    """
+    Update inverted index with new texts
+    Tokens of messages already indexed are replaced
+
+    Args:
+        df_index: dataframe with index of tokens
+        df: dataframe with ID and texts
+
+    Returns:
+        Dataframe with index of tokens, sorted by token
+    """
+
+    if not df_index.empty:
+        df_index = df_index[~df_index["ID"].isin(df["ID"])]
+
+    return (
+        pd.concat([df_index, build_index_tokens(df)])
+        .sort_values(["token", "ID"])
+        .reset_index(drop=True)
+    )
+
+
+def get_ids_token(df_index, token):
+    """
+    Get IDs of messages with token
+    Index must be sorted by token
+
+    Args:
+        df_index: dataframe with index of tokens
+        token: normalized token
+
+    Returns:
+        Set of IDs
+    """
+
+    tokens = df_index["token"].to_numpy()
+    start = tokens.searchsorted(token, side="left")
+    end = tokens.searchsorted(token, side="right")
+
+    return set(df_index["ID"].to_numpy()[start:end])
+
+
+def get_ids_with_words(df_index, words):
+    """
+    Get IDs of messages with all complete words (intersection of tokens)
+    Return None if a word can't be found with index
+
+    Args:
+        df_index: dataframe with index of tokens
+        words: list of words
+
+    Returns:
+        Set of IDs or None
+    """
+
+    if not all(re.fullmatch(r"\w+", word) for word in words):
+        return None
+
+    ids = None
+    for word in words:
+        ids_word = get_ids_token(df_index, word.lower())
+        ids = ids_word if ids is None else ids & ids_word
+
+        if not ids:
+            break
+
+    return ids if ids is not None else set()
+
+
+def get_ids_with_substring(df_index, text):
+    """
+    Get IDs of messages who may contain text, for substring search
+    Each word of text must be in a token of the message
+    Return None if text can't be searched with index
+
+    Args:
+        df_index: dataframe with index of tokens
+        text: text to search
+
+    Returns:
+        Set of IDs or None
+    """
+
+    words = [word.lower() for word in REGEX_TOKENS.findall(text)]
+
+    if df_index.empty or not words or REGEX_SPECIAL_CHARS.search(text):
+        return None
+
+    vocab = pd.Series(df_index["token"].unique())
+
+    ids = None
+    for word in words:
+        ids_word = set()
+        for token in vocab[vocab.str.contains(word, regex=False)]:
+            ids_word |= get_ids_token(df_index, token)
+        ids = ids_word if ids is None else ids & ids_word
+
+        if not ids:
+            break
+
+    return ids
+
+
+def mask_candidates(ids, df_index, ids_candidates):
+    """
+    Get mask of candidates found with index
+    Messages not in index are always candidates
+
+    Args:
+        ids: series of IDs
+        df_index: dataframe with index of tokens
+        ids_candidates: set of IDs found with index
+
+    Returns:
+        Series of bool
+    """
+
+    return ids.isin(ids_candidates) | ~ids.isin(df_index["ID"])
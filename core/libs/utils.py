@@ -1,60 +1,152 @@
 import os
-import re
 import json
+import shutil
+import datetime
+import threading
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-from prefect import task
+from fastparquet import ParquetFile
+from core.libs.perf_metrics import task, add_bytes_read, count_bytes_written
 from prefect.runtime import task_run
-from prefect.variables import Variable
 from prefect.artifacts import create_table_artifact
 
 
 # Variables
-from core.config.paths import PATH_JSON_RU_REGION
-from core.config.variables import LIST_ACCOUNTS_TELEGRAM
+from core.config.paths import (
+    PATH_FILTER_DATALAKE,
+    PATH_ARTIFACTS,
+)
+from core.config.variables import (
+    LIST_ACCOUNTS_TELEGRAM,
+    SIZE_ROW_GROUP,
+    APPEND_DATA,
+    PARTITION_MONTH,
+    COL_PARTITION_MONTH,
+    LIST_DATA_PROCESSED_IDS,
+    LIST_DATA_COMPACT_DTYPES,
+)
+
+# Functions
+from core.libs.token_index import merge_index_tokens
+from core.libs.text_cleaner import clean_text
+from core.libs.regions import load_regions_table
+from core.libs.compact_dtypes import (
+    get_compact_dtype,
+    is_compact_dtype,
+    compact_dtypes,
+    to_object_dtypes,
+)
+from core.libs.data_cache import (
+    get_cached_data,
+    cache_data,
+    drop_cached_data,
+    filter_data,
+    get_filters_columns,
+)
+from core.libs.arrow_data import (
+    feather_enabled,
+    write_feather,
+    read_feather,
+    remove_feather,
+    to_numpy_dtypes,
+)
+from core.libs.processed_ids import (
+    build_processed_ids,
+    add_processed_ids,
+    is_processed,
+    save_processed_ids,
+    load_processed_ids,
+    remove_processed_ids,
+)
+
+
+# data of artifacts, by run collecting data (last is current)
+_data_artifact = [[]]
+_lock_artifact = threading.Lock()
 
 
 def upd_data_artifact(info, data):
     """
-    Update data artifact
+    Update data artifact: data is kept in memory until artifact is created
 
     Args:
         info: information
         data: data to add
     """
 
-    # get varoaible
-    data_artifact = Variable.get("data_artifact", default=[])
-
     # add data
     new_data = {
         "info": info,
         "data": data,
     }
-    data_artifact.append(new_data)
-
-    # save variable
-    Variable.set("data_artifact", data_artifact, overwrite=True)
+    with _lock_artifact:
+        _data_artifact[-1].append(new_data)
 
 
 def create_artifact(key_name):
     """
-    Create artifact
+    Create artifact with data collected, saved in a local file if
+    Prefect API is not reachable
 
     Args:
         key: key of artifact
     """
 
-    # get data
-    data_artifact = Variable.get("data_artifact", default=[])
+    # get data, and reset it
+    with _lock_artifact:
+        data_artifact = _data_artifact[-1].copy()
+        _data_artifact[-1].clear()
 
     # create data
-    create_table_artifact(
-        key=key_name,
-        table=data_artifact,
-    )
+    try:
+        create_table_artifact(
+            key=key_name,
+            table=data_artifact,
+        )
+    except Exception as e:
+        print(f"Artifact {key_name} not created in Prefect: {e}")
+        save_artifact_file(key_name, data_artifact)
+
+
+def save_artifact_file(key_name, data_artifact):
+    """
+    Save artifact in a local JSON file, by key and date
+
+    Args:
+        key_name: key of artifact
+        data_artifact: list of data of artifact
+    """
 
-    # reset variable
-    Variable.set("data_artifact", [], overwrite=True)
+    os.makedirs(PATH_ARTIFACTS, exist_ok=True)
+    date = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(PATH_ARTIFACTS, f"{key_name}_{date}.json")
+
+    with open(path, "w") as f:
+        json.dump(data_artifact, f, ensure_ascii=False, indent=2, default=str)
+
+    print(f"Artifact {key_name} saved in {path}")
+
+
+@contextmanager
+def collect_artifact(key_name):
+    """
+    Collect data of artifact of a run, created at end of run
+    Usable as context manager or as decorator of a flow (under @flow)
+
+    Args:
+        key_name: key of artifact
+    """
+
+    with _lock_artifact:
+        _data_artifact.append([])
+
+    try:
+        yield
+    finally:
+        create_artifact(key_name)
+        with _lock_artifact:
+            _data_artifact.pop()
 
 
 @task(name="Get telegram accounts", task_run_name="get-telegram-accounts")
@@ -101,46 +193,416 @@ def generate_task_name():
     return f"{task_name.lower()}-{file}"
 
 
+def read_parquet(
+    path: str, columns: list | None, filters: list | None
+) -> pd.DataFrame:
+    """
+    Read parquet with fastparquet, only columns and rows of filters
+
+    Args:
+        path: path of parquet
+        columns: list of columns to read, all columns if None
+        filters: list of filters (column, operator, value)
+
+    Returns:
+        Dataframe with parquet data, empty if not read
+    """
+
+    try:
+        # columns of filters are read to filter rows of row groups kept
+        columns_read = columns
+        if columns is not None and filters:
+            columns_read = columns + [
+                col for col in get_filters_columns(filters) if col not in columns
+            ]
+
+        df = pd.read_parquet(
+            path, engine="fastparquet", columns=columns_read, filters=filters
+        )
+        add_bytes_read(path)
+
+        if filters:
+            df = filter_data(df, filters).reset_index(drop=True)
+            df = df[columns] if columns is not None else df
+    except Exception as e:
+        print(e)
+        return pd.DataFrame()
+
+    # month partition is not a column of data
+    if COL_PARTITION_MONTH in df.columns:
+        df = df.drop(columns=COL_PARTITION_MONTH)
+
+    return df
+
+
+def read_compact_dtypes(path: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert data read to compact types, with report of memory used
+
+    Args:
+        path: path of parquet
+        df: dataframe read
+
+    Returns:
+        Dataframe with compact types
+    """
+
+    memory_before = df.memory_usage(index=True, deep=True).sum() / 2**20
+    df = compact_dtypes(df)
+    memory_after = df.memory_usage(index=True, deep=True).sum() / 2**20
+
+    print(
+        f"Memory of data from {path}: {memory_before:.1f} MB -> {memory_after:.1f} MB"
+    )
+
+    return df
+
+
 @task(
     name="Read data",
     task_run_name=generate_task_name,
     tags=["read"],
 )
-def read_data(base_path: str, file_name: str) -> pd.DataFrame:
+def read_data(
+    base_path: str,
+    file_name: str,
+    columns: list | None = None,
+    filters: list | None = None,
+    cache: bool = True,
+    dtype_backend: str | None = None,
+) -> pd.DataFrame:
     """
     Read data from parquet
+    Only columns given are read, and only rows matching filters: partitions
+    and row groups are skipped with their statistics
+    All data read is cached in process, until files change
+    Data is read memory-mapped from intermediate Feather file, if up to date
 
     Args:
         base_path: base path
         file_name: file name
+        columns: list of columns to read, all columns if None
+        filters: list of filters (column, operator, value),
+            e.g. [("account", "==", "astrapress"), ("date", ">=", date)]
+        cache: get and keep data in cache
+        dtype_backend: "pyarrow" for pyarrow-backed dataframe (not cached),
+            zero-copy from Feather file, else numpy dtypes (compact types of
+            SCHEMA_COMPACT for datasets in LIST_DATA_COMPACT_DTYPES)
 
     Returns:
         Dataframe with parquet data
     """
-    # get data
-    try:
-        df = pd.read_parquet(f"{base_path}/{file_name}.parquet", engine="fastparquet")
-    except Exception as e:
-        print(e)
-        df = pd.DataFrame()
+    path = f"{base_path}/{file_name}.parquet"
+
+    # data with numpy dtypes is cached
+    cache = cache and dtype_backend is None
+
+    # get data from cache
+    df = get_cached_data(path) if cache else None
+    if df is not None and set(columns or []) <= set(df.columns):
+        df = filter_data(df, filters)
+        df = df[columns] if columns is not None else df
+
+        # copy, data returned can be modified
+        df = df.copy()
+        df.reset_index(drop=True, inplace=True)
+
+        print(f"Reading {df.shape} data from {path} (cache)")
+        return df
+
+    # get data from intermediate Feather file, else from parquet
+    df = read_feather(path, columns, filters, dtype_backend)
+    if df is not None:
+        print(f"Reading {df.shape} data from {path} (feather)")
+    else:
+        df = read_parquet(path, columns, filters)
+        print(f"Reading {df.shape} data from {path}")
+
+        if dtype_backend is not None:
+            df = df.convert_dtypes(dtype_backend=dtype_backend)
+
+    # compact types of columns
+    if dtype_backend is None and file_name in LIST_DATA_COMPACT_DTYPES:
+        df = read_compact_dtypes(path, df)
+
+    # keep all data in cache, data returned can be modified
+    if cache and columns is None and not filters and not df.empty:
+        cache_data(path, df)
+        df = df.copy()
 
-    print(f"Reading {df.shape} data from {base_path}/{file_name}.parquet")
     return df
 
 
+def get_partition_cols(path: str) -> list:
+    """
+    Get partition columns of a parquet dataset saved
+
+    Args:
+        path: path of parquet
+
+    Returns:
+        List of partition columns, None if no data saved
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    return list(ParquetFile(path).cats)
+
+
+def get_rows_to_append(
+    df_old: pd.DataFrame, df: pd.DataFrame, partition_cols: list
+) -> pd.DataFrame:
+    """
+    Get new rows of data, not in old data already saved
+    Rows of old data must be unchanged in data (same values and dtypes)
+
+    Args:
+        df_old: old dataframe, as saved
+        df: dataframe to save
+        partition_cols: list of columns to partition (categories once read)
+
+    Returns:
+        Dataframe with new rows, None if old data is updated
+    """
+
+    if df_old.empty or set(df_old.columns) != set(df.columns):
+        return None
+
+    ids = pd.Index(df["ID"])
+    if not ids.is_unique or not df_old["ID"].is_unique:
+        return None
+
+    # positions of old rows in data
+    positions = ids.get_indexer(df_old["ID"])
+    if (positions < 0).any():
+        return None
+
+    for col in df_old.columns:
+        serie_old = df_old[col].reset_index(drop=True)
+        serie = df[col].iloc[positions].reset_index(drop=True)
+
+        # partition columns are read as categories, others can be compact
+        if (
+            col in partition_cols
+            or is_compact_dtype(serie_old.dtype)
+            or is_compact_dtype(serie.dtype)
+        ):
+            serie_old = serie_old.astype(object)
+            serie = serie.astype(object)
+
+        if not serie.equals(serie_old):
+            return None
+
+    mask_new = np.ones(df.shape[0], dtype=bool)
+    mask_new[positions] = False
+
+    return df.loc[mask_new, df_old.columns].reset_index(drop=True)
+
+
+def write_parquet(
+    path: str, df: pd.DataFrame, partition_cols: list | None, append: bool = False
+):
+    """
+    Write dataframe to parquet, with fastparquet
+
+    Args:
+        path: path of parquet
+        df: dataframe to write
+        partition_cols: list of columns to partition
+        append: add new files / row groups to parquet saved
+
+    Returns:
+        None
+    """
+
+    # columns as before compact types
+    df = to_object_dtypes(to_numpy_dtypes(df), partition_cols)
+
+    with count_bytes_written(path):
+        df.to_parquet(
+            path,
+            engine="fastparquet",
+            partition_cols=partition_cols,
+            compression="snappy",
+            row_group_offsets=SIZE_ROW_GROUP,
+            append=append,
+        )
+
+
+def add_partition_month(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add column of month of date, to partition data by month
+
+    Args:
+        df: dataframe with date
+
+    Returns:
+        Dataframe with month column
+    """
+
+    return df.assign(**{COL_PARTITION_MONTH: df["date"].dt.strftime("%Y-%m")})
+
+
+def format_data_as_read(
+    path: str,
+    df: pd.DataFrame,
+    partition_cols: list | None,
+    df_old: pd.DataFrame | None = None,
+    nb_row_groups_old: int = 0,
+) -> pd.DataFrame:
+    """
+    Format data saved as data read from parquet: rows in order of row groups
+    written by partition, partition columns at end as categories
+
+    Args:
+        path: path of parquet saved
+        df: dataframe saved
+        partition_cols: list of columns to partition
+        df_old: data read before new rows of df appended
+        nb_row_groups_old: number of row groups before new rows appended
+
+    Returns:
+        Dataframe formatted
+    """
+
+    df = df.reset_index(drop=True)
+    if not partition_cols:
+        return pd.concat([df_old, df], ignore_index=True) if df_old is not None else df
+
+    pf = ParquetFile(path)
+
+    # partitions of new row groups, in order
+    dict_partitions = {}
+    for rg in pf.row_groups[nb_row_groups_old:]:
+        dirname = os.path.dirname(rg.columns[0].file_path)
+        values = dict(part.split("=", 1) for part in dirname.split("/"))
+        dict_partitions.setdefault(
+            tuple(values[col] for col in partition_cols), len(dict_partitions)
+        )
+
+    # rows by partition
+    df_partitions = df.reindex(columns=partition_cols)
+    if COL_PARTITION_MONTH in partition_cols:
+        df_partitions[COL_PARTITION_MONTH] = add_partition_month(df)[
+            COL_PARTITION_MONTH
+        ]
+    positions = [
+        dict_partitions[key]
+        for key in df_partitions.astype(str).itertuples(index=False, name=None)
+    ]
+    order = np.argsort(positions, kind="stable")
+
+    cols = [col for col in partition_cols if col in df.columns]
+    df = df.iloc[order][[col for col in df.columns if col not in cols] + cols]
+
+    # new rows appended after rows read before
+    if df_old is not None:
+        df = pd.concat([df_old.astype({col: object for col in cols}), df])
+
+    df = df.astype({col: pd.CategoricalDtype(pf.cats[col]) for col in cols})
+
+    return df.reset_index(drop=True)
+
+
+def update_data_read(path: str, df_read: pd.DataFrame | None, refresh_cache: bool):
+    """
+    Update data cached and intermediate Feather file, after data saved
+
+    Args:
+        path: path of parquet
+        df_read: all data saved, as read from parquet (None if unknown)
+        refresh_cache: data of path is in cache
+
+    Returns:
+        None
+    """
+
+    if df_read is None:
+        drop_cached_data(path)
+        remove_feather(path)
+        return
+
+    if refresh_cache:
+        cache_data(path, df_read)
+
+    if feather_enabled():
+        write_feather(path, df_read)
+
+
+def update_processed_ids(
+    path: str,
+    file_name: str,
+    df: pd.DataFrame,
+    append: bool = False,
+    processed: dict | None = None,
+):
+    """
+    Update processed IDs of dataset, after data saved
+    Processed IDs not known are removed, rebuilt when data to process is needed
+
+    Args:
+        path: path of parquet
+        file_name: file name
+        df: all data saved, or rows appended
+        append: rows appended to data saved
+        processed: processed IDs before rows appended
+
+    Returns:
+        None
+    """
+
+    if file_name not in LIST_DATA_PROCESSED_IDS or "ID" not in df.columns:
+        remove_processed_ids(path)
+        return
+
+    if not append:
+        processed = build_processed_ids(df)
+    elif processed is not None:
+        processed = add_processed_ids(processed, df)
+
+    if processed is None:
+        remove_processed_ids(path)
+    else:
+        save_processed_ids(path, processed)
+
+
+def remove_parquet(path: str):
+    """
+    Remove parquet file or dataset folder
+
+    Args:
+        path: path of parquet
+    """
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
 @task(name="Save data", task_run_name=generate_task_name, tags=["save"])
 def save_data(
-    base_path: str, file_name: str, df: pd.DataFrame, partition_cols: list | None = None
+    base_path: str,
+    file_name: str,
+    df: pd.DataFrame,
+    partition_cols: list | None = None,
+    df_old: pd.DataFrame | None = None,
+    append: bool = False,
 ):
     """
     Save data to parquet
+    If old data saved is given and unchanged in data, only new rows are
+    appended to the dataset (new files / row groups), else data is rewritten
+    If append, data has only new rows, to add to data saved
 
     Args:
         base_path: base path
         file_name: file name
-        df_old: old dataframe
         df: dataframe to save
         partition_cols: list of columns to partition
+        df_old: old dataframe, as read from parquet
+        append: data has only new rows (IDs not saved)
 
     Returns:
         None
@@ -155,22 +617,195 @@ def save_data(
         os.makedirs(base_path)
 
     path = os.path.join(base_path, f"{file_name}.parquet")
-    print(f"Saving {df.shape} data to {path}")
 
-    # remove dir
-    # os.remove(path)
+    # partition by month of date
+    partition_month = (
+        bool(partition_cols)
+        and PARTITION_MONTH
+        and "date" in df.columns
+        and pd.api.types.is_datetime64_any_dtype(df["date"])
+    )
+    if partition_month:
+        partition_cols = partition_cols + [COL_PARTITION_MONTH]
+
+    # data cached, refreshed after save (index is not saved)
+    df_cached = get_cached_data(path)
+    if not df.index.equals(pd.RangeIndex(df.shape[0])):
+        drop_cached_data(path)
+        df_cached = None
+
+    # new rows, if dataset saved has same partitions
+    partition_saved = get_partition_cols(path)
+    df_append = None
+    if APPEND_DATA and partition_saved == (partition_cols or []):
+        if append:
+            df_append = df
+        elif df_old is not None:
+            df_append = get_rows_to_append(df_old, df, partition_cols or [])
+
+    if df_append is not None:
+        if df_append.empty:
+            print(f"No new data to append to {path}")
+            return
+
+        print(f"Appending {df_append.shape} data to {path}")
+        nb_row_groups_old = len(ParquetFile(path).row_groups)
+        processed = load_processed_ids(path)
+        try:
+            write_parquet(
+                path,
+                add_partition_month(df_append) if partition_month else df_append,
+                partition_cols,
+                append=True,
+            )
+        except ValueError as e:
+            # schema of new rows is not compatible with dataset
+            print(f"Append not possible, data rewritten: {e}")
+        else:
+            # all data, from data read before
+            df_read = df_cached if df_cached is not None else df_old
+            if df_read is not None and (df_cached is not None or feather_enabled()):
+                df_read = format_data_as_read(
+                    path, df_append, partition_cols, df_read, nb_row_groups_old
+                )
+            if df_read is not None and file_name in LIST_DATA_COMPACT_DTYPES:
+                df_read = compact_dtypes(df_read)
+            update_data_read(path, df_read, df_cached is not None)
+            update_processed_ids(path, file_name, df_append, True, processed)
+            return
+
+    # new rows with data saved
+    if append and partition_saved is not None:
+        df = upsert_data(read_data(base_path, file_name), df, cols=["ID"])
 
-    # save data to parquet
-    df.to_parquet(
-        path,
-        engine="fastparquet",
-        partition_cols=partition_cols,
-        compression="snappy",
+    print(f"Saving {df.shape} data to {path}")
+
+    # write in a temporary path, then replace all files of dataset
+    path_tmp = f"{path}.tmp"
+    remove_parquet(path_tmp)
+    write_parquet(
+        path_tmp, add_partition_month(df) if partition_month else df, partition_cols
     )
+    remove_parquet(path)
+    os.replace(path_tmp, path)
+
+    # all data, if index is saved as data read
+    df_read = None
+    if (df_cached is not None or feather_enabled()) and df.index.equals(
+        pd.RangeIndex(df.shape[0])
+    ):
+        df_read = format_data_as_read(path, df, partition_cols)
+        if file_name in LIST_DATA_COMPACT_DTYPES:
+            df_read = compact_dtypes(df_read)
+    update_data_read(path, df_read, df_cached is not None)
+    update_processed_ids(path, file_name, df)
 
     return
 
 
+@task(name="Compact data", task_run_name=generate_task_name)
+def compact_data(base_path: str, file_name: str):
+    """
+    Compact parquet dataset: rewrite data in one file by partition,
+    after new rows appended in small files
+
+    Args:
+        base_path: base path
+        file_name: file name
+
+    Returns:
+        None
+    """
+
+    path = os.path.join(base_path, f"{file_name}.parquet")
+    if not os.path.exists(path):
+        print(f"No data in {path}")
+        return
+
+    # files of dataset, by partition
+    pf = ParquetFile(path)
+    files = {rg.columns[0].file_path for rg in pf.row_groups}
+    partitions = {os.path.dirname(file or "") for file in files}
+
+    if len(files) <= len(partitions):
+        print(f"{path} already compacted: {len(files)} files")
+        return
+
+    print(f"Compacting {path}: {len(files)} files, {len(partitions)} partitions")
+
+    # data sorted by date
+    df = read_data(base_path, file_name)
+    df = upsert_data(pd.DataFrame(), df, cols=["ID"])
+
+    partition_cols = [col for col in pf.cats if col != COL_PARTITION_MONTH]
+    save_data(base_path, file_name, df, partition_cols or None)
+
+
+def read_data_columns(base_path: str, file_name: str) -> list:
+    """
+    Read columns of parquet, without reading data
+
+    Args:
+        base_path: base path
+        file_name: file name
+
+    Returns:
+        List of columns (with partition columns, without index)
+    """
+
+    path = f"{base_path}/{file_name}.parquet"
+    if not os.path.exists(path):
+        return []
+
+    pf = ParquetFile(path)
+
+    # index is not a column of data
+    cols_index = (pf.pandas_metadata or {}).get("index_columns", [])
+
+    return [col for col in pf.columns if col not in cols_index] + [
+        col for col in pf.cats if col not in pf.columns and col != COL_PARTITION_MONTH
+    ]
+
+
+def read_data_chunks(base_path: str, file_name: str, size_chunk: int):
+    """
+    Read data from parquet chunk by chunk, with row groups
+    Small row groups (as partitions) are regrouped until size of chunk
+
+    Args:
+        base_path: base path
+        file_name: file name
+        size_chunk: minimum number of rows by chunk
+
+    Returns:
+        Generator of dataframes
+    """
+
+    path = f"{base_path}/{file_name}.parquet"
+    if not os.path.exists(path):
+        print(f"No data in {path}")
+        return
+
+    list_dfs = []
+    nb_rows = 0
+
+    for df in ParquetFile(path).iter_row_groups():
+        # month partition is not a column of data
+        if COL_PARTITION_MONTH in df.columns:
+            df = df.drop(columns=COL_PARTITION_MONTH)
+
+        list_dfs.append(df)
+        nb_rows += df.shape[0]
+
+        if nb_rows >= size_chunk:
+            yield pd.concat(list_dfs).reset_index(drop=True)
+            list_dfs = []
+            nb_rows = 0
+
+    if list_dfs:
+        yield pd.concat(list_dfs).reset_index(drop=True)
+
+
 @task(name="Filter data to process", task_run_name="filter-data-to-process")
 def keep_data_to_process(
     df_source: pd.DataFrame, df_to_filter: pd.DataFrame
@@ -195,6 +830,69 @@ def keep_data_to_process(
     return df
 
 
+@task(name="Filter data not processed", task_run_name="filter-data-not-processed")
+def keep_data_not_processed(
+    df_source: pd.DataFrame, base_path: str, file_name: str
+) -> pd.DataFrame:
+    """
+    Filter data not in a dataset, with processed IDs saved next to it
+    (without reading dataset). Processed IDs are rebuilt from IDs of dataset
+    if not saved or dataset changed since
+
+    Args:
+        df_source: dataframe
+        base_path: base path of dataset
+        file_name: file name of dataset
+
+    Returns:
+        Dataframe with data not in dataset
+    """
+
+    path = f"{base_path}/{file_name}.parquet"
+    if df_source.empty or not os.path.exists(path):
+        return df_source
+
+    processed = load_processed_ids(path)
+    if processed is None:
+        print(f"Building processed IDs of {path}")
+        cols = [
+            col
+            for col in ["ID", "account", "id_message"]
+            if col in read_data_columns(base_path, file_name)
+        ]
+        processed = build_processed_ids(read_data(base_path, file_name, columns=cols))
+        save_processed_ids(path, processed)
+
+    return df_source[~is_processed(processed, df_source)].reset_index(drop=True)
+
+
+@task(name="Update index tokens", task_run_name="update-index-tokens")
+def update_index_tokens(df: pd.DataFrame):
+    """
+    Update inverted index of tokens with new messages
+
+    Args:
+        df: dataframe with new messages (ID and texts)
+
+    Returns:
+        None
+    """
+
+    if df.empty:
+        print("No data to index")
+        return
+
+    # get index
+    df_index = read_data(PATH_FILTER_DATALAKE, "index_tokens")
+
+    # replace tokens of messages
+    df_index = merge_index_tokens(df_index, df)
+    print(f"Index tokens: {df.shape[0]} messages indexed")
+
+    # save index
+    save_data(PATH_FILTER_DATALAKE, "index_tokens", df_index)
+
+
 @task(name="Concat old and new data", task_run_name="concat-old-new-data")
 def concat_old_new_df(
     df_raw: pd.DataFrame, df_new: pd.DataFrame, cols: list
@@ -222,33 +920,109 @@ def concat_old_new_df(
     return df
 
 
-@task(name="Get region Géojson", task_run_name="get-region-geojson")
-def get_regions_geojson():
+def get_order_by_date(df: pd.DataFrame, cols: list, rows: np.ndarray) -> np.ndarray:
+    """
+    Get order of rows sorted by date and cols
+    Data is made of runs already sorted (old data, partitions, new data),
+    a stable sort on date merge the runs without a full sort,
+    only rows with the same date are sorted again by cols
+
+    Args:
+        df: dataframe
+        cols: list of columns to sort rows with same date
+        rows: positions of rows to sort
+
+    Returns:
+        Positions of rows sorted
     """
-    Get the region and id from the json file
+
+    sort_cols = ["date"] + [col for col in cols if col != "date"]
+
+    def sort_rows(pos):
+        df_sort = pd.DataFrame({col: df[col].to_numpy()[pos] for col in sort_cols})
+        return pos[df_sort.sort_values(sort_cols, kind="stable").index]
+
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]) or df["date"].isna().any():
+        return sort_rows(rows)
+
+    # merge sorted runs of dates
+    dates = df["date"].array.asi8[rows]
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+    order = rows[order]
+
+    # rows with same date, sorted by cols
+    same = dates[1:] == dates[:-1]
+    tied = np.concatenate([[False], same]) | np.concatenate([same, [False]])
+    if tied.any() and len(sort_cols) > 1:
+        order[tied] = sort_rows(order[tied])
+
+    return order
+
+
+@task(name="Upsert data", task_run_name="upsert-data")
+def upsert_data(
+    df_old: pd.DataFrame, df_new: pd.DataFrame, cols: list
+) -> pd.DataFrame:
     """
+    Insert new rows, and update rows already in old data (same cols)
+    Data is kept sorted by date and cols: new rows are merged in old data
+    sorted, without full sort and drop of duplicates on all data
+    Number of rows inserted and updated are in df.attrs["upsert"]
 
-    # read file json
-    with open(PATH_JSON_RU_REGION) as file:
-        data = json.load(file)
+    Args:
+        df_old: old dataframe, sorted by date and cols
+        df_new: new dataframe
+        cols: list of columns of the key of rows
 
-    # get id and name
-    dict_region = {}
-    for i in range(len(data["features"])):
-        dict_region[data["features"][i]["properties"]["name"]] = data["features"][i][
-            "id"
-        ]
+    Returns:
+        df: dataframe
+    """
 
-    # update dict
-    dict_region = {
-        k.replace("Moskva", "Moscow")
-        .replace("'", "")
-        .replace("Moscow Oblast", "Moscow")
-        .replace("Moscow City", "Moscow"): v
-        for k, v in dict_region.items()
-    }
+    # last row is kept for a key
+    if not df_new.empty:
+        df_new = df_new.drop_duplicates(subset=cols, keep="last")
+
+    mask_updated = np.zeros(df_old.shape[0], dtype=bool)
+    if not df_old.empty and not df_new.empty:
+        # rows of old data updated by new rows
+        mask_updated = df_old[cols[0]].isin(df_new[cols[0]]).to_numpy()
+        if len(cols) > 1 and mask_updated.any():
+            mask_updated[mask_updated] = pd.MultiIndex.from_frame(
+                df_old.loc[mask_updated, cols]
+            ).isin(pd.MultiIndex.from_frame(df_new[cols]))
+
+    nb_updated = int(mask_updated.sum())
+    nb_inserted = df_new.shape[0] - nb_updated
+
+    list_dfs = [df for df in [df_old, df_new] if not df.empty]
+    if not list_dfs:
+        return df_new
+
+    df = pd.concat(list_dfs)
+    rows = np.flatnonzero(
+        np.concatenate([~mask_updated, np.ones(df_new.shape[0], dtype=bool)])
+    )
+
+    # rows kept, sorted by date
+    if "date" in df.columns:
+        rows = get_order_by_date(df, cols, rows)
+
+    df = df.iloc[rows].reset_index(drop=True)
+    print(f"Upsert data: {nb_inserted} inserted, {nb_updated} updated - {df.shape}")
 
-    return dict_region
+    df.attrs["upsert"] = {"inserted": nb_inserted, "updated": nb_updated}
+    return df
+
+
+@task(name="Get region Géojson", task_run_name="get-region-geojson")
+def get_regions_geojson():
+    """
+    Get the region and id, from table of regions
+    (Moscow Oblast and Moscow City as Moscow)
+    """
+
+    return dict(load_regions_table()["aliases_moscow"])
 
 
 def format_clean_text(text):
@@ -261,97 +1035,8 @@ def format_clean_text(text):
     Returns:
         Text cleaned
     """
-    # Remove special characters
-    regex_pattern = re.compile(
-        pattern="["
-        "\U0001f600-\U0001f64f"  # emoticons
-        "\U0001f300-\U0001f5ff"  # symbols & pictographs
-        "\U0001f680-\U0001f6ff"  # transport & map symbols
-        "\U0001f1e0-\U0001f1ff"  # flags (iOS)
-        "\U00002500-\U00002bef"  # chinese char
-        "\U00002702-\U000027b0"
-        "\U00002702-\U000027b0"
-        "\U000024c2-\U0001f251"
-        "\U0001f926-\U0001f937"
-        "\U00010000-\U0010ffff"
-        "\u2640-\u2642"
-        "\u2600-\u2b55"
-        "\u200d"
-        "\u23cf"
-        "\u23e9"
-        "\u231a"
-        "\ufe0f"  # dingbats
-        "\u3030"
-        "]+",
-        flags=re.UNICODE,
-    )
-    text = regex_pattern.sub("", text)
-
-    # Remove unwanted text
-    motifs = [
-        r"Подписывайся на SHOT",
-        r"Прислать новость (https://t.me/shot_go)",
-        r"Прислать новость",
-        r"Предложить свою новость",
-        r"Подслушано электрички Москвы",
-        r"#Новости@transport_online",
-        r"Минтранс Подмосковья",
-        r"Прислать фото/видео/информацию: @Astra4bot",
-        r"Резервный канал ASTRA: https://t.me/astrapress2",
-        r"astrapress@protonmail.com",
-        r"Предложить свою новость (https://t.me/electrichkibot)",
-        r"Предложить свою новость",
-        r"Подслушано электрички Москвы (https://t.me/electrichki)",
-        r"Подслушано электрички Москвы",
-        r"SHOT",
-    ]
-    for motif in motifs:
-        text = re.sub(motif, "", text)
-
-    # remove after
-    text = re.sub(r"\s*(Фото|Видео)\s*\S*\s*от:.*?\n", "", text)
-
-    # remove http and @
-    text = re.sub(r"@\S+|http\S+", "", text)
-    text = re.sub(r"Subscribe to SHOT.*", "", text)
-    text = re.sub(r"@Astra4botРезервный.*|Прислать фото/видео/информацию:", "", text)
-    text = re.sub(r"\s*—\s*", ". ", text)
-    text = re.sub(r"—\s*", "", text)
-    text = re.sub(r"&amp;", "", text)
-
-    # Remove first and last character if
-    if text.startswith(" "):
-        text = text[1:]
-    if text.endswith(":"):
-        text = text[:-1]
-
-    # Remove unwanted text translations
-    translations = [
-        "Here is the translation:",
-        "Here is the English translation:",
-        "Here is the translation to English:",
-        "Here's the translation:",
-        "Translation in English:",
-        "I'm ready to translate.",
-        "The translation is:",
-        "Translation:",
-        "I'll translate the text for you:",
-        "I'll translate the text accurately,",
-        "Translation in English as listed:",
-        "I can translate this text for you.",
-        "I'll translate the text accurately from Russian to English while maintaining the context and tone of the original.",
-        "I'll translate the text accurately and grammatically correct.",
-        "Here is the translation of your text from Russian to English:",
-    ]
-    for trad in translations:
-        text = text.replace(trad, "")
-
-    if not text:
-        return None
-
-    text = re.sub(r" +", " ", text).strip()
 
-    return text
+    return clean_text(text)
 
 
 @task(name="Rename columns", task_run_name="rename-columns")
@@ -395,6 +1080,8 @@ def retype_cols(df, dict_types):
                 df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
             elif dtype == "float64":
                 df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+            elif dtype == "string":
+                df[col] = df[col].astype(get_compact_dtype(dtype))
             else:
                 df[col] = df[col].astype(dtype)
 
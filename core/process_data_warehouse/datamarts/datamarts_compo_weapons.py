@@ -1,6 +1,6 @@
 import pandas as pd
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 from prefect.states import Completed
 
 
@@ -2,7 +2,7 @@ import os
 import pandas as pd
 import numpy as np
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 from prefect.states import Completed, Failed
 
 
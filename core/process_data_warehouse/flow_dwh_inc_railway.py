@@ -1,4 +1,4 @@
-from prefect import flow
+from core.libs.perf_metrics import flow
 
 # Flows
 from core.process_data_warehouse.ingest.ingest_inc_railway import (
@@ -13,7 +13,7 @@ import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 from prefect.states import Completed, Failed
 
 # Variables
@@ -8,7 +8,7 @@
 
 import pandas as pd
 import numpy as np
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 from prefect.variables import Variable
 from prefect.states import Completed, Failed
 
@@ -9,7 +9,7 @@
 import pandas as pd
 from datetime import datetime
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Functions
 from core.libs.utils import read_data, retype_cols, upd_data_artifact, create_artifact
@@ -8,7 +8,7 @@
 
 from datetime import datetime
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Functions
 from core.libs.utils import read_data
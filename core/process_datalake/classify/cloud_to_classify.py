@@ -2,10 +2,10 @@ from datetime import datetime
 
 import pandas as pd
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Functions
-from core.libs.utils import read_data, concat_old_new_df, save_data
+from core.libs.utils import read_data, upsert_data, save_data
 from core.libs.google_api import (
     connect_google_sheet_api,
     get_sheet_data,
@@ -151,7 +151,7 @@ def update_qualif_data(df, df_qualif):
     df = df.astype(SCHEMA_QUALIF_RAILWAY)
 
     # concat dataframes
-    df_qualif = concat_old_new_df(df_qualif, df, ["ID", "IDX"])
+    df_qualif = upsert_data(df_qualif, df, ["ID", "IDX"])
     print(df_qualif)
 
     # save data
@@ -206,7 +206,7 @@ def update_filter_data(df, df_filter):
         df[col] = ""
 
     # concat dataframes
-    df_filter = concat_old_new_df(df_filter, df, ["ID"])
+    df_filter = upsert_data(df_filter, df, ["ID"])
     print(df_filter)
 
     # save data
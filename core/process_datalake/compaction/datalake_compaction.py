@@ -0,0 +1,35 @@
+from core.libs.perf_metrics import flow
+
+# Functions
+from core.libs.utils import compact_data
+
+# Variables
+from core.config.paths import (
+    PATH_TELEGRAM_RAW,
+    PATH_TELEGRAM_CLEAN,
+    PATH_TELEGRAM_TRANSFORM,
+    PATH_FILTER_DATALAKE,
+)
+
+
+# datasets with new rows appended
+LIST_DATA_COMPACTION = [
+    (PATH_TELEGRAM_RAW, "raw_telegram"),
+    (PATH_TELEGRAM_CLEAN, "clean_telegram"),
+    (PATH_TELEGRAM_TRANSFORM, "transform_telegram"),
+    (PATH_FILTER_DATALAKE, "filter_datalake"),
+]
+
+
+@flow(
+    name="DLK Flow Compaction",
+    flow_run_name="dlk-flow-compaction",
+    log_prints=True,
+)
+def flow_datalake_compaction():
+    """
+    Merge small files of datasets, written by appends of new rows
+    """
+
+    for base_path, file_name in LIST_DATA_COMPACTION:
+        compact_data(base_path, file_name)
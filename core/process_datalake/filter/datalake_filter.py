@@ -1,16 +1,33 @@
-import hashlib
+import os
 import re
+import shutil
+import hashlib
+import itertools
 import pandas as pd
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Functions
 from core.libs.utils import (
     get_telegram_accounts,
     read_data,
+    read_data_chunks,
+    read_data_columns,
     save_data,
     upd_data_artifact,
     create_artifact,
-    concat_old_new_df,
+    upsert_data,
+)
+from core.libs.token_index import get_ids_with_words, mask_candidates
+from core.process_datalake.filter.exclusion_rules import (
+    generate_hash_exclusion,
+    compile_exclusion_rules,
+    find_exclusion_rule,
+)
+from core.process_datalake.filter.terms_matcher import (
+    compile_terms_matcher,
+    get_terms_matcher,
+    match_terms_lists,
+    match_terms_parallel,
 )
 
 # Variables
@@ -19,6 +36,15 @@ from core.config.paths import (
     PATH_TWITTER_CLEAN,
     PATH_FILTER_DATALAKE,
 )
+from core.config.variables import (
+    FILTER_PARALLEL,
+    NB_WORKERS_FILTER,
+    MIN_SIZE_FILTER_PARALLEL,
+    FILTER_STREAMING,
+    SIZE_CHUNK_FILTER,
+)
+
+from core.utils.terms_filter.rules_exclusion import list_rules_exclusion
 
 from core.utils.terms_filter.terms_incidents_railway import (
     list_words_set_railway,
@@ -42,6 +68,47 @@ from core.utils.terms_filter.terms_sabotage import (
 )
 
 
+# configuration of the filter, by theme
+DICT_FILTER_CONFIG = {
+    "railway": {
+        "col_filter": "filter_inc_railway",
+        "col_terms": "found_terms_railway",
+        "col_add_final": "add_final_inc_railway",
+        "col_hash": "hash_filter_railway",
+        "terms_lists": [
+            (list_words_set_railway, 1),
+            (list_substr_set_railway, 2),
+            (list_expression_railways, 3),
+            (list_word_railways, 3),
+        ],
+    },
+    "arrest": {
+        "col_filter": "filter_inc_arrest",
+        "col_terms": "found_terms_arrest",
+        "col_add_final": "add_final_inc_arrest",
+        "col_hash": "hash_filter_arrest",
+        "terms_lists": [
+            (list_words_set_arrest, 1),
+            (list_substr_set_arrest, 2),
+            (list_expression_arrest, 3),
+            (list_word_arrest, 3),
+        ],
+    },
+    "sabotage": {
+        "col_filter": "filter_inc_sabotage",
+        "col_terms": "found_terms_sabotage",
+        "col_add_final": "add_final_inc_sabotage",
+        "col_hash": "hash_filter_sabotage",
+        "terms_lists": [
+            (list_words_set_sabotage, 1),
+            (list_substr_set_sabotage, 2),
+            (list_expression_sabotage, 3),
+            (list_word_sabotage, 3),
+        ],
+    },
+}
+
+
 def find_terms_in_text(list_terms, text, id_filter):
     """
     Find terms in text
@@ -134,33 +201,57 @@ def regroup_data(df_telegram, df_twitter):
     return df
 
 
-@task(name="Remove data not pertinant", task_run_name="remove-data-not-pertinant")
-def remove_data_not_pertinant(df):
+@task(name="Apply exclusion rules", task_run_name="apply-exclusion-rules")
+def apply_exclusion_rules(df, df_exclusion_old, rules, hash_exclusion):
     """
-    Remove data not pertinant
+    Remove data not pertinant, with exclusion rules
+    All rules are searched in one pass on data,
+    data already checked with the same rules keep their result
 
     Args:
         df: dataframe with data
+        df_exclusion_old: dataframe with exclusion rule of data already checked
+        rules: list of exclusion rules
+        hash_exclusion: hash of exclusion rules
 
     Returns:
-        Dataframe with data not pertinant
+        Tuple (dataframe with data not excluded,
+        dataframe with exclusion rule of data checked)
     """
 
-    list_words = [
-        "COVID",
-        "covid",
-    ]
-
-    # remove data containing words (except text_translate is null)
-    mask = pd.notna(df["text_translate"]) & df["text_translate"].str.contains(
-        "|".join(list_words)
+    df_exclusion = pd.DataFrame(
+        {"ID": df["ID"], "exclusion_rule": None, "hash_exclusion": hash_exclusion}
     )
 
+    # data already checked with same rules
+    mask_known = pd.Series(False, index=df.index)
+    if not df_exclusion_old.empty:
+        known_rules = df_exclusion_old[
+            df_exclusion_old["hash_exclusion"] == hash_exclusion
+        ].set_index("ID")["exclusion_rule"]
+
+        mask_known = df["ID"].isin(known_rules.index)
+        df_exclusion.loc[mask_known, "exclusion_rule"] = df.loc[mask_known, "ID"].map(
+            known_rules
+        )
+
+    print(f"Data already checked: {mask_known.sum()}")
+
+    # search rules on other data (except text_translate is null)
+    compiled = compile_exclusion_rules(rules)
+    df_exclusion.loc[~mask_known, "exclusion_rule"] = [
+        find_exclusion_rule(compiled, id_data, text)
+        for id_data, text in zip(
+            df.loc[~mask_known, "ID"], df.loc[~mask_known, "text_translate"]
+        )
+    ]
+
     # remove data
+    mask = df_exclusion["exclusion_rule"].notna()
     df = df[~mask].reset_index(drop=True)
 
-    print(f"Data Not Pertinant: {df.shape}")
-    return df
+    print(f"Data Not Pertinant: {mask.sum()} - Data kept: {df.shape}")
+    return df, df_exclusion.reset_index(drop=True)
 
 
 @task(name="Generate Hash Filter", task_run_name="generate-hash-filter")
@@ -194,16 +285,342 @@ def generate_hash_filter(dict_filters):
     return hashed_data.hexdigest()
 
 
+def get_terms_units(terms_lists):
+    """
+    Get terms of each list as strings (same format as found terms)
+
+    Args:
+        terms_lists: list of (list of terms, id_filter)
+
+    Returns:
+        List of (id_filter, list of terms)
+    """
+
+    return [
+        (
+            id_filter,
+            [",".join(term) if id_filter in (1, 2) else term for term in list_terms],
+        )
+        for list_terms, id_filter in terms_lists
+    ]
+
+
+@task(name="Generate Terms Filter", task_run_name="generate-terms-filter-{theme}")
+def generate_terms_filter(theme, hash_filt, terms_lists):
+    """
+    Generate fingerprint of each term of the filter
+
+    Args:
+        theme: theme of the filter
+        hash_filt: hash of the filter
+        terms_lists: list of (list of terms, id_filter)
+
+    Returns:
+        Dataframe with one row by term
+    """
+
+    data = [
+        {
+            "hash_filter": hash_filt,
+            "theme": theme,
+            "id_list": id_list,
+            "id_filter": id_filter,
+            "position": position,
+            "term": term,
+            "hash_term": hashlib.md5(f"{id_filter}|{term}".encode()).hexdigest(),
+        }
+        for id_list, (id_filter, list_terms) in enumerate(get_terms_units(terms_lists))
+        for position, term in enumerate(list_terms)
+    ]
+
+    return pd.DataFrame(data)
+
+
+def get_delta_terms(df_terms_old, hash_old, terms_lists):
+    """
+    Get terms added and removed since an old hash filter
+    Return None if lists can't be compared (unknown hash, lists or order changed)
+
+    Args:
+        df_terms_old: dataframe with terms of old filters
+        hash_old: old hash of the filter
+        terms_lists: list of (list of terms, id_filter)
+
+    Returns:
+        Tuple (terms lists with only added terms, removed terms) or None
+    """
+
+    if df_terms_old.empty or pd.isna(hash_old):
+        return None
+
+    df_old = df_terms_old[df_terms_old["hash_filter"] == hash_old]
+    if df_old.empty:
+        return None
+
+    # old terms by list
+    old_units = [
+        (int(df_list["id_filter"].iloc[0]), df_list.sort_values("position")["term"])
+        for _, df_list in df_old.groupby("id_list", sort=True)
+    ]
+    new_units = get_terms_units(terms_lists)
+
+    # lists must be the same
+    if [id_filter for id_filter, _ in old_units] != [
+        id_filter for id_filter, _ in new_units
+    ]:
+        return None
+
+    added_lists = []
+    removed = set()
+    for (id_filter, old_terms), (_, new_terms), (list_terms, _) in zip(
+        old_units, new_units, terms_lists
+    ):
+        old_terms = list(old_terms)
+
+        # terms kept must stay in the same order
+        common = set(old_terms) & set(new_terms)
+        if [t for t in dict.fromkeys(old_terms) if t in common] != [
+            t for t in dict.fromkeys(new_terms) if t in common
+        ]:
+            return None
+
+        # a term duplicated or not is added and removed
+        added = {t for t in new_terms if new_terms.count(t) != old_terms.count(t)}
+        removed |= {t for t in old_terms if new_terms.count(t) != old_terms.count(t)}
+
+        added_lists.append(
+            (
+                [term for term, unit in zip(list_terms, new_terms) if unit in added],
+                id_filter,
+            )
+        )
+
+    return added_lists, removed
+
+
+def has_removed_terms(found_terms, removed):
+    """
+    Check if found terms contain a removed term
+
+    Args:
+        found_terms: found terms of a message
+        removed: set of removed terms
+
+    Returns:
+        True if a removed term was found
+    """
+
+    if not isinstance(found_terms, str) or not found_terms:
+        return False
+
+    return found_terms in removed or any(
+        term in removed for term in found_terms.split(",")
+    )
+
+
+def get_ids_added_words(df_index, added_lists):
+    """
+    Get IDs of messages who may contain an added set of complete words,
+    with index of tokens
+    Return None if added terms can't be found with index
+
+    Args:
+        df_index: dataframe with index of tokens
+        added_lists: terms lists with only added terms
+
+    Returns:
+        Set of IDs or None
+    """
+
+    if df_index.empty:
+        return None
+
+    # only sets of complete words can be found with index
+    if any(list_terms and id_filter != 1 for list_terms, id_filter in added_lists):
+        return None
+
+    ids = set()
+    for list_terms, _ in added_lists:
+        for word_set in list_terms:
+            ids_set = get_ids_with_words(df_index, word_set)
+            if ids_set is None:
+                return None
+            ids |= ids_set
+
+    return ids
+
+
+@task(name="Select data to filter", task_run_name="select-data-to-filter-{theme}")
+def select_data_to_filter(
+    df,
+    df_hash_old,
+    df_filter_old,
+    df_terms_old,
+    theme,
+    config_filter,
+    hash_filt,
+    df_index=pd.DataFrame(),
+):
+    """
+    Select data to filter according to hash of the filter
+    If terms of the old filter are known, only data who can change are filtered:
+    - data not matched who contain an added term
+    - data matched with a removed term, or who contain an added term
+    Other data keep their old result
+    If only sets of complete words are added, index of tokens give the data to check
+
+    Args:
+        df: dataframe with data
+        df_hash_old: dataframe with old hash filter
+        df_filter_old: dataframe with old filtered data
+        df_terms_old: dataframe with terms of old filters
+        theme: theme of the filter
+        config_filter: configuration of the filter
+        hash_filt: hash of the filter
+        df_index: dataframe with index of tokens
+
+    Returns:
+        Tuple (data to filter, data with old result kept)
+    """
+
+    col_filter = config_filter["col_filter"]
+    col_terms = config_filter["col_terms"]
+    col_add_final = config_filter["col_add_final"]
+    col_hash = config_filter["col_hash"]
+
+    # new data
+    df_new = df[~df["ID"].isin(df_hash_old["ID"])]
+
+    # data with hash different
+    df_changed = pd.merge(
+        df,
+        df_hash_old.loc[df_hash_old[col_hash] != hash_filt, ["ID", col_hash]],
+        on="ID",
+        how="inner",
+    ).rename(columns={col_hash: "hash_old"})
+
+    # old result of data
+    if col_filter in df_filter_old.columns:
+        df_changed = pd.merge(
+            df_changed,
+            df_filter_old[["ID", col_filter, col_terms]],
+            on="ID",
+            how="left",
+        )
+    else:
+        df_changed[col_filter] = False
+        df_changed[col_terms] = ""
+    df_changed[col_filter] = df_changed[col_filter].eq(True)
+
+    list_to_filter = [df_new]
+    list_kept = []
+
+    for hash_old, df_group in df_changed.groupby("hash_old", dropna=False):
+        delta = get_delta_terms(df_terms_old, hash_old, config_filter["terms_lists"])
+
+        if delta is None:
+            # terms unknown, filter all data not already filtered
+            df_group = df_group[~df_group["ID"].isin(df_filter_old["ID"])]
+            list_to_filter.append(df_group[df.columns])
+            continue
+
+        added_lists, removed = delta
+        matcher_added = compile_terms_matcher(added_lists)
+
+        # data who contain an added term
+        mask_added = pd.Series(False, index=df_group.index)
+        if any(list_terms for list_terms, _ in added_lists):
+            df_check = df_group
+
+            # candidates with index of tokens
+            ids_index = get_ids_added_words(df_index, added_lists)
+            if ids_index is not None:
+                df_check = df_group[
+                    mask_candidates(df_group["ID"], df_index, ids_index)
+                ]
+                print(f"Data to check with index: {df_check.shape[0]}")
+
+            mask_added.loc[df_check.index] = df_check["text_translate"].apply(
+                lambda x: pd.notna(x) and match_terms_lists(matcher_added, x)[0]
+            )
+
+        # data matched with a removed term
+        mask_removed = df_group[col_filter] & df_group[col_terms].apply(
+            lambda x: has_removed_terms(x, removed)
+        ).astype(bool)
+
+        mask = mask_added | mask_removed
+        print(f"Data to filter with delta of hash {hash_old}: {mask.sum()}")
+
+        list_to_filter.append(df_group.loc[mask, df.columns])
+
+        # keep old result
+        df_kept = df_group.loc[~mask, list(df.columns) + [col_filter, col_terms]].copy()
+        df_kept[col_terms] = df_kept[col_terms].where(df_kept[col_filter], "")
+        df_kept[col_add_final] = False
+        df_kept[col_hash] = hash_filt
+        list_kept.append(df_kept)
+
+    df_to_filter = pd.concat(list_to_filter)
+    df_kept = pd.concat(list_kept) if list_kept else pd.DataFrame()
+
+    print(f"Data to filter: {df_to_filter.shape} - Data kept: {df_kept.shape}")
+    return df_to_filter, df_kept
+
+
+@task(name="Update refiltered data", task_run_name="update-refiltered-data")
+def update_refiltered_data(df_filter_old, df, config_filter):
+    """
+    Update filter and found terms of data already filtered, and filtered again
+
+    Args:
+        df_filter_old: dataframe with old filtered data
+        df: dataframe with data filtered again
+        config_filter: configuration of the filter
+
+    Returns:
+        Dataframe with old filtered data updated
+    """
+
+    col_filter = config_filter["col_filter"]
+    col_terms = config_filter["col_terms"]
+
+    if df_filter_old.empty or col_filter not in df_filter_old.columns:
+        return df_filter_old
+
+    df = df[df["ID"].isin(df_filter_old["ID"])].set_index("ID")
+    if df.empty:
+        return df_filter_old
+
+    print(f"Data refiltered: {df.shape[0]}")
+
+    df_filter_old = df_filter_old.set_index("ID")
+    df_filter_old.loc[df.index, col_filter] = df[col_filter]
+    df_filter_old.loc[df.index, col_terms] = df[col_terms]
+
+    return df_filter_old.reset_index()
+
+
 @task(name="Apply filters {type_filter}", task_run_name="apply-filters-{type_filter}")
-def apply_filters(df, type_filter, config_filter, hash_filt):
+def apply_filters(
+    df,
+    type_filter,
+    config_filter,
+    hash_filt,
+    parallel=FILTER_PARALLEL,
+    nb_workers=NB_WORKERS_FILTER,
+):
     """
     Apply filters to a DataFrame based on specified configuration and type.
+    If parallel, data is split in shards filtered on multiple cores
 
     Args:
         df: DataFrame to filter
         type_filter: Type of filter to apply
         config_filter: Configuration for the filter
         hash_filt: Hash of the filter
+        parallel: filter on multiple cores
+        nb_workers: number of processes (None = number of cores)
 
     Returns:
         DataFrame with filter applied
@@ -216,26 +633,33 @@ def apply_filters(df, type_filter, config_filter, hash_filt):
     col_hash = config_filter["col_hash"]
     dict_filters = config_filter["terms_lists"]
 
+    # get matcher, compiled once by hash filter
+    matcher = get_terms_matcher(dict_filters, hash_filt)
+
     # Init cols
     df[col_filter] = df["filter_theme"] == f"incident_{type_filter}"
     df[col_terms] = ""
     df[col_add_final] = False
 
-    # apply filter according to terms
-    for terms, id_filter in dict_filters:
-
-        # get
-        mask = (df[col_filter] == False) & pd.notna(df["text_translate"])
-        print(f"Data mask to filter: {df[mask].shape}")
+    # apply all terms lists in one pass, the first list who match is kept
+    mask = (df[col_filter] == False) & pd.notna(df["text_translate"])
+    print(f"Data mask to filter: {df[mask].shape}")
 
+    if parallel and mask.sum() >= MIN_SIZE_FILTER_PARALLEL:
+        results = match_terms_parallel(
+            df.loc[mask, "text_translate"].tolist(),
+            dict_filters,
+            hash_filt,
+            nb_workers=nb_workers,
+        )
+    elif mask.any():
         results = df.loc[mask, "text_translate"].apply(
-            lambda x: find_terms_in_text(
-                terms,
-                x,
-                id_filter=id_filter,
-            )
+            lambda x: match_terms_lists(matcher, x)
         )
+    else:
+        results = []
 
+    if len(results) > 0:
         # Zip results
         filter_values, terms_values = zip(*results)
 
@@ -287,167 +711,404 @@ def update_final_data(df, df_old, type):
         # get data not in old
         mask = df[~df["ID"].isin(df_old["ID"])]
 
-    df_old = concat_old_new_df(df_old, mask, cols=["ID"])
+    df_old = upsert_data(df_old, mask, cols=["ID"])
     df_old = df_old.ffill()
 
     return df_old
 
 
-@flow(
-    name="DLK Flow Filter",
-    flow_run_name="dlk-flow-filter",
-    log_prints=True,
-)
-def flow_datalake_filter():
+@task(name="Update terms filter", task_run_name="update-terms-filter")
+def update_terms_filter(df_terms_old, df_terms, df_hash):
     """
-    Process filter
+    Update terms of hash filters, keep only hash filters still used
+
+    Args:
+        df_terms_old: dataframe with terms of old filters
+        df_terms: dataframe with terms of current filters
+        df_hash: dataframe with hash filter of data
+
+    Returns:
+        Dataframe with terms of hash filters
     """
 
-    # get Filter data
-    df_filter_old = read_data(PATH_FILTER_DATALAKE, "filter_datalake")
+    df_terms = upsert_data(
+        df_terms_old, df_terms, cols=["hash_filter", "theme", "id_list", "position"]
+    )
 
-    # get Hash Filter
-    df_hash_filte_old = read_data(PATH_FILTER_DATALAKE, "hash_filter_datalake")
+    # hash filters still used
+    cols_hashs = [col for col in df_hash.columns if "hash_filter" in col]
+    list_hashs = pd.unique(df_hash[cols_hashs].values.ravel())
 
-    # get Telegram data
-    df_telegram = get_telegram_data()
+    return df_terms[df_terms["hash_filter"].isin(list_hashs)].reset_index(drop=True)
 
-    # get Twitter data
-    df_twitter = get_twitter_data()
 
-    # group data
-    df = regroup_data(df_telegram, df_twitter)
+@task(name="Stitch filtered data", task_run_name="stitch-filtered-data")
+def stitch_filtered_data(df, list_cols_themes):
+    """
+    Add cols of filtered themes to data, aligned on ID
+    Keep only data filtered by at least one theme
+
+    Args:
+        df: dataframe with data
+        list_cols_themes: list of dataframes with cols of a theme, indexed by ID
 
-    # remove Data not pertinant
-    df = remove_data_not_pertinant(df)
+    Returns:
+        Dataframe with data and cols of all themes
+    """
 
-    df_filtered = pd.DataFrame()
+    # cols of all themes, IDs not filtered by a theme get NaN
+    df_cols = pd.concat(list_cols_themes, axis=1)
 
-    # theme_list = ["railway"]
-    theme_list = ["railway", "arrest"]
-    # theme_list = ["railway", "arrest", "sabotage"]
+    df_filtered = df.set_index("ID").join(df_cols, how="inner")
+    print(f"Data stitched: {df_filtered.shape}")
 
-    for theme in theme_list:
-
-        dict_filter_config = {
-            "railway": {
-                "col_filter": "filter_inc_railway",
-                "col_terms": "found_terms_railway",
-                "col_add_final": "add_final_inc_railway",
-                "col_hash": "hash_filter_railway",
-                "terms_lists": [
-                    (list_words_set_railway, 1),
-                    (list_substr_set_railway, 2),
-                    (list_expression_railways, 3),
-                    (list_word_railways, 3),
-                ],
-            },
-            "arrest": {
-                "col_filter": "filter_inc_arrest",
-                "col_terms": "found_terms_arrest",
-                "col_add_final": "add_final_inc_arrest",
-                "col_hash": "hash_filter_arrest",
-                "terms_lists": [
-                    (list_words_set_arrest, 1),
-                    (list_substr_set_arrest, 2),
-                    (list_expression_arrest, 3),
-                    (list_word_arrest, 3),
-                ],
-            },
-            "sabotage": {
-                "col_filter": "filter_inc_sabotage",
-                "col_terms": "found_terms_sabotage",
-                "col_add_final": "add_final_inc_sabotage",
-                "col_hash": "hash_filter_sabotage",
-                "terms_lists": [
-                    (list_words_set_sabotage, 1),
-                    (list_substr_set_sabotage, 2),
-                    (list_expression_sabotage, 3),
-                    (list_word_sabotage, 3),
-                ],
-            },
-        }
+    return df_filtered.rename_axis("ID").reset_index()
 
-        config_filt = dict_filter_config[theme]
 
-        # generate hash of filter
-        hash_filt = generate_hash_filter(config_filt["terms_lists"])
+def filter_data_themes(
+    df, dict_config, dict_hash, df_hash_old, df_filter_old, df_terms_old, df_index
+):
+    """
+    Filter data with all themes
+
+    Args:
+        df: dataframe with data
+        dict_config: configuration of the filter, by theme
+        dict_hash: hash of the filter, by theme
+        df_hash_old: dataframe with old hash filter
+        df_filter_old: dataframe with old filtered data
+        df_terms_old: dataframe with terms of old filters
+        df_index: dataframe with index of tokens
+
+    Returns:
+        Tuple (data with cols of all themes, old filtered data updated,
+        dictionary with number of data to filter and filtered, by theme)
+    """
+
+    list_cols_themes = []
+    dict_counts = {}
+
+    for theme, config_filt in dict_config.items():
+        hash_filt = dict_hash[theme]
 
         # keep data to filter
-        if config_filt["col_hash"] not in df_hash_filte_old.columns:
+        df_kept = pd.DataFrame()
+        if config_filt["col_hash"] not in df_hash_old.columns:
             df_to_filter = df.copy()
         else:
-            # get data with hash different
-            mask = df_hash_filte_old[config_filt["col_hash"]] != hash_filt
-            df_to_filter = df[
-                df["ID"].isin(df_hash_filte_old[mask]["ID"])
-                | ~df["ID"].isin(df_hash_filte_old["ID"])
-            ]
-            print(f"Data to filter: {df_to_filter.shape}")
-
-            # remove from to_filter, data already filtered
-            df_to_filter = df_to_filter[~df_to_filter["ID"].isin(df_filter_old["ID"])]
-            print(f"Data to filter: {df_to_filter.shape}")
+            # get new data, and data with hash different who can change
+            df_to_filter, df_kept = select_data_to_filter(
+                df,
+                df_hash_old,
+                df_filter_old,
+                df_terms_old,
+                theme,
+                config_filt,
+                hash_filt,
+                df_index,
+            )
 
         print(f"Data to filter: {df_to_filter.shape}")
 
-        if df_to_filter.empty:
+        if df_to_filter.empty and df_kept.empty:
             print("No data to filter")
             continue
 
-        # update artifact
-        upd_data_artifact(f"Data to filter for {theme}", df_to_filter.shape[0])
+        # Apply filters, and add data with old result kept
+        df_theme = pd.concat(
+            [
+                (
+                    apply_filters(df_to_filter, theme, config_filt, hash_filt)
+                    if not df_to_filter.empty
+                    else pd.DataFrame()
+                ),
+                df_kept,
+            ]
+        )
 
-        # Apply filters
-        if df_filtered.empty:
-            df_filtered = apply_filters(df_to_filter, theme, config_filt, hash_filt)
-        else:
-            df_filtered = pd.merge(
-                df_filtered,
-                apply_filters(df_to_filter, theme, config_filt, hash_filt),
-                on=[
-                    "ID",
-                    "date",
-                    "text_original",
-                    "text_translate",
-                    "url",
-                    "filter_theme",
-                ],
-                how="outer",
-            )
+        # update data already filtered, and filtered again
+        df_filter_old = update_refiltered_data(
+            df_filter_old,
+            df_theme[df_theme["ID"].isin(df_to_filter["ID"])],
+            config_filt,
+        )
 
-        # update artifact
-        upd_data_artifact(f"Data filtered for {theme}", df_filtered.shape[0])
+        # keep only cols of theme, by ID
+        list_cols_themes.append(
+            df_theme.set_index("ID")[
+                [
+                    config_filt["col_filter"],
+                    config_filt["col_terms"],
+                    config_filt["col_add_final"],
+                    config_filt["col_hash"],
+                ]
+            ]
+        )
+
+        dict_counts[theme] = (df_to_filter.shape[0], df_theme.shape[0])
+
+    if not list_cols_themes:
+        return pd.DataFrame(), df_filter_old, dict_counts
+
+    # add cols of all themes to data
+    df_filtered = stitch_filtered_data(df, list_cols_themes)
+
+    return df_filtered, df_filter_old, dict_counts
 
-    if df_filtered.empty:
-        print("No data to filter")
-        return
+
+@task(name="Split filtered data", task_run_name="split-filtered-data")
+def split_filtered_data(df_filtered):
+    """
+    Split data in hash of data, and data filtered by at least one theme
+
+    Args:
+        df_filtered: dataframe with data and cols of all themes
+
+    Returns:
+        Tuple (dataframe with hash filter, dataframe with data filtered)
+    """
 
     # get hash data
     cols_hashs = ["ID"] + [col for col in df_filtered.columns if "hash_filter" in col]
     df_hashed = df_filtered[df_filtered[cols_hashs].notna().any(axis=1)][cols_hashs]
-    print(f"Data df_hashed: {df_hashed}")
 
     # remove hash cols
     df_filtered = df_filtered.drop(columns=cols_hashs[1:])
     df_filtered = df_filtered.drop(columns=["filter_theme"])
 
     # get data Filtered, according to filter_inc
-    df_filtered = (
-        df_filtered[
-            df_filtered[
-                [col for col in df_filtered.columns if "filter_inc" in col]
-            ].any(axis=1)
-        ]
-        .sort_values("date")
-        .reset_index(drop=True)
-    )
+    df_filtered = df_filtered[
+        df_filtered[[col for col in df_filtered.columns if "filter_inc" in col]].any(
+            axis=1
+        )
+    ].copy()
 
     # if text_translate is empty, replace by text_original
     df_filtered["text_translate"] = df_filtered["text_translate"].fillna(
         df_filtered["text_original"]
     )
 
+    return df_hashed, df_filtered
+
+
+def filter_data_stream(
+    dict_config,
+    dict_hash,
+    df_hash_old,
+    df_filter_old,
+    df_terms_old,
+    df_exclusion_old,
+    hash_exclusion,
+    size_chunk=SIZE_CHUNK_FILTER,
+):
+    """
+    Filter data chunk by chunk, Telegram and Twitter data are read by row groups
+    Results of each chunk are saved in a stream folder, and read at the end
+    Only one chunk of texts is in memory, index of tokens is not used
+
+    Args:
+        dict_config: configuration of the filter, by theme
+        dict_hash: hash of the filter, by theme
+        df_hash_old: dataframe with old hash filter
+        df_filter_old: dataframe with old filtered data
+        df_terms_old: dataframe with terms of old filters
+        df_exclusion_old: dataframe with exclusion rule of data already checked
+        hash_exclusion: hash of exclusion rules
+        size_chunk: minimum number of rows by chunk
+
+    Returns:
+        Tuple (dataframe with hash filter, dataframe with data filtered,
+        old filtered data updated, dataframe with exclusion rule of data)
+    """
+
+    path_stream = os.path.join(PATH_FILTER_DATALAKE, "stream")
+    shutil.rmtree(path_stream, ignore_errors=True)
+
+    # cols of data, same as Telegram and Twitter data regrouped
+    cols_data = [
+        col
+        for col in dict.fromkeys(
+            read_data_columns(PATH_TELEGRAM_TRANSFORM, "transform_telegram")
+            + read_data_columns(PATH_TWITTER_CLEAN, "twitter")
+        )
+        if col not in ["account", "id_message"]
+    ]
+
+    dict_counts = {}
+    chunks = itertools.chain(
+        read_data_chunks(PATH_TELEGRAM_TRANSFORM, "transform_telegram", size_chunk),
+        read_data_chunks(PATH_TWITTER_CLEAN, "twitter", size_chunk),
+    )
+
+    for nb_chunk, df_chunk in enumerate(chunks):
+        print(f"Chunk {nb_chunk}: {df_chunk.shape}")
+
+        # group data, and remove Data not pertinant
+        df_chunk = regroup_data(df_chunk, pd.DataFrame()).reindex(columns=cols_data)
+        df_chunk, df_exclusion = apply_exclusion_rules(
+            df_chunk, df_exclusion_old, list_rules_exclusion, hash_exclusion
+        )
+        save_data(path_stream, f"exclusion_{nb_chunk:05d}", df=df_exclusion)
+
+        if df_chunk.empty:
+            continue
+
+        df_chunk, df_filter_old, dict_counts_chunk = filter_data_themes(
+            df_chunk,
+            dict_config,
+            dict_hash,
+            df_hash_old,
+            df_filter_old,
+            df_terms_old,
+            pd.DataFrame(),
+        )
+
+        for theme, counts in dict_counts_chunk.items():
+            dict_counts[theme] = tuple(
+                x + y for x, y in zip(dict_counts.get(theme, (0, 0)), counts)
+            )
+
+        if df_chunk.empty:
+            continue
+
+        # save results of chunk
+        df_hashed, df_chunk = split_filtered_data(df_chunk)
+        save_data(path_stream, f"hash_{nb_chunk:05d}", df=df_hashed)
+        save_data(path_stream, f"filter_{nb_chunk:05d}", df=df_chunk)
+
+    for theme, (nb_to_filter, nb_filtered) in dict_counts.items():
+        upd_data_artifact(f"Data to filter for {theme}", nb_to_filter)
+        upd_data_artifact(f"Data filtered for {theme}", nb_filtered)
+
+    # read results of all chunks, by type
+    dict_results = {"hash": [], "filter": [], "exclusion": []}
+    if os.path.exists(path_stream):
+        for file_name in sorted(os.listdir(path_stream)):
+            dict_results[file_name.split("_")[0]].append(
+                read_data(path_stream, file_name.removesuffix(".parquet"), cache=False)
+            )
+        shutil.rmtree(path_stream)
+
+    df_hashed, df_filtered, df_exclusion = [
+        pd.concat(list_dfs) if list_dfs else pd.DataFrame()
+        for list_dfs in dict_results.values()
+    ]
+
+    return df_hashed, df_filtered, df_filter_old, df_exclusion
+
+
+@flow(
+    name="DLK Flow Filter",
+    flow_run_name="dlk-flow-filter",
+    log_prints=True,
+)
+def flow_datalake_filter(streaming: bool = FILTER_STREAMING):
+    """
+    Process filter
+
+    Args:
+        streaming: filter data chunk by chunk, with memory bounded
+    """
+
+    # get Filter data
+    df_filter_old = read_data(PATH_FILTER_DATALAKE, "filter_datalake")
+
+    # data saved, to append only new filtered data
+    df_filter_saved = df_filter_old
+
+    # get Hash Filter
+    df_hash_filte_old = read_data(PATH_FILTER_DATALAKE, "hash_filter_datalake")
+
+    # get Terms of Hash Filter
+    df_terms_old = read_data(PATH_FILTER_DATALAKE, "terms_filter_datalake")
+
+    # get Exclusion rule of data
+    df_exclusion_old = read_data(PATH_FILTER_DATALAKE, "exclusion_datalake")
+    hash_exclusion = generate_hash_exclusion(list_rules_exclusion)
+
+    # theme_list = ["railway"]
+    theme_list = ["railway", "arrest"]
+    # theme_list = ["railway", "arrest", "sabotage"]
+
+    dict_config = {theme: DICT_FILTER_CONFIG[theme] for theme in theme_list}
+
+    # generate hash of filters
+    dict_hash = {
+        theme: generate_hash_filter(config_filt["terms_lists"])
+        for theme, config_filt in dict_config.items()
+    }
+
+    # terms of filters
+    list_terms_filter = [
+        generate_terms_filter(theme, dict_hash[theme], config_filt["terms_lists"])
+        for theme, config_filt in dict_config.items()
+    ]
+
+    if streaming:
+        df_hashed, df_filtered, df_filter_old, df_exclusion = filter_data_stream(
+            dict_config,
+            dict_hash,
+            df_hash_filte_old,
+            df_filter_old,
+            df_terms_old,
+            df_exclusion_old,
+            hash_exclusion,
+        )
+    else:
+        # get Index of tokens
+        df_index = read_data(PATH_FILTER_DATALAKE, "index_tokens")
+
+        # get Telegram data
+        df_telegram = get_telegram_data()
+
+        # get Twitter data
+        df_twitter = get_twitter_data()
+
+        # group data
+        df = regroup_data(df_telegram, df_twitter)
+
+        # remove Data not pertinant
+        df, df_exclusion = apply_exclusion_rules(
+            df, df_exclusion_old, list_rules_exclusion, hash_exclusion
+        )
+
+        df_filtered, df_filter_old, dict_counts = filter_data_themes(
+            df,
+            dict_config,
+            dict_hash,
+            df_hash_filte_old,
+            df_filter_old,
+            df_terms_old,
+            df_index,
+        )
+
+        # update artifact
+        for theme, (nb_to_filter, nb_filtered) in dict_counts.items():
+            upd_data_artifact(f"Data to filter for {theme}", nb_to_filter)
+            upd_data_artifact(f"Data filtered for {theme}", nb_filtered)
+
+        df_hashed = pd.DataFrame()
+        if not df_filtered.empty:
+            df_hashed, df_filtered = split_filtered_data(df_filtered)
+
+    # save exclusion rule of data checked
+    if not df_exclusion.empty:
+        upd_data_artifact(
+            "Data not pertinant", int(df_exclusion["exclusion_rule"].notna().sum())
+        )
+        df_exclusion_final = upsert_data(
+            df_exclusion_old, df_exclusion, cols=["ID"]
+        )
+        save_data(PATH_FILTER_DATALAKE, "exclusion_datalake", df=df_exclusion_final)
+
+    if df_hashed.empty:
+        print("No data to filter")
+        return
+
+    print(f"Data df_hashed: {df_hashed}")
+
+    df_filtered = df_filtered.sort_values("date").reset_index(drop=True)
+
     # update hash filter
     df_hash_final = update_final_data(df_hashed, df_hash_filte_old, "hash")
     df_filter_final = update_final_data(df_filtered, df_filter_old, "filter")
@@ -456,9 +1117,20 @@ def flow_datalake_filter():
     print(f"Data Hash: {df_hash_final}")
     save_data(PATH_FILTER_DATALAKE, "hash_filter_datalake", df=df_hash_final)
 
+    # save terms of hash filters still used
+    df_terms_final = update_terms_filter(
+        df_terms_old, pd.concat(list_terms_filter), df_hash_final
+    )
+    save_data(PATH_FILTER_DATALAKE, "terms_filter_datalake", df=df_terms_final)
+
     # save data
     print(f"Data Final: {df_filter_final}")
-    save_data(PATH_FILTER_DATALAKE, "filter_datalake", df=df_filter_final)
+    save_data(
+        PATH_FILTER_DATALAKE,
+        "filter_datalake",
+        df=df_filter_final,
+        df_old=df_filter_saved,
+    )
 
     # create artifact
     create_artifact("dlk-flow-filter-artifact")
@@ -0,0 +1,91 @@
+import re
+import json
+import hashlib
+
+
+def generate_hash_exclusion(rules):
+    """
+    Generate fingerprint of exclusion rules
+
+    Args:
+        rules: list of exclusion rules
+
+    Returns:
+        String with hash of rules
+    """
+
+    long_text = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+
+    return hashlib.md5(long_text.encode()).hexdigest()
+
+
+def compile_exclusion_rules(rules):
+    """
+    Compile exclusion rules, terms of a rule are regrouped in one regex
+
+    Args:
+        rules: list of exclusion rules
+
+    Returns:
+        List of (name, prefixes of ID of accounts or None, regex or None)
+    """
+
+    compiled = []
+
+    for rule in rules:
+        flags = re.IGNORECASE if rule.get("ignore_case") else 0
+
+        match rule["type"]:
+            case "keyword":
+                regex = re.compile(
+                    "|".join(re.escape(term) for term in rule["terms"]), flags
+                )
+            case "regex":
+                regex = re.compile(
+                    "|".join(f"(?:{term})" for term in rule["terms"]), flags
+                )
+            case "account":
+                regex = None
+            case _:
+                raise ValueError(f"Unknown type of exclusion rule: {rule['type']}")
+
+        # ID of data is {account}_{id}
+        prefixes = (
+            tuple(f"{account}_" for account in rule["accounts"])
+            if rule.get("accounts")
+            else None
+        )
+
+        if regex is None and prefixes is None:
+            raise ValueError(f"Rule {rule['name']} has no accounts")
+
+        compiled.append((rule["name"], prefixes, regex))
+
+    return compiled
+
+
+def find_exclusion_rule(compiled, id_data, text):
+    """
+    Find the first exclusion rule who match data
+
+    Args:
+        compiled: compiled exclusion rules
+        id_data: ID of data
+        text: text of data
+
+    Returns:
+        Name of the rule, None if data is not excluded
+    """
+
+    for name, prefixes, regex in compiled:
+        if prefixes is not None and not id_data.startswith(prefixes):
+            continue
+
+        if regex is None:
+            return name
+
+        # data without text can't be excluded by terms
+        if isinstance(text, str) and regex.search(text):
+            return name
+
+    return None
@@ -0,0 +1,248 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+
+# regex to split a text in words (same definition of word as \b)
+REGEX_TOKENS = re.compile(r"\w+")
+
+# compiled matchers, by hash filter
+_MATCHERS = {}
+
+
+def compile_terms_matcher(terms_lists):
+    """
+    Compile the terms lists of a theme in a single matcher
+    Each distinct term is compiled once and gets an id,
+    the terms lists keep only the ids of their terms
+
+    Args:
+        terms_lists: list of (list of terms, id_filter)
+
+    Returns:
+        Dictionary with compiled matcher
+    """
+
+    matcher = {
+        "lists": [],  # (id_filter, [(ids terms, terms)])
+        "nb_terms": 0,
+        "token_words": {},  # complete word -> ids (id_filter 1)
+        "regex_words": [],  # (id, regex) for words with special chars
+        "substrs": [],  # (id, substring) (id_filter 2)
+        "token_exprs": {},  # word in lower case -> ids (id_filter 3)
+        "regex_exprs": [],  # (id, found by word, words, regex) (id_filter 3)
+    }
+    dict_ids = {}
+
+    def add_term(kind, term):
+        # a term is compiled only once for all lists
+        if (kind, term) in dict_ids:
+            return dict_ids[(kind, term)]
+
+        id_term = matcher["nb_terms"]
+        matcher["nb_terms"] += 1
+        dict_ids[(kind, term)] = id_term
+
+        if kind == "word":
+            # same as re.search(rf"\b{word}\b", text)
+            if re.fullmatch(r"\w+", term):
+                matcher["token_words"].setdefault(term, []).append(id_term)
+            else:
+                matcher["regex_words"].append((id_term, re.compile(rf"\b{term}\b")))
+        elif kind == "substr":
+            matcher["substrs"].append((id_term, term))
+        elif kind == "expr":
+            # same as re.search(rf"\b{re.escape(term)}\b", text, re.IGNORECASE)
+            regex = re.compile(rf"\b{re.escape(term)}\b", re.IGNORECASE)
+            by_token = term.isascii() and bool(re.fullmatch(r"\w+", term))
+            if by_token:
+                matcher["token_exprs"].setdefault(term.lower(), []).append(id_term)
+
+            # words of the expression, None if they can't be used to pre-filter
+            words = set(REGEX_TOKENS.findall(term.lower())) if term.isascii() else None
+            matcher["regex_exprs"].append((id_term, by_token, words, regex))
+
+        return id_term
+
+    for list_terms, id_filter in terms_lists:
+        match id_filter:
+            case 1 | 2:
+                kind = "word" if id_filter == 1 else "substr"
+                sets = [
+                    (tuple(add_term(kind, word) for word in word_set), word_set)
+                    for word_set in list_terms
+                ]
+            case 3:
+                sets = [(add_term("expr", term), term) for term in list_terms]
+            case _:
+                sets = []
+
+        matcher["lists"].append((id_filter, sets))
+
+    return matcher
+
+
+def get_terms_matcher(terms_lists, hash_filt):
+    """
+    Get compiled matcher of terms lists, compiled only once by hash filter
+
+    Args:
+        terms_lists: list of (list of terms, id_filter)
+        hash_filt: hash of the filter
+
+    Returns:
+        Dictionary with compiled matcher
+    """
+
+    if hash_filt not in _MATCHERS:
+        _MATCHERS[hash_filt] = compile_terms_matcher(terms_lists)
+
+    return _MATCHERS[hash_filt]
+
+
+def find_ids_terms(matcher, text):
+    """
+    Find ids of all terms of the matcher in text, in one scan of words
+
+    Args:
+        matcher: compiled matcher
+        text: text
+
+    Returns:
+        Set with ids of terms found
+    """
+
+    found_ids = set()
+
+    # split text in words only once
+    tokens = set(REGEX_TOKENS.findall(text))
+
+    # complete words (id_filter 1)
+    for token in tokens & matcher["token_words"].keys():
+        found_ids.update(matcher["token_words"][token])
+
+    for id_term, regex in matcher["regex_words"]:
+        if regex.search(text):
+            found_ids.add(id_term)
+
+    # substrings (id_filter 2)
+    for id_term, substr in matcher["substrs"]:
+        if substr in text:
+            found_ids.add(id_term)
+
+    # expressions (id_filter 3), ignore case
+    if text.isascii():
+        # in ascii, ignore case is the same as lower case
+        tokens_lower = {token.lower() for token in tokens}
+
+        for token in tokens_lower & matcher["token_exprs"].keys():
+            found_ids.update(matcher["token_exprs"][token])
+
+        for id_term, by_token, words, regex in matcher["regex_exprs"]:
+            if by_token:
+                continue
+
+            # all words of expression must be in text before search it
+            if words is not None and not words <= tokens_lower:
+                continue
+
+            if regex.search(text):
+                found_ids.add(id_term)
+    else:
+        for id_term, _, _, regex in matcher["regex_exprs"]:
+            if regex.search(text):
+                found_ids.add(id_term)
+
+    return found_ids
+
+
+def match_terms_lists(matcher, text):
+    """
+    Apply all terms lists of the matcher on text
+    Give same result as find_terms_in_text applied list after list,
+    the first list who match is kept
+
+    Args:
+        matcher: compiled matcher
+        text: text
+
+    Returns:
+        Tuple (True if terms in text, found terms)
+    """
+
+    found_ids = find_ids_terms(matcher, text)
+
+    # no lists, text not filtered
+    result = (False, "")
+
+    for id_filter, sets in matcher["lists"]:
+        match id_filter:
+            case 1 | 2:
+                # find if all words in word_set are in text
+                for ids_terms, word_set in sets:
+                    if all(id_term in found_ids for id_term in ids_terms):
+                        return True, ",".join(word_set)
+                result = (False, None)
+            case 3:
+                # find if any term is in text
+                found_terms = [term for id_term, term in sets if id_term in found_ids]
+                if found_terms:
+                    return True, ",".join(found_terms)
+                result = (False, "")
+            case _:
+                result = (False, None)
+
+    return result
+
+
+def match_terms_shard(texts, terms_lists, hash_filt):
+    """
+    Apply all terms lists on a shard of texts
+    Run in a worker process, the matcher is compiled once by process
+
+    Args:
+        texts: list of texts
+        terms_lists: list of (list of terms, id_filter)
+        hash_filt: hash of the filter
+
+    Returns:
+        List of tuples (True if terms in text, found terms)
+    """
+
+    matcher = get_terms_matcher(terms_lists, hash_filt)
+
+    return [match_terms_lists(matcher, text) for text in texts]
+
+
+def match_terms_parallel(texts, terms_lists, hash_filt, nb_workers=None):
+    """
+    Apply all terms lists on texts with multiple processes
+    Texts are split in shards who keep their order,
+    results are stitched back in the same order
+
+    Args:
+        texts: list of texts
+        terms_lists: list of (list of terms, id_filter)
+        hash_filt: hash of the filter
+        nb_workers: number of processes (None = number of cores)
+
+    Returns:
+        List of tuples (True if terms in text, found terms)
+    """
+
+    nb_workers = nb_workers or os.cpu_count() or 1
+
+    # few shards by worker, to balance texts of different length
+    nb_shards = min(len(texts), nb_workers * 4) or 1
+    size_shard = -(-len(texts) // nb_shards)
+    shards = [texts[i : i + size_shard] for i in range(0, len(texts), size_shard)]
+
+    with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+        results = executor.map(
+            match_terms_shard,
+            shards,
+            [terms_lists] * len(shards),
+            [hash_filt] * len(shards),
+        )
+
+        return [result for shard in results for result in shard]
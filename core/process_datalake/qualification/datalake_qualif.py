@@ -2,13 +2,13 @@ import os
 import re
 import pandas as pd
 from tqdm import tqdm
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 
 # Functions
 from core.libs.utils import (
     get_regions_geojson,
-    concat_old_new_df,
+    upsert_data,
     read_data,
     save_data,
     upd_data_artifact,
@@ -454,8 +454,8 @@ def process_qualification(theme, df_filt):
     #     col_add_final = "add_final_inc_sabotage"
     #     col_filter = "filter_inc_sabotage"
 
-    # get data already Qualif
-    df_qualif = read_data(PATH_QUALIF_DATALAKE, file_name)
+    # get data already Qualif (only IDs, to check data to process)
+    df_qualif = read_data(PATH_QUALIF_DATALAKE, file_name, columns=["ID", "qualif_ia"])
 
     # keep data who not add final and filter
     df_to_class = keep_data_to_qualif(df_filt, col_add_final, col_filter)
@@ -499,6 +499,9 @@ def process_qualification(theme, df_filt):
             drop=True
         )
 
+        # get all data already Qualif
+        df_qualif = read_data(PATH_QUALIF_DATALAKE, file_name)
+
     """
     Qualif without IA
     """
@@ -521,8 +524,8 @@ def process_qualification(theme, df_filt):
         df_to_class = add_cols_with_schema(df_to_class, schema)
 
         # concat old data
-        df_to_class = concat_old_new_df(
-            df_raw=df_qualif, df_new=df_to_class, cols=["ID", "IDX"]
+        df_to_class = upsert_data(
+            df_old=df_qualif, df_new=df_to_class, cols=["ID", "IDX"]
         )
 
     """
@@ -1,6 +1,5 @@
-import datetime
 import pandas as pd
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Variables
 from core.config.paths import (
@@ -15,50 +14,19 @@ from core.config.variables import (
 from core.libs.utils import (
     read_data,
     save_data,
-    keep_data_to_process,
-    concat_old_new_df,
-    format_clean_text,
+    keep_data_not_processed,
     upd_data_artifact,
     create_artifact,
 )
+from core.libs.text_cleaner import clean_text_series
 
 
-@task(name="Update UTC date", task_run_name="update-utc-date")
-def update_utc_date(df):
+@task(name="Clean messages", task_run_name="clean-messages")
+def clean_messages(df):
     """
-    Format date according to utc
-
-    Args:
-        df: dataframe
-
-    Returns:
-        Dataframe with formatted date
-    """
-
-    # create col UTC
-    df["utc_offset"] = df["account"].map(DICT_UTC)
-
-    # convert to timedelta
-    df["utc_offset"] = pd.to_timedelta(df["utc_offset"], unit="h")
-
-    # add utc to date
-    df["date"] = df["date"] + df["utc_offset"]
-
-    # format date
-    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d %H:%M:%S").dt.tz_localize(
-        None
-    )
-
-    # drop col utc
-    df = df.drop(columns=["utc_offset"])
-
-    return df
-
-
-@task(name="Clean text original", task_run_name="clean-text-original")
-def clean_text_original(df):
-    """
-    Clean data
+    Clean messages in one pass: texts cleaned (on multiple cores for large
+    data), messages without text removed, then dates of messages kept
+    formatted according to UTC offset of account
 
     Args:
         df: dataframe
@@ -67,16 +35,22 @@ def clean_text_original(df):
         Dataframe with cleaned data
     """
 
-    # keep only text_original not None
-    df = df.dropna(subset=["text_original"])
-
-    # format text
-    df.loc[:, "text_original"] = df["text_original"].apply(format_clean_text)
+    # format text, None if empty
+    texts = clean_text_series(df["text_original"])
 
     # remove text None
-    df = df.dropna(subset=["text_original"])
+    mask = texts.notna()
+    df = df[mask]
 
-    return df
+    # add utc of account to date (account can be a category)
+    utc_offset = pd.to_timedelta(
+        df["account"].astype(object).map(DICT_UTC), unit="h"
+    )
+
+    return df.assign(
+        text_original=texts[mask],
+        date=(df["date"] + utc_offset).dt.tz_localize(None),
+    )
 
 
 @flow(
@@ -92,17 +66,11 @@ def flow_telegram_cleaning():
     # data extracted
     df_raw = read_data(PATH_TELEGRAM_RAW, "raw_telegram")
 
-    # data already cleaned
-    df_clean = read_data(PATH_TELEGRAM_CLEAN, "clean_telegram")
-
-    # keep data not in clean data
-    df = keep_data_to_process(df_raw, df_clean)
+    # keep data not in clean data (with processed IDs of clean data)
+    df = keep_data_not_processed(df_raw, PATH_TELEGRAM_CLEAN, "clean_telegram")
 
-    # format date
-    df = update_utc_date(df)
-
-    # clean data
-    df = clean_text_original(df)
+    # clean data and format date
+    df = clean_messages(df)
 
     # update artifact
     for account in df["account"].unique():
@@ -110,11 +78,8 @@ def flow_telegram_cleaning():
             f"Messages cleaned from {account}", df[df["account"] == account].shape[0]
         )
 
-    # concat data
-    df = concat_old_new_df(df_raw=df_clean, df_new=df, cols=["ID"])
-
-    # save data
-    save_data(PATH_TELEGRAM_CLEAN, "clean_telegram", df, ["account"])
+    # save new data
+    save_data(PATH_TELEGRAM_CLEAN, "clean_telegram", df, ["account"], append=True)
 
     # create artifact
     create_artifact("dlk-flow-telegram-clean-artifact")
@@ -1,21 +1,104 @@
+import asyncio
 import datetime
+import functools
+from typing import Callable
 import pandas as pd
-from prefect import flow, task
+from telethon.errors import FloodWaitError
+from core.libs.perf_metrics import flow, task
 from prefect.cache_policies import NONE
 
 # Variables
 from core.config.paths import PATH_TELEGRAM_RAW
-from core.config.variables import LIST_ACCOUNTS_TELEGRAM
+from core.config.variables import (
+    LIST_ACCOUNTS_TELEGRAM,
+    NB_CONCURRENT_TELEGRAM,
+    MAX_RETRIES_FLOOD_WAIT,
+    SIZE_BATCH_TELEGRAM,
+)
 
 # Functions
 from core.libs.telegram_api import telegram_connect
 from core.libs.utils import (
     read_data,
     save_data,
-    concat_old_new_df,
     upd_data_artifact,
     create_artifact,
 )
+from core.libs.extract_cursors import build_cursors, save_cursors, load_cursors
+
+
+async def iter_messages_backoff(
+    client: object,
+    account: str,
+    last_date: datetime,
+    last_id: int,
+    semaphore: asyncio.Semaphore,
+):
+    """
+    Iterate messages of account, after last date or id
+    On FloodWait, time asked by Telegram is waited (semaphore released for other
+    accounts), then messages are iterated again after last message received
+
+    Args:
+        client: TelegramClient connected
+        account: account name
+        last_date: last date of message
+        last_id: last id of message
+        semaphore: semaphore bounding accounts iterated concurrently
+
+    Yields:
+        Messages of account
+    """
+
+    nb_retries = 0
+    while True:
+        try:
+            async with semaphore:
+                async for message in client.iter_messages(
+                    account,
+                    offset_date=last_date,
+                    offset_id=last_id,
+                    reverse=True,
+                ):
+                    last_date, last_id = None, message.id
+                    yield message
+            return
+        except FloodWaitError as e:
+            nb_retries += 1
+            if nb_retries > MAX_RETRIES_FLOOD_WAIT:
+                raise
+
+            print(
+                f"FloodWait on {account}: waiting {e.seconds}s "
+                f"({nb_retries}/{MAX_RETRIES_FLOOD_WAIT})"
+            )
+            await asyncio.sleep(e.seconds + 1)
+
+
+def save_messages(
+    account: str, data: list, last_id: int, cursors: dict, base_path: str
+) -> None:
+    """
+    Save a batch of messages of account to raw data, then cursor of account
+    (cursor is last message iterated, also without text)
+
+    Args:
+        account: account name
+        data: list of messages
+        last_id: last id of message iterated
+        cursors: dict {account: last id_message}, updated
+        base_path: base path of raw data
+
+    Returns:
+        None
+    """
+
+    if data:
+        df = pd.DataFrame(data).drop_duplicates(subset=["ID"], keep="last")
+        save_data(base_path, "raw_telegram", df, ["account"], append=True)
+
+    cursors[account] = int(last_id)
+    save_cursors(f"{base_path}/raw_telegram.parquet", cursors)
 
 
 @task(
@@ -24,29 +107,38 @@ from core.libs.utils import (
     cache_policy=NONE,
 )
 async def collect_messages(
-    client: object, account: str, last_date: datetime, last_id: int
-) -> pd.DataFrame:
+    client: object,
+    account: str,
+    last_date: datetime,
+    last_id: int,
+    semaphore: asyncio.Semaphore,
+    save_batch: Callable,
+) -> int:
     """
-    Collect messages from account
+    Collect messages from account, saved by batches of SIZE_BATCH_TELEGRAM
+    messages: memory stays bounded, and messages saved are not collected again
 
     Args:
-        client: TelegramClient
+        client: TelegramClient connected
         account: account name
         last_date: last date of message
         last_id: last id of message
+        semaphore: semaphore bounding accounts collected concurrently
+        save_batch: function saving a batch of messages (account, data, last id)
 
     Returns:
-        df: dataframe with new messages
+        Number of new messages
     """
     # init variables
     data = []
+    nb_messages = 0
+    last_id_saved = last_id
 
-    async for message in client.iter_messages(
-        account,
-        offset_date=last_date,
-        offset_id=last_id,
-        reverse=True,
+    async for message in iter_messages_backoff(
+        client, account, last_date, last_id, semaphore
     ):
+        last_id = message.id
+
         # add to data
         if message.text != "":
             data.append(
@@ -59,73 +151,116 @@ async def collect_messages(
                 }
             )
 
-    return pd.DataFrame(data)
+        # save batch
+        if len(data) >= SIZE_BATCH_TELEGRAM:
+            save_batch(account, data, last_id)
+            nb_messages += len(data)
+            data = []
+            last_id_saved = last_id
+
+    # save last messages
+    if last_id != last_id_saved:
+        save_batch(account, data, last_id)
+        nb_messages += len(data)
+
+    print(f"Messages extracted from {account}: {nb_messages}")
+
+    return nb_messages
+
+
+async def collect_accounts_messages(
+    client: object, dict_last: dict, cursors: dict, base_path: str
+) -> dict:
+    """
+    Collect messages from all accounts concurrently, on one client session
+    At most NB_CONCURRENT_TELEGRAM accounts are collected at the same time
+
+    Args:
+        client: TelegramClient connected
+        dict_last: dict {account: (last date, last id)}
+        cursors: dict {account: last id_message}, updated by batches saved
+        base_path: base path of raw data
+
+    Returns:
+        Dict {account: number of new messages, or exception raised}
+    """
+
+    semaphore = asyncio.Semaphore(NB_CONCURRENT_TELEGRAM)
+
+    # batches of all accounts update same cursors (not copied as parameter of task)
+    save_batch = functools.partial(
+        save_messages, cursors=cursors, base_path=base_path
+    )
+
+    list_results = await asyncio.gather(
+        *[
+            collect_messages(
+                client, account, last_date, last_id, semaphore, save_batch
+            )
+            for account, (last_date, last_id) in dict_last.items()
+        ],
+        return_exceptions=True,
+    )
+
+    return dict(zip(dict_last, list_results))
 
 
 @task(
-    name="Get last date or id",
-    task_run_name="get-last-date-or-id",
+    name="Get extraction cursors",
+    task_run_name="get-extraction-cursors",
 )
-def get_last_date_or_id(df_raw_acc: pd.DataFrame) -> tuple:
+def get_cursors(base_path: str) -> dict:
     """
-    Get last date or id
+    Get cursors of extraction: last id_message extracted by account
+    Cursors are rebuilt from raw data, if not saved or stale
 
     Args:
-        df_raw_acc: dataframe with data already extracted from account
+        base_path: base path of raw data
 
     Returns:
-        last_date: last date
-        last_id: last id
+        Dict {account: last id_message}
     """
 
-    if df_raw_acc.empty:
-        last_date = datetime.datetime(2021, 12, 31, 22, 59, 59)
-        last_id = 0
-    else:
-        last_date = None
-        last_id = df_raw_acc["id_message"].max()
+    path = f"{base_path}/raw_telegram.parquet"
 
-    print("last_id:", last_id)
-    print("last_date:", last_date)
+    cursors = load_cursors(path)
+    if cursors is None:
+        df_raw = read_data(base_path, "raw_telegram", columns=["account", "id_message"])
+        cursors = build_cursors(df_raw)
+        save_cursors(path, cursors)
+        print(f"Cursors rebuilt from {df_raw.shape[0]} messages")
 
-    return last_date, last_id
+    return cursors
 
 
-@flow(
-    name="DLK Subflow Telegram Extract",
-    flow_run_name="dlk-subflow-telegram-extract-{account}",
-    log_prints=True,
+@task(
+    name="Get last date or id",
+    task_run_name="get-last-date-or-id",
 )
-def process_extract(
-    client: object, account: str, df_raw_acc: pd.DataFrame
-) -> pd.DataFrame:
+def get_last_date_or_id(cursors: dict, account: str) -> tuple:
     """
-    Process extract
+    Get last date or id
 
     Args:
-        client: TelegramClient
+        cursors: dict {account: last id_message}
         account: account name
-        df_raw_acc: data already extracted from account
 
     Returns:
-        df: dataframe with old and new messages
+        last_date: last date
+        last_id: last id
     """
-    print("Account old data shape:", df_raw_acc.shape)
-
-    # get last date or id
-    last_date, last_id = get_last_date_or_id(df_raw_acc)
 
-    # get messages
-    with client:
-        df = client.loop.run_until_complete(
-            collect_messages(client, account, last_date, last_id)
-        )
+    if account not in cursors:
+        last_date = datetime.datetime(2021, 12, 31, 22, 59, 59)
+        last_id = 0
+    else:
+        last_date = None
+        last_id = cursors[account]
 
-    # update data artifact
-    print(f"Messages extracted from {account}: {df.shape[0]}")
-    upd_data_artifact(f"Messages extracted from {account}", df.shape[0])
+    print(f"{account} last_id:", last_id)
+    print(f"{account} last_date:", last_date)
 
-    return df
+    return last_date, last_id
 
 
 @flow(
@@ -137,6 +272,7 @@ def process_extract(
 def flow_telegram_extract():
     """
     Extract messages from Telegram
+    Messages are saved by batches, a run stopped is resumed from cursors
     """
     # Connect to Telegram
     client = telegram_connect()
@@ -144,33 +280,37 @@ def flow_telegram_extract():
     # get list of accounts
     list_accounts = LIST_ACCOUNTS_TELEGRAM
 
-    # get raw Data already extracted
-    df_raw = read_data(PATH_TELEGRAM_RAW, "raw_telegram")
-
-    # Init dfs
-    df_new_data = pd.DataFrame()  # new data to extract
-    df_raw_acc = pd.DataFrame()  # data already extracted for account
+    # last id_message extracted by account
+    cursors = get_cursors(PATH_TELEGRAM_RAW)
+    dict_last = {
+        account: get_last_date_or_id(cursors, account) for account in list_accounts
+    }
 
-    # Collect message from all accounts
-    for account in list_accounts:
-        print(f"Extracting {account}")
+    # Collect messages from all accounts, on one connection
+    with client:
+        dict_results = client.loop.run_until_complete(
+            collect_accounts_messages(client, dict_last, cursors, PATH_TELEGRAM_RAW)
+        )
 
-        if df_raw.shape[0] > 0 and account in df_raw["account"].unique():
-            df_raw_acc = df_raw[df_raw["account"] == account]
-        else:
-            df_raw_acc = pd.DataFrame()
+    # update data artifact
+    list_failed = []
+    for account, result in dict_results.items():
+        if isinstance(result, BaseException):
+            print(f"Extraction failed for {account}: {result!r}")
+            upd_data_artifact(f"Extraction failed for {account}", repr(result))
+            list_failed.append(account)
+            continue
 
-        # extract messages
-        df_new_data = pd.concat(
-            [df_new_data, process_extract(client, account, df_raw_acc)]
-        )
+        upd_data_artifact(f"Messages extracted from {account}", result)
 
-    # concat data
-    df_final = concat_old_new_df(df_raw, df_new_data, cols=["ID"])
-    print("Final shape:", df_final.shape)
+    nb_messages = sum(
+        result for result in dict_results.values() if isinstance(result, int)
+    )
+    print("New messages:", nb_messages)
 
     # create artifact
     create_artifact("dlk-flow-telegram-extract-artifact")
 
-    # save data
-    save_data(PATH_TELEGRAM_RAW, "raw_telegram", df_final, ["account"])
+    # messages of other accounts are saved
+    if list_failed:
+        raise RuntimeError(f"Extraction failed for accounts: {list_failed}")
@@ -2,7 +2,7 @@ import os
 from tqdm import tqdm
 
 import pandas as pd
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Variables
 from core.config.paths import (
@@ -19,8 +19,9 @@ from core.config.variables import (
 from core.libs.utils import (
     read_data,
     save_data,
-    keep_data_to_process,
-    concat_old_new_df,
+    keep_data_not_processed,
+    upsert_data,
+    update_index_tokens,
     upd_data_artifact,
     create_artifact,
 )
@@ -195,8 +196,10 @@ def flow_telegram_transform():
     # remove poorly translated data for translate again
     df_transform = remove_poorly_translated_data(df_old_transf)
 
-    # keep data not transformed
-    df = keep_data_to_process(df_clean, df_old_transf)
+    # keep data not transformed (with processed IDs of data transform)
+    df = keep_data_not_processed(
+        df_clean, PATH_TELEGRAM_TRANSFORM, "transform_telegram"
+    )
 
     if df.empty:
         print("No data to transform")
@@ -224,12 +227,21 @@ def flow_telegram_transform():
     """
     Save data
     """
+    # index tokens of new data
+    update_index_tokens(df_final)
+
     # concat final
-    df_final = concat_old_new_df(df_raw=df_transform, df_new=df_final, cols=["ID"])
+    df_final = upsert_data(df_old=df_transform, df_new=df_final, cols=["ID"])
     print(f"Final data shape: {df_final.shape}")
 
     # save data
-    save_data(PATH_TELEGRAM_TRANSFORM, "transform_telegram", df_final, ["account"])
+    save_data(
+        PATH_TELEGRAM_TRANSFORM,
+        "transform_telegram",
+        df_final,
+        ["account"],
+        df_old=df_old_transf,
+    )
 
     # create artifact
     create_artifact("dlk-flow-telegram-transform-artifact")
@@ -4,10 +4,11 @@
 # - keep data to process
 # - Format date
 # - Format text
+# - Index tokens
 # - Save data
 
 import pandas as pd
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 # Variables
 from core.config.paths import (
@@ -20,11 +21,12 @@ from core.libs.utils import (
     read_data,
     save_data,
     keep_data_to_process,
-    concat_old_new_df,
-    format_clean_text,
+    upsert_data,
+    update_index_tokens,
     upd_data_artifact,
     create_artifact,
 )
+from core.libs.text_cleaner import clean_text_series
 
 
 @task(name="Format date", task_run_name="format-date")
@@ -72,10 +74,13 @@ def flow_twitter_cleaning():
     df = format_date(df)
 
     # format text
-    df["text_original"] = df["text_original"].apply(format_clean_text)
+    df["text_original"] = clean_text_series(df["text_original"])
+
+    # index tokens of new data
+    update_index_tokens(df)
 
     # concat data
-    df = concat_old_new_df(df_clean, df, cols=["ID"])
+    df = upsert_data(df_clean, df, cols=["ID"])
 
     # save data
     save_data(PATH_TWITTER_CLEAN, "twitter", df)
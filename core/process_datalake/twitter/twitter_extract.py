@@ -6,7 +6,7 @@ from typing import List, Dict, Tuple, Any
 from twikit import Client
 from prefect.cache_policies import TASK_SOURCE
 
-from prefect import flow, task
+from core.libs.perf_metrics import flow, task
 
 
 # Variables
@@ -15,7 +15,7 @@ from core.config.paths import PATH_TWITTER_RAW, PATH_CREDS_API
 from core.libs.utils import (
     read_data,
     save_data,
-    concat_old_new_df,
+    upsert_data,
     upd_data_artifact,
     create_artifact,
 )
@@ -299,7 +299,7 @@ def flow_twitter_extract() -> None:
         print(f"Found {df_new.shape[0]} new tweets")
 
         # Merge with existing data, deduplicating by ID
-        df_combined = concat_old_new_df(df_raw, df_new, cols=["ID"])
+        df_combined = upsert_data(df_raw, df_new, cols=["ID"])
         new_count = df_combined.shape[0] - (0 if df_raw.empty else df_raw.shape[0])
 
         # Save the combined data
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+import pandas as pd
+
+pytest.importorskip("pyarrow")
+
+from core.libs import arrow_data
+from core.libs.arrow_data import get_path_feather, read_feather, to_numpy_dtypes
+from core.libs.data_cache import clear_cache
+from core.libs.utils import read_data, save_data
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """Save sample messages partitioned by account, with Feather files"""
+    monkeypatch.setattr(arrow_data, "FORMAT_INTERMEDIATE", "feather")
+    clear_cache()
+
+    df = pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 3}_{i}" for i in range(30)],
+            "account": [f"acc_{i % 3}" for i in range(30)],
+            "id_message": range(30),
+            "text_original": [f"text {i}" if i % 5 else None for i in range(30)],
+        }
+    )
+    save_data.fn(str(tmp_path), "messages", df, ["account"])
+
+    yield str(tmp_path)
+
+    clear_cache()
+
+
+def read_from_parquet(base_path, columns=None, filters=None):
+    """Read messages from parquet only"""
+    os.rename(
+        get_path_feather(f"{base_path}/messages.parquet"), f"{base_path}/saved"
+    )
+    try:
+        return read_data.fn(base_path, "messages", columns, filters, cache=False)
+    finally:
+        os.rename(
+            f"{base_path}/saved", get_path_feather(f"{base_path}/messages.parquet")
+        )
+
+
+class TestFeather:
+    def test_written_as_read(self, base_path):
+        path = f"{base_path}/messages.parquet"
+
+        assert os.path.exists(get_path_feather(path))
+        pd.testing.assert_frame_equal(
+            read_feather(path), read_from_parquet(base_path)
+        )
+
+    def test_columns_and_filters(self, base_path):
+        for filters in [
+            None,
+            [("account", "==", "acc_1")],
+            [[("account", "==", "acc_0")], [("id_message", "<", 3)]],
+        ]:
+            pd.testing.assert_frame_equal(
+                read_data.fn(base_path, "messages", ["ID"], filters, cache=False),
+                read_from_parquet(base_path, ["ID"], filters),
+            )
+
+    def test_pyarrow_backend(self, base_path):
+        df = read_data.fn(base_path, "messages", dtype_backend="pyarrow")
+
+        assert isinstance(df["text_original"].dtype, pd.ArrowDtype)
+        pd.testing.assert_frame_equal(
+            to_numpy_dtypes(df), read_from_parquet(base_path)
+        )
+
+    def test_stale_ignored(self, base_path):
+        path = f"{base_path}/messages.parquet"
+        read_feather(path)
+
+        # data saved by another process
+        read_from_parquet(base_path).head(10).to_parquet(
+            path, engine="fastparquet", partition_cols=["account"]
+        )
+
+        assert read_feather(path) is None
+        assert read_data.fn(base_path, "messages").shape[0] == 10
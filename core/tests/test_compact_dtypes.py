@@ -0,0 +1,102 @@
+import pytest
+import pandas as pd
+from fastparquet import ParquetFile
+
+from core.libs import utils
+from core.libs.data_cache import clear_cache
+from core.libs.compact_dtypes import (
+    compact_dtypes,
+    to_object_dtypes,
+    get_memory_report,
+)
+from core.libs.utils import read_data, save_data
+
+
+def get_filter_data(ids):
+    """Filtered messages, with repeated values of themes"""
+    return pd.DataFrame(
+        {
+            "ID": [f"acc_{i}" for i in ids],
+            "date": pd.to_datetime("2024-01-01") + pd.to_timedelta(list(ids), "D"),
+            "text_original": [f"text {i}" for i in ids],
+            "filter_theme": ["railway" if i % 2 else "air" for i in ids],
+            "nb": list(ids),
+        }
+    )
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """Save filtered messages in a dataset with compact types"""
+    monkeypatch.setattr(utils, "LIST_DATA_COMPACT_DTYPES", ["filter"])
+    clear_cache()
+
+    save_data.fn(str(tmp_path), "filter", get_filter_data(range(10)))
+
+    yield str(tmp_path)
+
+    clear_cache()
+
+
+class TestCompactDtypes:
+    def test_compact_dtypes(self):
+        df = get_filter_data(range(4))
+        df_compact = compact_dtypes(df)
+
+        assert isinstance(df_compact["ID"].dtype, pd.StringDtype)
+        assert isinstance(df_compact["filter_theme"].dtype, pd.CategoricalDtype)
+        assert df_compact["nb"].dtype == "int64"
+        assert df["ID"].dtype == object
+
+        # comparisons and missing values as object
+        df_compact.loc[0, "text_original"] = None
+        assert df_compact["text_original"].isna().tolist() == [
+            True,
+            False,
+            False,
+            False,
+        ]
+        assert (df_compact["ID"] == "acc_1").dtype == bool
+
+        pd.testing.assert_frame_equal(to_object_dtypes(df_compact.iloc[1:]), df.iloc[1:])
+
+    def test_mixed_values_kept(self):
+        df = get_filter_data(range(3))
+        df["ID"] = ["acc_0", 1, 2.5]
+
+        assert compact_dtypes(df)["ID"].dtype == object
+
+    def test_memory_report(self):
+        df = get_filter_data(range(1000))
+        report = get_memory_report(df)
+
+        assert report.columns.tolist() == ["column", "dtype", "memory_mb"]
+        assert report["memory_mb"].is_monotonic_decreasing
+        assert (
+            get_memory_report(compact_dtypes(df))["memory_mb"].sum()
+            < report["memory_mb"].sum()
+        )
+
+
+class TestReadCompact:
+    def test_read_data(self, base_path):
+        df = read_data.fn(base_path, "filter")
+
+        assert isinstance(df["filter_theme"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["ID"].dtype, pd.StringDtype)
+
+        # parquet file keeps object columns
+        dtypes = ParquetFile(f"{base_path}/filter.parquet").dtypes
+        assert dtypes["ID"] == object
+        assert dtypes["filter_theme"] == object
+
+    def test_cache_as_read(self, base_path):
+        read_data.fn(base_path, "filter")
+        save_data.fn(base_path, "filter", get_filter_data(range(10, 15)), append=True)
+        df_cached = read_data.fn(base_path, "filter")
+
+        clear_cache()
+        df = read_data.fn(base_path, "filter")
+
+        assert df.shape[0] == 15
+        pd.testing.assert_frame_equal(df_cached, df)
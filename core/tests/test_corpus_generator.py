@@ -0,0 +1,51 @@
+import pytest
+import pandas as pd
+
+from core.benchmarks.corpus_generator import generate_corpus
+from core.process_datalake.filter.datalake_filter import DICT_FILTER_CONFIG
+from core.process_datalake.filter.terms_matcher import (
+    compile_terms_matcher,
+    match_terms_lists,
+)
+
+
+LIST_TERMS_LISTS = [config["terms_lists"] for config in DICT_FILTER_CONFIG.values()]
+
+
+def rate_matched(df):
+    """Rate of translated messages matched by at least one theme"""
+    matchers = [compile_terms_matcher(terms_lists) for terms_lists in LIST_TERMS_LISTS]
+    texts = df["text_translate"].dropna()
+
+    return texts.map(
+        lambda x: any(match_terms_lists(matcher, x)[0] for matcher in matchers)
+    ).mean()
+
+
+class TestCorpusGenerator:
+    def test_format(self):
+        df = generate_corpus(200, LIST_TERMS_LISTS)
+
+        assert df.columns.tolist() == [
+            "ID",
+            "date",
+            "text_original",
+            "text_translate",
+            "url",
+            "filter_theme",
+        ]
+        assert df["ID"].is_unique
+        assert pd.api.types.is_datetime64_any_dtype(df["date"])
+        assert df["text_original"].str.contains("[а-яі]", regex=True).all()
+
+    def test_same_seed_same_corpus(self):
+        pd.testing.assert_frame_equal(
+            generate_corpus(100, LIST_TERMS_LISTS, seed=1),
+            generate_corpus(100, LIST_TERMS_LISTS, seed=1),
+        )
+
+    @pytest.mark.parametrize("hit_rate", [0.0, 0.3, 1.0])
+    def test_hit_rate(self, hit_rate):
+        df = generate_corpus(500, LIST_TERMS_LISTS, hit_rate=hit_rate)
+
+        assert rate_matched(df) == pytest.approx(hit_rate, abs=0.1)
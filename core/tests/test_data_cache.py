@@ -0,0 +1,125 @@
+import pytest
+import pandas as pd
+
+from core.libs import data_cache
+from core.libs.data_cache import (
+    get_cached_data,
+    cache_data,
+    clear_cache,
+    filter_data,
+)
+from core.libs.utils import read_data, save_data
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    """Save sample messages partitioned by account"""
+    clear_cache()
+
+    df = pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 3}_{i}" for i in range(30)],
+            "account": [f"acc_{i % 3}" for i in range(30)],
+            "id_message": range(30),
+            "text_original": [f"text {i}" for i in range(30)],
+        }
+    )
+    save_data.fn(str(tmp_path), "messages", df, ["account"])
+
+    yield str(tmp_path)
+
+    clear_cache()
+
+
+def read_from_disk(base_path):
+    """Read messages without cache"""
+    return read_data.fn(base_path, "messages", cache=False)
+
+
+class TestDataCache:
+    def test_read_cached(self, base_path):
+        df = read_data.fn(base_path, "messages")
+
+        assert get_cached_data(f"{base_path}/messages.parquet") is not None
+
+        # data returned can be modified, without changing cache
+        df.loc[0, "text_original"] = "modified"
+        pd.testing.assert_frame_equal(
+            read_data.fn(base_path, "messages"), read_from_disk(base_path)
+        )
+
+    def test_columns_and_filters_from_cache(self, base_path):
+        read_data.fn(base_path, "messages")
+
+        for filters in [
+            [("account", "==", "acc_1")],
+            [("account", "in", ["acc_0", "acc_2"]), ("id_message", ">=", 10)],
+            [[("account", "==", "acc_0")], [("id_message", "<", 3)]],
+        ]:
+            pd.testing.assert_frame_equal(
+                read_data.fn(base_path, "messages", ["ID"], filters),
+                read_data.fn(base_path, "messages", ["ID"], filters, cache=False),
+            )
+
+    def test_files_changed(self, base_path):
+        read_data.fn(base_path, "messages")
+
+        # data saved by another process
+        read_from_disk(base_path).head(10).to_parquet(
+            f"{base_path}/messages.parquet",
+            engine="fastparquet",
+            partition_cols=["account"],
+        )
+
+        assert read_data.fn(base_path, "messages").shape[0] == 10
+
+    def test_refreshed_by_save(self, base_path):
+        df_old = read_data.fn(base_path, "messages")
+
+        df_new = pd.DataFrame(
+            {
+                "ID": ["acc_0_30", "acc_3_31"],
+                "account": ["acc_0", "acc_3"],
+                "id_message": [30, 31],
+                "text_original": ["text 30", "text 31"],
+            }
+        )
+
+        # new rows appended
+        df = pd.concat([df_old, df_new], ignore_index=True)
+        save_data.fn(base_path, "messages", df, ["account"], df_old=df_old)
+        pd.testing.assert_frame_equal(
+            get_cached_data(f"{base_path}/messages.parquet"), read_from_disk(base_path)
+        )
+
+        # data rewritten
+        df.loc[0, "text_original"] = "updated"
+        save_data.fn(base_path, "messages", df, ["account"])
+        pd.testing.assert_frame_equal(
+            get_cached_data(f"{base_path}/messages.parquet"), read_from_disk(base_path)
+        )
+
+    def test_least_recently_used_removed(self, base_path, monkeypatch):
+        df = read_from_disk(base_path)
+        size = df.memory_usage(index=True, deep=True).sum() / 2**20
+        monkeypatch.setattr(data_cache, "SIZE_CACHE_DATA", size * 2.5)
+
+        for file_name in ["a", "b", "c"]:
+            save_data.fn(base_path, file_name, df)
+            cache_data(f"{base_path}/{file_name}.parquet", df)
+
+        assert get_cached_data(f"{base_path}/a.parquet") is None
+        assert get_cached_data(f"{base_path}/b.parquet") is not None
+        assert get_cached_data(f"{base_path}/c.parquet") is not None
+
+
+class TestFilterData:
+    def test_filters(self):
+        df = pd.DataFrame({"a": [1, 2, 3, None], "b": ["x", "y", "x", "y"]})
+
+        assert filter_data(df, [("a", ">=", 2)]).index.tolist() == [1, 2]
+        assert filter_data(df, [("a", ">", 1), ("b", "==", "x")]).index.tolist() == [2]
+        assert filter_data(
+            df, [[("a", "==", 1)], [("b", "in", ["y"])]]
+        ).index.tolist() == [0, 1, 3]
+        assert filter_data(df, []).shape[0] == 4
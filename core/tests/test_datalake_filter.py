@@ -0,0 +1,237 @@
+import random
+import pytest
+import pandas as pd
+
+from core.process_datalake.filter.datalake_filter import (
+    find_terms_in_text,
+    apply_filters,
+    generate_hash_filter,
+    generate_terms_filter,
+    get_delta_terms,
+    select_data_to_filter,
+    stitch_filtered_data,
+)
+from core.process_datalake.filter.terms_matcher import (
+    compile_terms_matcher,
+    match_terms_lists,
+    match_terms_parallel,
+)
+
+from core.utils.terms_filter.terms_incidents_railway import (
+    list_words_set_railway,
+    list_substr_set_railway,
+    list_expression_railways,
+    list_word_railways,
+)
+from core.utils.terms_filter.terms_arrest import (
+    list_words_set_arrest,
+    list_substr_set_arrest,
+    list_expression_arrest,
+    list_word_arrest,
+)
+from core.utils.terms_filter.terms_sabotage import (
+    list_words_set_sabotage,
+    list_substr_set_sabotage,
+    list_expression_sabotage,
+    list_word_sabotage,
+)
+
+
+TERMS_LISTS = {
+    "railway": [
+        (list_words_set_railway, 1),
+        (list_substr_set_railway, 2),
+        (list_expression_railways, 3),
+        (list_word_railways, 3),
+    ],
+    "arrest": [
+        (list_words_set_arrest, 1),
+        (list_substr_set_arrest, 2),
+        (list_expression_arrest, 3),
+        (list_word_arrest, 3),
+    ],
+    "sabotage": [
+        (list_words_set_sabotage, 1),
+        (list_substr_set_sabotage, 2),
+        (list_expression_sabotage, 3),
+        (list_word_sabotage, 3),
+    ],
+}
+
+
+def find_terms_lists(terms_lists, text):
+    """Apply find_terms_in_text list after list, as apply_filters did"""
+    result = (False, "")
+    for terms, id_filter in terms_lists:
+        result = find_terms_in_text(terms, text, id_filter)
+        if result[0]:
+            break
+    return result
+
+
+@pytest.fixture
+def texts():
+    """Generate texts with terms of all themes"""
+    rnd = random.Random(42)
+
+    vocab = ["the", "a", "in", "on", "was", "near", "Moscow", "region", "2024"]
+    for terms_lists in TERMS_LISTS.values():
+        for list_terms, _ in terms_lists:
+            for term in list_terms:
+                vocab.extend(term if isinstance(term, tuple) else [term])
+
+    seps = [" ", " ", " ", ", ", ". ", "-", ".", "\n", " «", "» "]
+    texts = [
+        "",
+        "relay boxes",
+        "Article 205.1 of the Criminal Code",
+        "article 205-205.5 and 275.1",
+        "okXru arrest mail.ru",
+        "trains derailment, TRAIN FIRE",
+        "Anti-Putin rally anti-war support",
+        "Ѕabotage on the railway",
+        "SCB blocks destroyed",
+    ]
+    for _ in range(3000):
+        words = rnd.choices(vocab, k=rnd.randint(1, 12))
+        words = [
+            w.upper() if rnd.random() < 0.1 else w.capitalize() if rnd.random() < 0.1 else w
+            for w in words
+        ]
+        texts.append("".join(w + rnd.choice(seps) for w in words))
+
+    return texts
+
+
+class TestTermsMatcher:
+    @pytest.mark.parametrize("theme", ["railway", "arrest", "sabotage"])
+    def test_same_as_find_terms(self, texts, theme):
+        terms_lists = TERMS_LISTS[theme]
+        matcher = compile_terms_matcher(terms_lists)
+
+        for text in texts:
+            assert match_terms_lists(matcher, text) == find_terms_lists(
+                terms_lists, text
+            ), text
+
+    def test_duplicate_expressions(self):
+        terms_lists = [(["arson on railway", "arson on railway"], 3)]
+        matcher = compile_terms_matcher(terms_lists)
+
+        result = match_terms_lists(matcher, "Arson on railway")
+        assert result == (True, "arson on railway,arson on railway")
+
+    def test_no_match(self):
+        matcher = compile_terms_matcher(TERMS_LISTS["railway"])
+        assert match_terms_lists(matcher, "nothing here") == (False, "")
+
+        matcher = compile_terms_matcher([(list_words_set_railway, 1)])
+        assert match_terms_lists(matcher, "nothing here") == (False, None)
+
+    def test_parallel_same_order(self, texts):
+        terms_lists = TERMS_LISTS["railway"]
+        matcher = compile_terms_matcher(terms_lists)
+
+        result = match_terms_parallel(texts, terms_lists, "hash_test", nb_workers=2)
+        assert result == [match_terms_lists(matcher, text) for text in texts]
+
+
+def config_railway(terms_lists):
+    """Config of filter railway with terms lists"""
+    return {
+        "col_filter": "filter_inc_railway",
+        "col_terms": "found_terms_railway",
+        "col_add_final": "add_final_inc_railway",
+        "col_hash": "hash_filter_railway",
+        "terms_lists": terms_lists,
+    }
+
+
+class TestDeltaFilter:
+    def test_delta_terms(self):
+        terms_old = [([("train", "fire")], 1), (["relay box", "relay room"], 3)]
+        terms_new = [([("train", "fire"), ("train", "hit")], 1), (["relay box"], 3)]
+
+        hash_old = generate_hash_filter(terms_old)
+        df_terms_old = generate_terms_filter("railway", hash_old, terms_old)
+
+        added_lists, removed = get_delta_terms(df_terms_old, hash_old, terms_new)
+        assert added_lists == [([("train", "hit")], 1), ([], 3)]
+        assert removed == {"relay room"}
+
+        # lists changed, delta not possible
+        assert get_delta_terms(df_terms_old, hash_old, terms_new[:1]) is None
+        assert get_delta_terms(df_terms_old, "unknown", terms_new) is None
+
+    def test_same_as_full_filter(self, texts):
+        df = pd.DataFrame(
+            {
+                "ID": [f"acc_{i}" for i in range(len(texts))],
+                "date": pd.date_range("2024-01-01", periods=len(texts), freq="h"),
+                "text_original": texts,
+                "text_translate": texts,
+                "url": "",
+                "filter_theme": None,
+            }
+        )
+
+        terms_old = TERMS_LISTS["railway"]
+        terms_new = [
+            (list_words_set_railway + [("station", "region")], 1),
+            (list_substr_set_railway[5:], 2),
+            (list_expression_railways + ["Moscow region"], 3),
+            (list_word_railways[:-1], 3),
+        ]
+        config_old = config_railway(terms_old)
+        config_new = config_railway(terms_new)
+        hash_old = generate_hash_filter(terms_old)
+        hash_new = generate_hash_filter(terms_new)
+
+        # old filter
+        df_old = apply_filters(df.copy(), "railway", config_old, hash_old)
+        df_hash_old = df_old[["ID", "hash_filter_railway"]]
+        df_filter_old = df_old[df_old["filter_inc_railway"]]
+        df_terms_old = generate_terms_filter("railway", hash_old, terms_old)
+
+        # delta filter
+        df_to_filter, df_kept = select_data_to_filter(
+            df, df_hash_old, df_filter_old, df_terms_old, "railway", config_new, hash_new
+        )
+        assert df_to_filter.shape[0] < df.shape[0]
+
+        df_delta = pd.concat(
+            [apply_filters(df_to_filter, "railway", config_new, hash_new), df_kept]
+        )
+
+        # full filter
+        df_full = apply_filters(df.copy(), "railway", config_new, hash_new)
+
+        cols = ["ID", "filter_inc_railway", "found_terms_railway"]
+        df_delta = df_delta[cols].sort_values("ID").reset_index(drop=True)
+        df_full = df_full[cols].sort_values("ID").reset_index(drop=True)
+        pd.testing.assert_frame_equal(df_delta, df_full, check_dtype=False)
+
+
+class TestStitchFilteredData:
+    def test_stitch_themes(self):
+        df = pd.DataFrame(
+            {
+                "ID": ["a", "b", "c"],
+                "date": pd.date_range("2024-01-01", periods=3),
+                "text_original": ["x", "y", "z"],
+            }
+        )
+        df_railway = pd.DataFrame(
+            {"filter_inc_railway": [True, False]}, index=pd.Index(["c", "a"], name="ID")
+        )
+        df_arrest = pd.DataFrame(
+            {"filter_inc_arrest": [True]}, index=pd.Index(["b"], name="ID")
+        )
+
+        df_filtered = stitch_filtered_data(df, [df_railway, df_arrest])
+
+        assert df_filtered["ID"].tolist() == ["a", "b", "c"]
+        assert df_filtered["text_original"].tolist() == ["x", "y", "z"]
+        assert df_filtered["filter_inc_railway"].tolist()[::2] == [False, True]
+        assert pd.isna(df_filtered.loc[1, "filter_inc_railway"])
+        assert df_filtered["filter_inc_arrest"].notna().sum() == 1
@@ -0,0 +1,102 @@
+import pytest
+import pandas as pd
+
+from core.process_datalake.filter.datalake_filter import apply_exclusion_rules
+from core.process_datalake.filter.exclusion_rules import (
+    generate_hash_exclusion,
+    compile_exclusion_rules,
+    find_exclusion_rule,
+)
+
+
+RULES = [
+    {"name": "covid", "type": "keyword", "terms": ["COVID", "covid"]},
+    {"name": "weather", "type": "regex", "terms": [r"\bstorms?\b"], "ignore_case": True},
+    {"name": "ads", "type": "keyword", "terms": ["promo"], "accounts": ["shot_shot"]},
+    {"name": "account", "type": "account", "accounts": ["bazabazon"]},
+]
+
+
+@pytest.fixture
+def df_messages():
+    """Create a sample DataFrame of messages"""
+    return pd.DataFrame(
+        {
+            "ID": ["electrichki_1", "electrichki_2", "shot_shot_3", "astrapress_4"],
+            "text_translate": [
+                "New covid cases in Moscow",
+                "Train derailed after a Storm",
+                "promo code for train tickets",
+                "promo code for train tickets",
+            ],
+        }
+    )
+
+
+class TestExclusionRules:
+    def test_find_rule(self):
+        compiled = compile_exclusion_rules(RULES)
+
+        assert find_exclusion_rule(compiled, "electrichki_1", "COVID-19") == "covid"
+        assert find_exclusion_rule(compiled, "electrichki_1", "Covid") is None
+        assert find_exclusion_rule(compiled, "electrichki_1", "STORMS") == "weather"
+        assert find_exclusion_rule(compiled, "electrichki_1", "brainstorm") is None
+        assert find_exclusion_rule(compiled, "shot_shot_1", "promo") == "ads"
+        assert find_exclusion_rule(compiled, "electrichki_1", "promo") is None
+        assert find_exclusion_rule(compiled, "bazabazon_1", None) == "account"
+        assert find_exclusion_rule(compiled, "electrichki_1", None) is None
+
+    def test_invalid_rule(self):
+        with pytest.raises(ValueError):
+            compile_exclusion_rules([{"name": "x", "type": "unknown", "terms": []}])
+
+        with pytest.raises(ValueError):
+            compile_exclusion_rules([{"name": "x", "type": "account"}])
+
+    def test_hash_rules(self):
+        assert generate_hash_exclusion(RULES) == generate_hash_exclusion(
+            [dict(reversed(rule.items())) for rule in RULES]
+        )
+        assert generate_hash_exclusion(RULES) != generate_hash_exclusion(RULES[:1])
+
+
+class TestApplyExclusionRules:
+    def test_data_excluded(self, df_messages):
+        hash_exclusion = generate_hash_exclusion(RULES)
+
+        df, df_exclusion = apply_exclusion_rules(
+            df_messages, pd.DataFrame(), RULES, hash_exclusion
+        )
+
+        assert df["ID"].tolist() == ["astrapress_4"]
+        assert df_exclusion["exclusion_rule"].tolist() == [
+            "covid",
+            "weather",
+            "ads",
+            None,
+        ]
+        assert (df_exclusion["hash_exclusion"] == hash_exclusion).all()
+
+    def test_known_data_not_searched(self, df_messages):
+        hash_exclusion = generate_hash_exclusion(RULES)
+
+        # result of old run is kept with same rules
+        df_exclusion_old = pd.DataFrame(
+            {
+                "ID": ["astrapress_4", "electrichki_1"],
+                "exclusion_rule": ["old_rule", None],
+                "hash_exclusion": [hash_exclusion, "old_hash"],
+            }
+        )
+
+        df, df_exclusion = apply_exclusion_rules(
+            df_messages, df_exclusion_old, RULES, hash_exclusion
+        )
+
+        assert df.empty
+        assert df_exclusion["exclusion_rule"].tolist() == [
+            "covid",
+            "weather",
+            "ads",
+            "old_rule",
+        ]
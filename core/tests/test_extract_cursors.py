@@ -0,0 +1,47 @@
+import pandas as pd
+
+from core.libs.extract_cursors import (
+    build_cursors,
+    save_cursors,
+    load_cursors,
+    get_path_cursors,
+)
+
+
+def get_messages(ids):
+    """Messages of two accounts, by id_message"""
+    return pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 2}_{i}" for i in ids],
+            "account": [f"acc_{i % 2}" for i in ids],
+            "id_message": list(ids),
+        }
+    )
+
+
+class TestExtractCursors:
+    def test_build_cursors(self):
+        assert build_cursors(get_messages(range(0, 10, 3))) == {"acc_0": 6, "acc_1": 9}
+        assert build_cursors(pd.DataFrame()) == {}
+
+    def test_load_cursors(self, tmp_path):
+        path = str(tmp_path / "raw.parquet")
+        get_messages(range(5)).to_parquet(
+            path, engine="fastparquet", partition_cols=["account"]
+        )
+
+        assert load_cursors(path) is None
+
+        save_cursors(path, {"acc_0": 4, "acc_1": 3})
+        assert get_path_cursors(path) == str(tmp_path / "raw_cursors.json")
+        assert load_cursors(path) == {"acc_0": 4, "acc_1": 3}
+
+    def test_stale_cursors(self, tmp_path):
+        path = str(tmp_path / "raw.parquet")
+        get_messages(range(5)).to_parquet(path, engine="fastparquet")
+        save_cursors(path, {"acc_0": 4, "acc_1": 3})
+
+        # data saved without its cursors
+        get_messages(range(8)).to_parquet(path, engine="fastparquet")
+
+        assert load_cursors(path) is None
@@ -0,0 +1,87 @@
+import pytest
+import pandas as pd
+
+from core.libs import perf_metrics
+from core.libs.data_cache import clear_cache
+from core.libs.perf_metrics import task, flow, get_path_perf_metrics
+from core.libs.utils import read_data, save_data
+
+
+@task(name="Double rows", task_run_name="double-rows")
+def double_rows(df):
+    return pd.concat([df, df], ignore_index=True)
+
+
+@task(name="Fail", task_run_name="fail")
+def fail(df):
+    raise ValueError("failed")
+
+
+@flow(name="Flow metrics", flow_run_name="flow-metrics")
+def flow_metrics(base_path):
+    df = read_data(base_path, "messages")
+    df = double_rows(df)
+    save_data(base_path, "messages_double", df)
+
+
+@flow(name="Flow metrics failed", flow_run_name="flow-metrics-failed")
+def flow_metrics_failed(base_path):
+    fail(read_data(base_path, "messages"))
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """Messages saved, and metrics saved in temporary path"""
+    monkeypatch.setattr(perf_metrics, "PATH_PERF_METRICS", str(tmp_path / "metrics"))
+    clear_cache()
+
+    df = pd.DataFrame({"ID": [f"id_{i}" for i in range(10)], "nb": range(10)})
+    save_data.fn(str(tmp_path), "messages", df)
+
+    yield str(tmp_path)
+
+    clear_cache()
+
+
+class TestPerfMetrics:
+    def test_flow(self, base_path):
+        flow_metrics(base_path)
+        df = pd.read_parquet(get_path_perf_metrics())
+
+        assert df["name"].tolist() == [
+            "flow_metrics",
+            "read_data",
+            "double_rows",
+            "save_data",
+        ]
+        assert df["run_id"].nunique() == 1
+        assert (df["status"] == "completed").all()
+        assert df["rows_in"].fillna(-1).tolist() == [-1, -1, 10, 20]
+        assert df["rows_out"].fillna(-1).tolist() == [-1, 10, 20, -1]
+        assert (df["wall_time_s"] > 0).all()
+
+        # bytes of tasks, also counted in flow
+        df = df.set_index("name")
+        assert df.loc["read_data", "bytes_read"] > 0
+        assert df.loc["save_data", "bytes_written"] > 0
+        assert df.loc["flow_metrics", "bytes_read"] == df["bytes_read"].iloc[1:].sum()
+        assert df.loc["flow_metrics", "bytes_written"] == df.loc[
+            "save_data", "bytes_written"
+        ]
+
+        # metrics of next runs appended
+        flow_metrics(base_path)
+        assert pd.read_parquet(get_path_perf_metrics())["run_id"].nunique() == 2
+
+    def test_flow_failed(self, base_path):
+        with pytest.raises(ValueError):
+            flow_metrics_failed(base_path)
+        df = pd.read_parquet(get_path_perf_metrics())
+
+        assert df["status"].tolist() == ["failed", "completed", "failed"]
+
+    def test_task_outside_flow(self, base_path):
+        df = double_rows.fn(pd.DataFrame({"nb": [1]}))
+
+        assert df.shape[0] == 2
+        assert not perf_metrics._metrics_ended
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+import pandas as pd
+
+from core.libs import utils
+from core.libs.data_cache import clear_cache
+from core.libs.processed_ids import (
+    build_processed_ids,
+    add_processed_ids,
+    is_processed,
+    get_path_processed_ids,
+    load_processed_ids,
+)
+from core.libs.utils import (
+    save_data,
+    keep_data_to_process,
+    keep_data_not_processed,
+)
+
+
+def get_messages(ids):
+    """Messages of two accounts, by id_message"""
+    return pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 2}_{i}" for i in ids],
+            "account": [f"acc_{i % 2}" for i in ids],
+            "id_message": list(ids),
+            "text_original": [f"text {i}" for i in ids],
+        }
+    )
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """Save messages in a dataset with processed IDs"""
+    monkeypatch.setattr(utils, "LIST_DATA_PROCESSED_IDS", ["messages"])
+    clear_cache()
+
+    save_data.fn(
+        str(tmp_path), "messages", get_messages(range(0, 100, 3)), ["account"]
+    )
+
+    yield str(tmp_path)
+
+    clear_cache()
+
+
+class TestProcessedIds:
+    def test_is_processed(self):
+        processed = build_processed_ids(get_messages(range(0, 100, 3)))
+
+        assert processed["watermarks"] == {"acc_0": 96, "acc_1": 99}
+        assert is_processed(processed, get_messages(range(0, 100, 3))).all()
+
+        # new rows, before and after watermark
+        assert not is_processed(processed, get_messages([1, 2, 100, 101, 1000])).any()
+
+    def test_bloom_full(self):
+        processed = build_processed_ids(get_messages(range(10)))
+
+        assert add_processed_ids(processed, get_messages(range(200001))) is None
+
+    def test_updated_by_save(self, base_path):
+        path = f"{base_path}/messages.parquet"
+
+        # new rows appended
+        save_data.fn(
+            base_path, "messages", get_messages([1, 200]), ["account"], append=True
+        )
+        processed = load_processed_ids(path)
+
+        assert processed is not None
+        assert processed["nb_ids"] == 36
+        assert processed["watermarks"] == {"acc_0": 200, "acc_1": 99}
+
+        # data rewritten
+        df = get_messages(range(5))
+        save_data.fn(base_path, "messages", df, ["account"])
+
+        assert load_processed_ids(path)["nb_ids"] == 5
+
+    def test_keep_data_not_processed(self, base_path):
+        df_source = get_messages(range(150))
+        df_saved = get_messages(range(0, 100, 3))
+
+        pd.testing.assert_frame_equal(
+            keep_data_not_processed.fn(df_source, base_path, "messages"),
+            keep_data_to_process.fn(df_source, df_saved),
+        )
+
+    def test_rebuilt_if_stale(self, base_path):
+        path = f"{base_path}/messages.parquet"
+
+        # data saved by another process
+        get_messages(range(10)).to_parquet(
+            path, engine="fastparquet", partition_cols=["account"]
+        )
+
+        assert load_processed_ids(path) is None
+        assert keep_data_not_processed.fn(
+            get_messages(range(12)), base_path, "messages"
+        )["id_message"].tolist() == [10, 11]
+        assert load_processed_ids(path) is not None
+        assert os.path.exists(get_path_processed_ids(path))
@@ -0,0 +1,73 @@
+import os
+import json
+
+import pytest
+
+from core.libs import regions
+from core.libs.regions import build_regions_table, load_regions_table
+
+
+@pytest.fixture
+def path_geojson(tmp_path, monkeypatch):
+    """Small GeoJSON of regions, and path of table of regions"""
+    path = tmp_path / "ru_region.json"
+    data = {
+        "features": [
+            {"id": "RU-MOW", "properties": {"name": "Moskva"}, "geometry": {}},
+            {"id": "RU-MOS", "properties": {"name": "Moskva Oblast"}, "geometry": {}},
+            {"id": "RU-KR", "properties": {"name": "Karelia"}, "geometry": {}},
+            {"id": "RU-KHM", "properties": {"name": "Khanty-Mansiy"}, "geometry": {}},
+            {"id": "RU-YEV", "properties": {"name": "Yevrey'skaya"}, "geometry": {}},
+        ]
+    }
+    path.write_text(json.dumps(data))
+
+    monkeypatch.setattr(regions, "PATH_JSON_RU_REGION", str(path))
+    monkeypatch.setattr(
+        regions, "PATH_JSON_RU_REGION_IDS", str(tmp_path / "ru_region_ids.json")
+    )
+    monkeypatch.setattr(regions, "_regions_table", None)
+
+    return path
+
+
+class TestRegionsTable:
+    def test_aliases(self, path_geojson):
+        table = build_regions_table()
+
+        assert table["names"]["Yevrey'skaya"] == "RU-YEV"
+        assert table["aliases"] == {
+            "Moscow": "RU-MOW",
+            "Moscow Oblast": "RU-MOS",
+            "Karelia": "RU-KR",
+            "Khanty-Mansiy": "RU-KHM",
+            "Yevreyskaya": "RU-YEV",
+        }
+        assert list(table["aliases_moscow"].items()) == [
+            ("Moscow", "RU-MOS"),
+            ("Karelia", "RU-KR"),
+            ("Khanty-Mansiy", "RU-KHM"),
+            ("Yevreyskaya", "RU-YEV"),
+        ]
+
+    def test_loaded_once(self, path_geojson):
+        table = load_regions_table()
+
+        assert os.path.exists(regions.PATH_JSON_RU_REGION_IDS)
+        assert load_regions_table() is table
+
+        # table saved is loaded, without GeoJSON
+        path_geojson.unlink()
+        regions._regions_table = None
+        assert load_regions_table() == table
+
+    def test_rebuilt_if_geojson_newer(self, path_geojson):
+        build_regions_table()
+
+        data = json.loads(path_geojson.read_text())
+        data["features"] = data["features"][:1]
+        path_geojson.write_text(json.dumps(data))
+        mtime = os.path.getmtime(regions.PATH_JSON_RU_REGION_IDS) + 10
+        os.utime(path_geojson, (mtime, mtime))
+
+        assert load_regions_table()["names"] == {"Moskva": "RU-MOW"}
@@ -0,0 +1,110 @@
+import datetime
+
+import pytest
+import pandas as pd
+from telethon.errors import FloodWaitError
+
+from core.benchmarks.bench_filter import tasks_as_functions
+from core.benchmarks.bench_telegram_extract import run_extract
+from core.benchmarks.telegram_fake import FakeTelegramClient
+from core.libs.data_cache import clear_cache
+from core.libs.extract_cursors import load_cursors
+from core.process_datalake.telegram import telegram_extract
+
+
+async def get_ids(client, **kwargs):
+    """Ids of messages iterated"""
+    return [message.id async for message in client.iter_messages("acc", **kwargs)]
+
+
+async def no_sleep(seconds):
+    """FloodWait not waited"""
+    return None
+
+
+@pytest.fixture
+def extract(monkeypatch):
+    """Tasks of extraction as functions, with small batches and no wait"""
+    monkeypatch.setattr(telegram_extract, "SIZE_BATCH_TELEGRAM", 7)
+    monkeypatch.setattr("asyncio.sleep", no_sleep)
+    clear_cache()
+
+    with tasks_as_functions(telegram_extract):
+        yield
+
+    clear_cache()
+
+
+class TestFakeTelegramClient:
+    def test_iter_messages(self):
+        client = FakeTelegramClient(nb_messages=10)
+        run = client.loop.run_until_complete
+
+        assert run(get_ids(client, offset_id=7, reverse=True)) == [8, 9, 10]
+        assert run(get_ids(client, offset_id=4)) == [3, 2, 1]
+        assert run(get_ids(client, limit=2)) == [10, 9]
+
+        # date before first message, as for a new account
+        date = datetime.datetime(2021, 12, 31, 22, 59, 59)
+        assert run(get_ids(client, offset_date=date, reverse=True)) == list(
+            range(1, 11)
+        )
+
+    def test_same_messages(self):
+        client = FakeTelegramClient(nb_messages=5, seed=1)
+
+        assert client.get_message("acc", 3) == client.get_message("acc", 3)
+        assert client.get_message("acc", 3) != client.get_message("acc_2", 3)
+
+    def test_flood_wait(self):
+        client = FakeTelegramClient(nb_messages=10, rate_flood_wait=1.0)
+
+        with pytest.raises(FloodWaitError):
+            client.loop.run_until_complete(get_ids(client, reverse=True))
+        assert client.nb_flood_waits == 1
+
+
+class TestTelegramExtract:
+    def test_extract(self, tmp_path, extract):
+        client = FakeTelegramClient(
+            nb_messages=50, size_request=10, rate_flood_wait=0.2, seed=2
+        )
+        dict_results = run_extract(client, ["acc_0", "acc_1"], str(tmp_path))
+
+        df = pd.read_parquet(tmp_path / "raw_telegram.parquet")
+        nb_texts = {
+            account: sum(
+                client.get_message(account, i).text != "" for i in range(1, 51)
+            )
+            for account in ["acc_0", "acc_1"]
+        }
+
+        assert client.nb_flood_waits > 0
+        assert dict_results == nb_texts
+        assert df["ID"].is_unique
+        assert df.shape[0] == sum(nb_texts.values())
+        assert load_cursors(str(tmp_path / "raw_telegram.parquet")) == {
+            "acc_0": 50,
+            "acc_1": 50,
+        }
+
+    def test_resume(self, tmp_path, extract):
+        run_extract(FakeTelegramClient(nb_messages=30), ["acc_0"], str(tmp_path))
+        run_extract(
+            FakeTelegramClient(nb_messages=45), ["acc_0", "acc_1"], str(tmp_path)
+        )
+
+        df = pd.read_parquet(tmp_path / "raw_telegram.parquet")
+
+        assert df["ID"].is_unique
+        assert df.groupby("account", observed=True)["id_message"].max().to_dict() == {
+            "acc_0": 45,
+            "acc_1": 45,
+        }
+
+    def test_failed_account(self, tmp_path, extract):
+        client = FakeTelegramClient(nb_messages=30, rate_flood_wait=1.0)
+        dict_results = run_extract(client, ["acc_0"], str(tmp_path))
+
+        assert isinstance(dict_results["acc_0"], FloodWaitError)
+        assert client.nb_flood_waits == telegram_extract.MAX_RETRIES_FLOOD_WAIT + 1
@@ -0,0 +1,180 @@
+import re
+import random
+
+import pytest
+import pandas as pd
+
+from core.libs import text_cleaner
+from core.libs.text_cleaner import (
+    LIST_MOTIFS,
+    LIST_TRANSLATIONS,
+    clean_text,
+    clean_text_series,
+)
+
+
+def format_clean_text_ref(text):
+    """
+    Formate and clean text, as before precompiled cleaner
+
+    Args:
+        text: text
+
+    Returns:
+        Text cleaned
+    """
+    # Remove special characters
+    regex_pattern = re.compile(
+        pattern="["
+        "\U0001f600-\U0001f64f"  # emoticons
+        "\U0001f300-\U0001f5ff"  # symbols & pictographs
+        "\U0001f680-\U0001f6ff"  # transport & map symbols
+        "\U0001f1e0-\U0001f1ff"  # flags (iOS)
+        "\U00002500-\U00002bef"  # chinese char
+        "\U00002702-\U000027b0"
+        "\U00002702-\U000027b0"
+        "\U000024c2-\U0001f251"
+        "\U0001f926-\U0001f937"
+        "\U00010000-\U0010ffff"
+        "\u2640-\u2642"
+        "\u2600-\u2b55"
+        "\u200d"
+        "\u23cf"
+        "\u23e9"
+        "\u231a"
+        "\ufe0f"  # dingbats
+        "\u3030"
+        "]+",
+        flags=re.UNICODE,
+    )
+    text = regex_pattern.sub("", text)
+
+    # Remove unwanted text
+    motifs = [
+        r"Подписывайся на SHOT",
+        r"Прислать новость (https://t.me/shot_go)",
+        r"Прислать новость",
+        r"Предложить свою новость",
+        r"Подслушано электрички Москвы",
+        r"#Новости@transport_online",
+        r"Минтранс Подмосковья",
+        r"Прислать фото/видео/информацию: @Astra4bot",
+        r"Резервный канал ASTRA: https://t.me/astrapress2",
+        r"astrapress@protonmail.com",
+        r"Предложить свою новость (https://t.me/electrichkibot)",
+        r"Предложить свою новость",
+        r"Подслушано электрички Москвы (https://t.me/electrichki)",
+        r"Подслушано электрички Москвы",
+        r"SHOT",
+    ]
+    for motif in motifs:
+        text = re.sub(motif, "", text)
+
+    # remove after
+    text = re.sub(r"\s*(Фото|Видео)\s*\S*\s*от:.*?\n", "", text)
+
+    # remove http and @
+    text = re.sub(r"@\S+|http\S+", "", text)
+    text = re.sub(r"Subscribe to SHOT.*", "", text)
+    text = re.sub(r"@Astra4botРезервный.*|Прислать фото/видео/информацию:", "", text)
+    text = re.sub(r"\s*—\s*", ". ", text)
+    text = re.sub(r"—\s*", "", text)
+    text = re.sub(r"&amp;", "", text)
+
+    # Remove first and last character if
+    if text.startswith(" "):
+        text = text[1:]
+    if text.endswith(":"):
+        text = text[:-1]
+
+    # Remove unwanted text translations
+    translations = [
+        "Here is the translation:",
+        "Here is the English translation:",
+        "Here is the translation to English:",
+        "Here's the translation:",
+        "Translation in English:",
+        "I'm ready to translate.",
+        "The translation is:",
+        "Translation:",
+        "I'll translate the text for you:",
+        "I'll translate the text accurately,",
+        "Translation in English as listed:",
+        "I can translate this text for you.",
+        "I'll translate the text accurately from Russian to English while maintaining the context and tone of the original.",
+        "I'll translate the text accurately and grammatically correct.",
+        "Here is the translation of your text from Russian to English:",
+    ]
+    for trad in translations:
+        text = text.replace(trad, "")
+
+    if not text:
+        return None
+
+    text = re.sub(r" +", " ", text).strip()
+
+    return text
+
+
+LIST_PIECES = (
+    LIST_MOTIFS
+    + LIST_TRANSLATIONS
+    + [
+        "Прислать новость https://t.me/shot_go",
+        "SH",
+        "OT",
+        "Подписывайся на ",
+        "Фото: Иван от: канала\n",
+        "Видео от:",
+        "@channel",
+        "http://example.com/a",
+        "Subscribe to SHOT now",
+        "@Astra4botРезервный канал",
+        " — ",
+        "—",
+        "&amp;",
+        "\U0001f600\U0001f680",
+        "\u200d\ufe0f",
+        "   ",
+        " ",
+        ":",
+        "\n",
+        "Поезд сошёл с рельсов",
+        "Train derailed near Moscow.",
+    ]
+)
+
+
+@pytest.fixture
+def texts():
+    """Random texts made of motifs, substitutions and plain words"""
+    rng = random.Random(0)
+
+    return [
+        "".join(rng.choice(LIST_PIECES) for _ in range(rng.randint(1, 8)))
+        for _ in range(3000)
+    ] + ["", " ", "  ", ":", " :", "SHSHOTOT", "Прислать Прислать новостьновость"]
+
+
+class TestTextCleaner:
+    def test_clean_text(self, texts):
+        for text in texts:
+            assert clean_text(text) == format_clean_text_ref(text), repr(text)
+
+    def test_clean_text_series(self, texts):
+        serie = pd.Series(texts + [None], index=[0] * (len(texts) + 1))
+
+        result = clean_text_series(serie)
+
+        assert result.index.equals(serie.index)
+        assert result.iloc[:-1].tolist() == [format_clean_text_ref(x) for x in texts]
+        assert result.iloc[-1] is None
+
+    def test_clean_text_parallel(self, texts, monkeypatch):
+        monkeypatch.setattr(text_cleaner, "MIN_SIZE_CLEAN_PARALLEL", 100)
+        serie = pd.Series(texts + [None] + texts)
+
+        pd.testing.assert_series_equal(
+            clean_text_series(serie, parallel=True, nb_workers=2),
+            clean_text_series(serie, parallel=False),
+        )
@@ -0,0 +1,72 @@
+import pytest
+import pandas as pd
+
+from core.libs.token_index import (
+    build_index_tokens,
+    merge_index_tokens,
+    get_ids_with_words,
+    get_ids_with_substring,
+    mask_candidates,
+)
+
+
+@pytest.fixture
+def df_messages():
+    """Create a sample DataFrame of messages"""
+    return pd.DataFrame(
+        {
+            "ID": ["acc_1", "acc_2", "acc_3", "acc_4"],
+            "text_original": ["Поезд сошел", "Пожар", None, "Арест"],
+            "text_translate": [
+                "Freight train derailed near Moscow",
+                "Fire of a relay box, train stopped",
+                None,
+                "Man arrested for arson on the railway",
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def df_index(df_messages):
+    """Index of sample messages"""
+    return merge_index_tokens(pd.DataFrame(), df_messages)
+
+
+class TestBuildIndex:
+    def test_tokens_normalized(self, df_messages):
+        df_index = build_index_tokens(df_messages)
+
+        tokens = set(df_index.loc[df_index["ID"] == "acc_1", "token"])
+        assert {"freight", "train", "moscow", "поезд"} <= tokens
+        assert "acc_3" not in df_index["ID"].values
+
+    def test_merge_replace_tokens(self, df_index):
+        df_new = pd.DataFrame(
+            {"ID": ["acc_1", "acc_5"], "text_translate": ["Bus", "Train fire"]}
+        )
+        df_index = merge_index_tokens(df_index, df_new)
+
+        assert get_ids_with_words(df_index, ["train"]) == {"acc_2", "acc_5"}
+        assert df_index["token"].is_monotonic_increasing
+
+
+class TestSearchIndex:
+    def test_words(self, df_index):
+        assert get_ids_with_words(df_index, ["train", "fire"]) == {"acc_2"}
+        assert get_ids_with_words(df_index, ["Train"]) == {"acc_1", "acc_2"}
+        assert get_ids_with_words(df_index, ["ok.ru"]) is None
+
+    @pytest.mark.parametrize("text", ["rail", "relay bo", "arrest", "Пож", "xyz"])
+    def test_substring(self, df_messages, df_index, text):
+        ids = get_ids_with_substring(df_index, text)
+        mask = mask_candidates(df_messages["ID"], df_index, ids)
+
+        # all messages who contain text are candidates
+        expected = df_messages["text_translate"].str.contains(
+            text, na=False
+        ) | df_messages["text_original"].str.contains(text, na=False)
+        assert not (expected & ~mask).any()
+
+    def test_substring_regex(self, df_index):
+        assert get_ids_with_substring(df_index, "train|fire") is None
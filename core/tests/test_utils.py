@@ -0,0 +1,280 @@
+import os
+import json
+import pytest
+import pandas as pd
+
+from core.libs import utils
+from core.libs.utils import (
+    read_data,
+    save_data,
+    compact_data,
+    read_data_chunks,
+    read_data_columns,
+    upsert_data,
+    concat_old_new_df,
+    upd_data_artifact,
+    create_artifact,
+    collect_artifact,
+)
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    """Save sample messages partitioned by account"""
+    df = pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 3}_{i}" for i in range(30)],
+            "account": [f"acc_{i % 3}" for i in range(30)],
+            "text_original": [f"text {i}" for i in range(30)],
+        }
+    )
+    save_data.fn(str(tmp_path), "messages", df, ["account"])
+
+    return str(tmp_path)
+
+
+class TestReadDataChunks:
+    def test_columns(self, base_path):
+        assert read_data_columns(base_path, "messages") == [
+            "ID",
+            "text_original",
+            "account",
+        ]
+        assert read_data_columns(base_path, "unknown") == []
+
+    @pytest.mark.parametrize("size_chunk, nb_chunks", [(1, 3), (15, 2), (100, 1)])
+    def test_all_data_read(self, base_path, size_chunk, nb_chunks):
+        chunks = list(read_data_chunks(base_path, "messages", size_chunk))
+
+        # one partition by row group, regrouped until size of chunk
+        assert len(chunks) == nb_chunks
+        df = pd.concat(chunks)
+        assert sorted(df["ID"]) == sorted(f"acc_{i % 3}_{i}" for i in range(30))
+        assert (df["ID"].str[:5] == df["account"].astype(str)).all()
+
+    def test_no_data(self, base_path):
+        assert list(read_data_chunks(base_path, "unknown", 10)) == []
+
+
+@pytest.fixture
+def df_old():
+    """Old data, sorted by account partitions and date"""
+    df = pd.DataFrame(
+        {
+            "ID": [f"acc_{i % 4}_{i}" for i in range(40)],
+            "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(
+                [i // 3 for i in range(40)], unit="h"
+            ),
+            "text": "old",
+        }
+    )
+    return df.sort_values(["ID"]).sort_values("date", kind="stable")
+
+
+class TestUpsertData:
+    def test_same_as_concat(self, df_old):
+        df_new = pd.DataFrame(
+            {
+                "ID": ["acc_1_1", "acc_9_1", "acc_9_1", "acc_2_38"],
+                "date": pd.to_datetime(
+                    ["2024-01-01", "2023-12-31", "2023-12-31", "2024-01-02"]
+                ),
+                "text": ["upd", "first", "new", "upd"],
+            }
+        )
+
+        df = upsert_data(df_old, df_new, cols=["ID"])
+        df_concat = concat_old_new_df(df_old, df_new, cols=["ID"])
+
+        pd.testing.assert_frame_equal(
+            df.sort_values("ID").reset_index(drop=True),
+            df_concat.sort_values("ID").reset_index(drop=True),
+        )
+        assert df.attrs["upsert"] == {"inserted": 1, "updated": 2}
+
+    def test_sorted_by_date_and_id(self, df_old):
+        # partitions read one after the other
+        df_old = df_old.sort_values("ID", key=lambda x: x.str[:5], kind="stable")
+        df_new = df_old.sample(10, random_state=0).assign(text="new")
+
+        df = upsert_data(df_old, df_new, cols=["ID"])
+
+        pd.testing.assert_frame_equal(
+            df, df.sort_values(["date", "ID"]).reset_index(drop=True)
+        )
+        assert (df["text"] == "new").sum() == 10
+
+    def test_without_date(self):
+        df_old = pd.DataFrame({"ID": ["a", "b", "c"], "value": [1, 2, 3]})
+        df_new = pd.DataFrame({"ID": ["b", "d"], "value": [20, 40]})
+
+        df = upsert_data(df_old, df_new, cols=["ID"])
+
+        assert df["ID"].tolist() == ["a", "c", "b", "d"]
+        assert df["value"].tolist() == [1, 3, 20, 40]
+
+    def test_empty(self, df_old):
+        assert upsert_data(pd.DataFrame(), df_old, cols=["ID"]).shape == df_old.shape
+        assert upsert_data(df_old, pd.DataFrame(), cols=["ID"]).shape == df_old.shape
+
+
+@pytest.fixture
+def df_saved(base_path):
+    """Messages saved, as read from parquet"""
+    return read_data.fn(base_path, "messages")
+
+
+def count_files(path):
+    """Number of parquet files of a dataset"""
+    return sum(
+        file.endswith(".parquet") for _, _, files in os.walk(path) for file in files
+    )
+
+
+class TestReadData:
+    def test_columns(self, base_path):
+        df = read_data.fn(base_path, "messages", columns=["ID"])
+
+        assert df.columns.tolist() == ["ID"]
+        assert df.shape[0] == 30
+
+    def test_filters(self, base_path):
+        df = read_data.fn(
+            base_path,
+            "messages",
+            columns=["ID", "account"],
+            filters=[("account", "==", "acc_1"), ("text_original", ">=", "text 2")],
+        )
+
+        # partition and rows filtered
+        assert sorted(df["ID"]) == sorted(
+            f"acc_1_{i}" for i in range(30) if i % 3 == 1 and f"text {i}" >= "text 2"
+        )
+
+
+class TestSaveDataAppend:
+    def test_new_rows_appended(self, base_path, df_saved):
+        df_new = pd.DataFrame(
+            {
+                "ID": ["acc_0_30", "acc_3_31"],
+                "account": ["acc_0", "acc_3"],
+                "text_original": ["text 30", "text 31"],
+            }
+        )
+        df = pd.concat([df_saved, df_new]).reset_index(drop=True)
+
+        save_data.fn(base_path, "messages", df, ["account"], df_old=df_saved)
+
+        # one new file by partition of new rows
+        assert count_files(f"{base_path}/messages.parquet") == 5
+        df_read = read_data.fn(base_path, "messages")
+        assert sorted(df_read["ID"]) == sorted(df["ID"])
+
+    def test_old_rows_updated_rewritten(self, base_path, df_saved):
+        df = df_saved.copy()
+        df.loc[0, "text_original"] = "updated"
+
+        save_data.fn(base_path, "messages", df, ["account"], df_old=df_saved)
+
+        # stale files of dataset are removed
+        assert count_files(f"{base_path}/messages.parquet") == 3
+        df_read = read_data.fn(base_path, "messages").set_index("ID")
+        assert df_read.shape[0] == 30
+        assert df_read.loc[df.loc[0, "ID"], "text_original"] == "updated"
+
+    def test_only_new_rows(self, base_path):
+        df_new = pd.DataFrame(
+            {"ID": ["acc_0_30"], "account": ["acc_0"], "text_original": ["text 30"]}
+        )
+
+        save_data.fn(base_path, "messages", df_new, ["account"], append=True)
+
+        assert count_files(f"{base_path}/messages.parquet") == 4
+        assert read_data.fn(base_path, "messages").shape[0] == 31
+
+        # new rows and data saved are rewritten, if append is not possible
+        save_data.fn(base_path, "messages", df_new.assign(ID="acc_0_31"), append=True)
+
+        assert os.path.isfile(f"{base_path}/messages.parquet")
+        assert read_data.fn(base_path, "messages").shape[0] == 32
+
+    def test_without_old_data_rewritten(self, base_path, df_saved):
+        save_data.fn(base_path, "messages", df_saved, ["account"])
+
+        assert count_files(f"{base_path}/messages.parquet") == 3
+        assert read_data.fn(base_path, "messages").shape[0] == 30
+
+
+class TestCompactData:
+    def test_compaction(self, base_path, df_saved):
+        for i in range(30, 33):
+            df_new = pd.DataFrame(
+                {"ID": [f"acc_0_{i}"], "account": ["acc_0"], "text_original": ["x"]}
+            )
+            df = pd.concat([df_saved, df_new]).reset_index(drop=True)
+            save_data.fn(base_path, "messages", df, ["account"], df_old=df_saved)
+            df_saved = read_data.fn(base_path, "messages")
+
+        assert count_files(f"{base_path}/messages.parquet") == 6
+
+        compact_data.fn(base_path, "messages")
+
+        assert count_files(f"{base_path}/messages.parquet") == 3
+        df_read = read_data.fn(base_path, "messages")
+        assert sorted(df_read["ID"]) == sorted(df_saved["ID"])
+
+
+@pytest.fixture
+def artifacts(monkeypatch, tmp_path):
+    """Artifacts created, by key"""
+    dict_artifacts = {}
+
+    def create_table_artifact(key, table):
+        dict_artifacts[key] = table
+
+    monkeypatch.setattr(utils, "create_table_artifact", create_table_artifact)
+    monkeypatch.setattr(utils, "PATH_ARTIFACTS", str(tmp_path / "artifacts"))
+
+    return dict_artifacts
+
+
+class TestArtifact:
+    def test_created_once(self, artifacts):
+        upd_data_artifact("info 1", 1)
+        upd_data_artifact("info 2", [2])
+        create_artifact("key")
+
+        assert artifacts["key"] == [
+            {"info": "info 1", "data": 1},
+            {"info": "info 2", "data": [2]},
+        ]
+
+        # data reset after artifact created
+        create_artifact("key_2")
+        assert artifacts["key_2"] == []
+
+    def test_collect_by_run(self, artifacts):
+        @collect_artifact("subflow")
+        def subflow():
+            upd_data_artifact("subflow", 2)
+
+        with collect_artifact("flow"):
+            upd_data_artifact("flow", 1)
+            subflow()
+
+        assert artifacts["subflow"] == [{"info": "subflow", "data": 2}]
+        assert artifacts["flow"] == [{"info": "flow", "data": 1}]
+
+    def test_local_file(self, artifacts, monkeypatch):
+        def create_table_artifact(key, table):
+            raise RuntimeError("API not reachable")
+
+        monkeypatch.setattr(utils, "create_table_artifact", create_table_artifact)
+
+        upd_data_artifact("info", 1)
+        create_artifact("key")
+
+        files = os.listdir(utils.PATH_ARTIFACTS)
+        assert len(files) == 1 and files[0].startswith("key_")
+        with open(os.path.join(utils.PATH_ARTIFACTS, files[0])) as f:
+            assert json.load(f) == [{"info": "info", "data": 1}]
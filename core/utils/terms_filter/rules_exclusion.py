@@ -0,0 +1,16 @@
+# rules to exclude data not pertinant, before filters
+# - name: name of the rule, saved with data excluded
+# - type:
+#   - keyword: text contains one of the terms (case sensitive)
+#   - regex: text match one of the regex
+#   - account: all data of the accounts
+# - terms: list of keywords or regex (not used for account)
+# - accounts (optional): rule applied only on data of these accounts
+# - ignore_case (optional): search terms ignoring case
+list_rules_exclusion = [
+    {
+        "name": "covid",
+        "type": "keyword",
+        "terms": ["COVID", "covid"],
+    },
+]
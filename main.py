@@ -32,6 +32,14 @@ from core.process_datalake.classify.cloud_to_classify import (
     flow_cloud_to_classify,
 )
 
+# Compaction of datalake
+from core.process_datalake.compaction.datalake_compaction import (
+    flow_datalake_compaction,
+)
+
+# Table of regions
+from core.libs.regions import build_regions_table
+
 
 # # Process Applicatifs
 from core.process_data_warehouse.flow_dwh_inc_railway import flow_dwh_inc_railway
@@ -81,6 +89,8 @@ COMMANDS = {
     "class": process_classify_to_cloud,
     "sync": flow_cloud_to_classify,
     "dwh": process_dwh,
+    "compact": flow_datalake_compaction,
+    "regions": build_regions_table,
 }
 
 
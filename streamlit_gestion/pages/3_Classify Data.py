@@ -16,6 +16,7 @@ from core.config.schemas import (
     SCHEMA_EXCEL_ARREST,
     # SCHEMA_EXCEL_SABOTAGE,
 )
+from core.libs.token_index import get_ids_with_substring, mask_candidates
 
 from streamlit_gestion.utils.variables import (
     LIST_EXP_LAWS,
@@ -673,6 +674,37 @@ def save_data():
     st.rerun()
 
 
+@st.cache_data
+def read_index_tokens(path, mtime):
+    """
+    Read index of tokens, reloaded when file is updated
+
+    Args:
+        path: path to index
+        mtime: modification time of index
+
+    Returns:
+        Dataframe with index of tokens
+    """
+
+    return pd.read_parquet(path)
+
+
+def get_index_tokens():
+    """
+    Get index of tokens
+
+    Returns:
+        Dataframe with index of tokens (empty if not exists)
+    """
+
+    path = f"{PATH_FILTER_DATALAKE}/index_tokens.parquet"
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["token", "ID"])
+
+    return read_index_tokens(path, os.path.getmtime(path))
+
+
 def apply_basic_filters(df, dict_filter):
     """
     Apply basic filters
@@ -704,6 +736,12 @@ def apply_basic_filters(df, dict_filter):
 
     # Test
     if dict_filter["filt_text"]:
+        # keep candidates found with index of tokens
+        df_index = get_index_tokens()
+        ids_candidates = get_ids_with_substring(df_index, dict_filter["filt_text"])
+        if ids_candidates is not None:
+            df = df[mask_candidates(df["ID"], df_index, ids_candidates)]
+
         mask = df["text_translate"].str.contains(
             dict_filter["filt_text"], na=False
         ) | df["text_original"].str.contains(dict_filter["filt_text"], na=False)
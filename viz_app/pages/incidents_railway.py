@@ -9,7 +9,7 @@ import dash_daq as daq
 
 import plotly.graph_objects as go
 
-from utils.variables import PATH_DMT_INC_RAILWAY
+from utils.variables import PATH_DMT_INC_RAILWAY, PATH_JSON_RU_REGION
 from utils.variables_charts import COLORS_RAILWAY
 
 from assets.components.warning_sources import warning_sources
@@ -43,8 +43,8 @@ dash.register_page(
 sufix_subtitle = "on the Russian Railways Network from 2022 to 2025"
 
 
-# read file json
-with open("core/utils/ru_region.json") as file:
+# read file json (polygons of regions drawn on map)
+with open(PATH_JSON_RU_REGION) as file:
     polygons = json.load(file)
 
 
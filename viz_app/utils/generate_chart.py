@@ -1,6 +1,9 @@
+import os
+import json
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
-import json
 
 import plotly.graph_objects as go
 
@@ -8,6 +11,7 @@ from dash_holoniq_wordcloud import DashWordcloud
 
 
 from utils.utils_charts import fig_upd_layout
+from utils.variables import PATH_JSON_RU_REGION, PATH_JSON_RU_REGION_IDS
 
 
 from utils.variables_charts import (
@@ -390,13 +394,19 @@ def generate_sunburst(title, subtitle, df, colors, **kwargs):
     return fig
 
 
+@lru_cache(maxsize=1)
 def get_region():
     """
-    Get the region and id from the json file
+    Get the region and id, from table of regions built by core
+    (GeoJSON is parsed only if table is not built)
     """
 
+    if os.path.exists(PATH_JSON_RU_REGION_IDS):
+        with open(PATH_JSON_RU_REGION_IDS) as file:
+            return json.load(file)["aliases"]
+
     # read file json
-    with open("core/utils/ru_region.json") as file:
+    with open(PATH_JSON_RU_REGION) as file:
         data = json.load(file)
 
     # get id and name
@@ -420,7 +430,7 @@ def prepare_df_region(df_region):
     Prepare the dataframe for the map chart
     """
     # get the total number of incidents by region
-    df_json_region = get_region()
+    df_json_region = dict(get_region())
 
     # convert to df
     df_json_region = pd.DataFrame(
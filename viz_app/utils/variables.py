@@ -3,6 +3,10 @@ PATH_DMT_INC_RAILWAY = "data/data_warehouse/datamarts/incidents_railway"
 PATH_DMT_BLOCK_SITE = "data/data_warehouse/datamarts/russia_block_sites"
 PATH_DMT_COMPO_WEAPONS = "data/data_warehouse/datamarts/compo_weapons"
 
+# Regions: GeoJSON (polygons) and table of ids built from it by core
+PATH_JSON_RU_REGION = "core/utils/ru_region.json"
+PATH_JSON_RU_REGION_IDS = "core/utils/ru_region_ids.json"
+
 
 # Home page content
 DICT_CONTENT = {